@@ -1,268 +1,1162 @@
-import spacy
+import hashlib
+import json
+import os
 import re
-from collections import Counter
-from textblob import TextBlob
+import threading
+import time
+import warnings
+from array import array
+from bisect import bisect_right
+from functools import lru_cache, partial
+from itertools import repeat
+from collections import Counter, namedtuple
+
+from cache import CacheResultados, gerar_chave, normalizar_com_posicoes
+from lexico import agrupar_ocorrencias, normalizar_termo
+from metricas import ColetorMetricas, MedidorEtapas, medir
+from regras import PACOTE_PADRAO, repositorio_padrao
+from verificacoes import MODO_COMPLETO, MODO_RAPIDO, MODOS, REGISTRO_PADRAO
+
+MODELO_PADRAO = 'pt_core_news_sm'
+
+# Versão do conjunto de regras de pontuação. Incremente sempre que uma
+# verificação mudar de comportamento, para invalidar relatórios em cache.
+VERSAO_REGRAS = '10'
+
+# Perfis de pipeline: componentes do modelo que NÃO são carregados.
+# As verificações só leem token.pos_, lemma_, is_stop, is_punct e text, então o
+# perfil "rapido" mantém apenas tok2vec, morphologizer, lemmatizer e attribute_ruler.
+PERFIS_PIPELINE = {
+    'rapido': ('parser', 'senter', 'ner'),
+    'completo': (),
+}
+PERFIL_PADRAO = 'rapido'
+
+# Snapshot do pipeline já podado (ver salvar_snapshot), carregado no lugar do pacote do modelo
+VARIAVEL_SNAPSHOT = 'BUSSOLA_MODELO_SNAPSHOT'
+
+# Tempos da partida do processo (importação do spaCy, carga do modelo, aquecimento)
+_tempos_partida = {}
+
+# Registro de modelos compartilhado pelo processo inteiro (uma carga por nome e perfil)
+_modelos = {}
+_trava_modelos = threading.Lock()
+
+# Analisadores compartilhados entre as sessões do Streamlit (um por perfil)
+_analisadores = {}
+_trava_analisador = threading.Lock()
+
+# Classes gramaticais consideradas na contagem de redundâncias
+_POS_SIGNIFICATIVAS = ('NOUN', 'VERB', 'ADJ')
+
+# Visão colunar de cada Doc (doc.to_array), com os atributos lidos pelas verificações
+_COLUNAS_TOKEN = ('LOWER', 'LEMMA', 'POS', 'IS_STOP', 'IS_PUNCT', 'IS_SPACE', 'LENGTH', 'IDX', 'IS_ALPHA')
+_LOWER, _LEMMA, _POS, _IS_STOP, _IS_PUNCT, _IS_SPACE, _LENGTH, _IDX, _IS_ALPHA = range(len(_COLUNAS_TOKEN))
+
+# Separador de frases usado por todas as verificações
+_RE_FIM_FRASE = re.compile(r'[.!?]+')
+# Pontos de corte seguros para a análise em blocos: logo após o fim de uma frase
+_RE_CORTE_BLOCO = re.compile(r'[.!?](?=\s)')
+# Texto que um corte em espaço precisa ter em volta para ver se partiria uma voz passiva ao meio
+_FOLGA_CORTE = 200
+
+# Textos maiores que isso (em caracteres) são analisados em blocos, com memória limitada
+LIMITE_TEXTO_UNICO = 100000
+TAMANHO_BLOCO = 50000
+
+# Um problema localizado no texto: tipo ('voz_passiva', 'frase_longa', 'paragrafo_longo',
+# 'frases_curtas', 'jargao', 'redundancia'), gravidade ('alta', 'media', 'baixa'),
+# posições de caractere [inicio, fim), índice da frase, uma descrição curta e, para
+# jargões, repetições e voz passiva, o termo (o do léxico, o lema ou o trecho).
+Achado = namedtuple('Achado', ['tipo', 'gravidade', 'inicio', 'fim', 'frase', 'mensagem', 'termo'],
+                    defaults=(None,))
+# Máximo de achados por relatório (e de posições guardadas por palavra repetida)
+LIMITE_ACHADOS = 500
+LIMITE_POSICOES_PALAVRA = 20
+
+# Redundâncias são contadas por lema dentro de uma janela deslizante de palavras:
+# quatro "lançamentos" num parágrafo pesam, espalhados por vinte páginas não
+JANELA_REDUNDANCIA = 150
+# Menor número de repetições numa janela que chega a ser considerado
+MINIMO_REPETICOES = 3
+
+# Lema mais repetido numa janela: lema, repetições e trechos (início, fim) na janela mais cheia
+Repeticao = namedtuple('Repeticao', ['lema', 'vezes', 'trechos'])
+
+# Voz passiva analítica: auxiliar (ser/estar sendo/ter sido/modal + ser),
+# um advérbio em -mente opcional e um particípio regular ou irregular.
+_AUXILIARES_PASSIVA = [
+    'foi', 'foram', 'é', 'são', 'era', 'eram', 'será', 'sera', 'serão', 'serao',
+    'seria', 'seriam', 'seja', 'sejam', 'fosse', 'fossem',
+    'está sendo', 'estão sendo', 'estava sendo', 'estavam sendo',
+    'tem sido', 'têm sido', 'tinha sido', 'tinham sido',
+    'vai ser', 'vão ser', 'pode ser', 'podem ser', 'deve ser', 'devem ser',
+]
+_PARTICIPIOS_IRREGULARES = [
+    'feit[oa]', 'desfeit[oa]', 'abert[oa]', 'escrit[oa]', 'descobert[oa]', 'eleit[oa]',
+    'expost[oa]', 'propost[oa]', 'impost[oa]', 'vist[oa]', 'dit[oa]', 'pag[oa]',
+    'gast[oa]', 'entregue', 'aceit[oa]',
+]
+# Palavras comuns terminadas em -ado/-ada/-ido/-ida que não são particípios
+# ("é cada vez maior", "saúde é vida", "não foi nada", "será sábado")
+_NAO_PARTICIPIOS = [
+    'cada', 'nada', 'vida', 'sábado', 'lado', 'fado', 'estado', 'mercado', 'resultado', 'feriado', 'legado',
+    'soldad[oa]', 'advogad[oa]', 'deputad[oa]', 'delegad[oa]', 'aliad[oa]', 'cunhad[oa]', 'namorad[oa]',
+    'década', 'jornada', 'estrada', 'escada', 'temporada', 'rodada', 'entrada', 'chegada', 'largada',
+    'dúvida', 'dívida', 'comida', 'bebida', 'saída', 'avenida', 'corrida', 'torcida', 'marido', 'apelido',
+    'ruído', 'vestido',
+]
+_RE_VOZ_PASSIVA = re.compile(
+    # A classe inicial descarta rápido as posições que não podem abrir um auxiliar
+    r'\b(?=[' + ''.join(sorted({a[0] for a in _AUXILIARES_PASSIVA})) + r'])'
+    r'(?:' + '|'.join(re.escape(a).replace(r'\ ', r'\s+')
+                      for a in sorted(_AUXILIARES_PASSIVA, key=len, reverse=True)) + r')'
+    r'\s+(?:\w+mente\s+)?'
+    r'(?!(?:' + '|'.join(_NAO_PARTICIPIOS) + r')s?\b)'
+    r'(?:\w+(?:ad|id)[oa]|' + '|'.join(_PARTICIPIOS_IRREGULARES) + r')s?\b',
+    re.IGNORECASE)
+
+
+def _validar_perfil(perfil):
+    if perfil not in PERFIS_PIPELINE:
+        raise ValueError(f"Perfil de pipeline desconhecido: {perfil!r}. Use um de: {', '.join(PERFIS_PIPELINE)}.")
+
+
+def _importar_spacy():
+    """Importa o spaCy só quando um modelo é realmente necessário (é a dependência mais pesada)."""
+    inicio = time.perf_counter()
+    import spacy
+    _tempos_partida.setdefault('importacao_spacy_s', round(time.perf_counter() - inicio, 3))
+    return spacy
+
+
+def carregar_modelo(nome=MODELO_PADRAO, perfil=PERFIL_PADRAO):
+    """Carrega o modelo spaCy uma única vez por processo e reaproveita a instância."""
+    _validar_perfil(perfil)
+    chave = (nome, perfil)
+    nlp = _modelos.get(chave)
+    if nlp is None:
+        with _trava_modelos:
+            nlp = _modelos.get(chave)
+            if nlp is None:
+                spacy = _importar_spacy()
+                inicio = time.perf_counter()
+                snapshot = os.environ.get(VARIAVEL_SNAPSHOT)
+                nlp = _carregar_snapshot(spacy, snapshot, nome, perfil) if snapshot else None
+                origem = 'snapshot' if nlp is not None else 'pacote'
+                if nlp is None:
+                    nlp = spacy.load(nome, exclude=PERFIS_PIPELINE[perfil])
+                _tempos_partida[f'carga_modelo_{perfil}_s'] = round(time.perf_counter() - inicio, 3)
+                _tempos_partida[f'origem_modelo_{perfil}'] = origem
+                _modelos[chave] = nlp
+    return nlp
+
+
+def salvar_snapshot(caminho, nome=MODELO_PADRAO, perfil=PERFIL_PADRAO):
+    """Serializa o pipeline já podado do perfil em `caminho`, para cargas mais rápidas.
+    
+    Use na construção da imagem e aponte BUSSOLA_MODELO_SNAPSHOT para o diretório.
+    """
+    spacy = _importar_spacy()
+    nlp = carregar_modelo(nome, perfil)
+    os.makedirs(caminho, exist_ok=True)
+    nlp.config.to_disk(os.path.join(caminho, 'config.cfg'))
+    with open(os.path.join(caminho, 'modelo.bin'), 'wb') as f:
+        f.write(nlp.to_bytes())
+    with open(os.path.join(caminho, 'bussola.json'), 'w', encoding='utf-8') as f:
+        json.dump({'nome': nome, 'perfil': perfil, 'spacy': spacy.__version__}, f)
+    return caminho
+
+
+def _carregar_snapshot(spacy, caminho, nome, perfil):
+    """Carrega o snapshot de salvar_snapshot; None se ele não servir para este modelo e perfil."""
+    try:
+        with open(os.path.join(caminho, 'bussola.json'), encoding='utf-8') as f:
+            info = json.load(f)
+    except (OSError, ValueError) as erro:
+        warnings.warn(f"Snapshot do modelo ignorado ({caminho}): {erro}")
+        return None
+    if info != {'nome': nome, 'perfil': perfil, 'spacy': spacy.__version__}:
+        if info.get('spacy') != spacy.__version__:
+            warnings.warn(f"Snapshot do modelo ignorado: gerado com spaCy {info.get('spacy')}, "
+                          f"em uso {spacy.__version__}.")
+        return None
+    config = spacy.util.load_config(os.path.join(caminho, 'config.cfg'))
+    nlp = spacy.util.get_lang_class(config['nlp']['lang']).from_config(config)
+    with open(os.path.join(caminho, 'modelo.bin'), 'rb') as f:
+        return nlp.from_bytes(f.read())
+
+
+def relatorio_partida():
+    """Tempos (s) da partida deste processo: importação do spaCy, carga do modelo e aquecimento."""
+    return dict(_tempos_partida)
+
+
+def obter_analisador(perfil=PERFIL_PADRAO):
+    """Retorna o ReleaseAnalyzer compartilhado do processo, criando-o na primeira chamada."""
+    analisador = _analisadores.get(perfil)
+    if analisador is None:
+        with _trava_analisador:
+            analisador = _analisadores.get(perfil)
+            if analisador is None:
+                cache, duplicatas, historico = _abrir_persistencia()
+                analisador = ReleaseAnalyzer(perfil=perfil, cache=cache, duplicatas=duplicatas, historico=historico)
+                _analisadores[perfil] = analisador
+    return analisador
+
+
+def _abrir_persistencia():
+    """Cache, índice de duplicatas e histórico configurados pelas variáveis de ambiente, com conexões novas."""
+    # BUSSOLA_CACHE_SQLITE ativa a camada em disco, compartilhada entre processos
+    cache = CacheResultados(caminho_sqlite=os.environ.get('BUSSOLA_CACHE_SQLITE'))
+    # BUSSOLA_DUPLICATAS (arquivo SQLite) ativa o índice de quase duplicados
+    duplicatas = None
+    if os.environ.get('BUSSOLA_DUPLICATAS'):
+        from duplicatas import IndiceDuplicatas
+        duplicatas = IndiceDuplicatas(caminho_sqlite=os.environ['BUSSOLA_DUPLICATAS'])
+    # BUSSOLA_HISTORICO (arquivo SQLite) grava cada relatório para o painel de histórico
+    historico = None
+    if os.environ.get('BUSSOLA_HISTORICO'):
+        from historico import HistoricoAnalises
+        historico = HistoricoAnalises(os.environ['BUSSOLA_HISTORICO'])
+    return cache, duplicatas, historico
+
+
+def fechar_persistencia():
+    """Fecha as conexões SQLite dos analisadores compartilhados (o histórico grava antes o lote pendente).
+    
+    Uma conexão SQLite não pode atravessar um fork: o processo pai chama esta
+    função antes de criar os workers, e cada worker chama reabrir_apos_fork().
+    """
+    for analisador in list(_analisadores.values()):
+        for recurso in (analisador.cache, analisador.duplicatas, analisador.historico):
+            if recurso is not None:
+                recurso.fechar()
+
+
+def reabrir_apos_fork():
+    """Dá aos analisadores compartilhados cache, índice de duplicatas e histórico próprios deste processo."""
+    for analisador in list(_analisadores.values()):
+        analisador.cache, analisador.duplicatas, analisador.historico = _abrir_persistencia()
+
+
+def aquecer(perfil=PERFIL_PADRAO):
+    """Carrega o modelo e roda uma análise curta para que o primeiro usuário não pague a partida a frio."""
+    analisador = obter_analisador(perfil)
+    analisador.nlp  # carrega o modelo, medido em separado do aquecimento
+    inicio = time.perf_counter()
+    # Pelo mesmo caminho de analisar_release, mas fora do histórico
+    analisador._obter_relatorio("A empresa anuncia hoje o lançamento do novo produto em São Paulo.", None,
+                                analisador.regras.obter(PACOTE_PADRAO))
+    _tempos_partida.setdefault(f'aquecimento_{perfil}_s', round(time.perf_counter() - inicio, 3))
+    return analisador
+
+
+def analisar_preliminar(texto, pacote=None):
+    """Relatório parcial só com as verificações baratas (regex), sem carregar o spaCy.
+    
+    Serve para mostrar os primeiros achados enquanto a análise completa ainda roda.
+    """
+    # O analisador compartilhado só carrega o modelo na primeira análise completa
+    analisador = obter_analisador()
+    regras = analisador.regras.obter(pacote or PACOTE_PADRAO)
+    texto, origem = normalizar_com_posicoes(texto)
+    ctx = ContextoAnalise(texto, None, regras, AgregadosDoc())
+    execucao = analisador.verificacoes.executar(analisador, ctx, modo=MODO_RAPIDO)
+    return _no_texto_original(
+        {'problemas': execucao.problemas, 'sugestoes': execucao.sugestoes, 'penalidade': execucao.penalidade,
+         'achados': ReleaseAnalyzer._localizar_achados(ctx), 'regras': regras.identificador, 'parcial': True},
+        origem)
+
+
+def _no_texto_original(relatorio, origem):
+    """Converte as posições dos achados do texto normalizado para o texto recebido (ver normalizar_com_posicoes).
+    
+    As de uma duplicata se referem ao texto anterior e ficam como estão.
+    """
+    if origem is None or 'duplicata' in relatorio or not relatorio.get('achados'):
+        return relatorio
+    relatorio['achados'] = [dict(achado, inicio=origem[achado['inicio']], fim=origem[achado['fim']])
+                            for achado in relatorio['achados']]
+    return relatorio
+
+
+@lru_cache(maxsize=200000)
+def _codigo_lema(lema):
+    """Código estável de 64 bits do lema, igual entre Docs e processos (o ID do vocab só vale num processo)."""
+    return int.from_bytes(hashlib.blake2b(lema.encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+
+
+def _janelas_mais_cheias(codigos, posicoes, janela, ancoras_ate=None):
+    """Para cada lema, a janela de `janela` palavras com mais ocorrências dele.
+    
+    Uma única ordenação por (lema, posição) e uma busca binária vetorizada: a
+    janela que começa em cada ocorrência vai até a primeira ocorrência do mesmo
+    lema `janela` palavras adiante. Só janelas ancoradas antes de `ancoras_ate` (se
+    dado) contam. Retorna (ordem, [(índice, vezes, fim)]), em que
+    ordem[índice:fim] são as ocorrências da janela mais cheia de cada lema com
+    pelo menos MINIMO_REPETICOES.
+    """
+    import numpy as np
+    if not len(codigos):
+        return None, []
+    ordem = np.lexsort((posicoes, codigos))
+    posicoes = posicoes[ordem]
+    _, grupo = np.unique(codigos[ordem], return_inverse=True)
+    # Chave única crescente: grupos afastados o bastante para a busca nunca cruzar de um lema a outro
+    chave = grupo.astype(np.int64) * (int(posicoes.max()) + janela + 1) + posicoes
+    fins = np.searchsorted(chave, chave + janela, side='left')
+    vezes = fins - np.arange(len(chave))
+    if ancoras_ate is not None:
+        vezes[posicoes + janela > ancoras_ate] = 0
+    # Por lema, a janela com mais ocorrências (a primeira, no empate)
+    melhores = np.lexsort((-vezes, grupo))
+    _, primeiras = np.unique(grupo[melhores], return_index=True)
+    escolhidos = melhores[primeiras]
+    escolhidos = escolhidos[vezes[escolhidos] >= MINIMO_REPETICOES]
+    return ordem, [(int(i), int(vezes[i]), int(fins[i])) for i in escolhidos]
+
+
+class RepeticoesLemas:
+    """Ocorrências de palavras significativas por lema, para contar repetições por janela de palavras.
+    
+    Guarda quatro vetores alinhados (código do lema, posição em palavras, início
+    e fim em caracteres), somáveis entre trechos consecutivos do texto. As
+    posições contam só palavras (nem pontuação nem espaço), então não dependem
+    de onde o texto foi cortado. Na análise em blocos, compactar() fecha as
+    janelas que já não podem mudar e descarta o que ficou para trás: a memória
+    fica limitada ao tamanho da janela mais o número de lemas repetidos.
+    """
+    
+    __slots__ = ('_partes', 'nomes', 'n_palavras', '_fechadas')
+    
+    def __init__(self, partes=None, nomes=None, n_palavras=0, fechadas=None):
+        # Vetores (códigos, posições, inícios, fins) de cada trecho, concatenados sob demanda
+        self._partes = partes if partes is not None else []
+        # Código -> lema, para exibição
+        self.nomes = nomes if nomes is not None else {}
+        # Palavras do texto acumulado (deslocamento das posições do próximo trecho)
+        self.n_palavras = n_palavras
+        # Código -> (vezes, trechos) das janelas que compactar() já fechou
+        self._fechadas = fechadas if fechadas is not None else {}
+    
+    def _vetores(self):
+        import numpy as np
+        if not self._partes:
+            return None
+        if len(self._partes) > 1:
+            self._partes = [tuple(np.concatenate(colunas) for colunas in zip(*self._partes))]
+        return self._partes[0]
+    
+    def deslocado(self, deslocamento):
+        """Cópia com as posições de caractere somadas a `deslocamento`."""
+        partes = [(codigos, posicoes, inicios + deslocamento, fins + deslocamento)
+                  for codigos, posicoes, inicios, fins in self._partes]
+        fechadas = {codigo: (vezes, [(i + deslocamento, f + deslocamento) for i, f in trechos])
+                    for codigo, (vezes, trechos) in self._fechadas.items()}
+        return RepeticoesLemas(partes, dict(self.nomes), self.n_palavras, fechadas)
+    
+    def somar(self, outro):
+        """Acumula `outro` (o trecho seguinte do mesmo texto), com as palavras renumeradas em sequência."""
+        self._partes.extend((codigos, posicoes + self.n_palavras, inicios, fins)
+                            for codigos, posicoes, inicios, fins in outro._partes)
+        self.nomes.update(outro.nomes)
+        for codigo, fechada in outro._fechadas.items():
+            self._guardar_fechada(codigo, fechada)
+        self.n_palavras += outro.n_palavras
+        return self
+    
+    def _guardar_fechada(self, codigo, fechada):
+        atual = self._fechadas.get(codigo)
+        if atual is None or fechada[0] > atual[0]:
+            self._fechadas[codigo] = fechada
+    
+    def _janelas(self, janela, ancoras_ate=None):
+        vetores = self._vetores()
+        if vetores is None:
+            return None, []
+        codigos, posicoes, inicios, fins = vetores
+        ordem, melhores = _janelas_mais_cheias(codigos, posicoes, janela, ancoras_ate)
+        janelas = []
+        for i, vezes, fim in melhores:
+            na_janela = ordem[i:min(fim, i + LIMITE_POSICOES_PALAVRA)]
+            trechos = list(zip(inicios[na_janela].tolist(), fins[na_janela].tolist()))
+            janelas.append((int(codigos[ordem[i]]), (vezes, trechos)))
+        return vetores, janelas
+    
+    def inicios(self):
+        """Posições de caractere das ocorrências guardadas, inclusive as das janelas já fechadas."""
+        vetores = self._vetores()
+        inicios = vetores[2].tolist() if vetores is not None else []
+        for _, trechos in self._fechadas.values():
+            inicios.extend(inicio for inicio, _ in trechos)
+        return inicios
+    
+    def compactar(self, janela=JANELA_REDUNDANCIA):
+        """Fecha as janelas inteiramente dentro do texto já visto e descarta as ocorrências anteriores a elas."""
+        vetores, fechadas = self._janelas(janela, ancoras_ate=self.n_palavras)
+        if vetores is None:
+            return self
+        for codigo, fechada in fechadas:
+            self._guardar_fechada(codigo, fechada)
+        # Janelas ainda abertas começam depois de n_palavras - janela; o que vem antes não entra em nenhuma
+        manter = vetores[1] > self.n_palavras - janela
+        self._partes = [tuple(coluna[manter] for coluna in vetores)]
+        codigos_restantes = set(self._partes[0][0].tolist()) | set(self._fechadas)
+        self.nomes = {codigo: nome for codigo, nome in self.nomes.items() if codigo in codigos_restantes}
+        return self
+    
+    def mais_repetidos(self, janela=JANELA_REDUNDANCIA):
+        """Repeticao de cada lema com MINIMO_REPETICOES ou mais numa janela, na ordem do texto."""
+        melhores = dict(self._fechadas)
+        for codigo, fechada in self._janelas(janela)[1]:
+            if codigo not in melhores or fechada[0] > melhores[codigo][0]:
+                melhores[codigo] = fechada
+        repeticoes = [Repeticao(self.nomes[codigo], vezes, trechos) for codigo, (vezes, trechos) in melhores.items()]
+        repeticoes.sort(key=lambda r: r.trechos[0])
+        return repeticoes
+
+
+class AgregadosDoc:
+    """Tudo o que as verificações precisam do Doc, em contagens somáveis entre trechos do texto.
+    
+    Permite analisar um release em pedaços (parágrafos, blocos) e recombinar os
+    resultados sem reprocessar o texto inteiro no spaCy.
+    """
+    
+    __slots__ = ('repeticoes', 'n_adjetivos', 'n_palavras', 'ocorrencias', 'lemas')
+    
+    def __init__(self, repeticoes=None, n_adjetivos=0, n_palavras=0, ocorrencias=None, lemas=None):
+        # Palavras significativas (substantivos, verbos, adjetivos) por lema e posição
+        self.repeticoes = repeticoes if repeticoes is not None else RepeticoesLemas()
+        self.n_adjetivos = n_adjetivos
+        # Tokens que não são pontuação nem espaço
+        self.n_palavras = n_palavras
+        # Termos dos léxicos, com posições de caractere
+        self.ocorrencias = ocorrencias if ocorrencias is not None else []
+        # Saco de lemas das palavras de conteúdo, sem acentos (entrada do classificador de editorias)
+        self.lemas = lemas if lemas is not None else Counter()
+    
+    @classmethod
+    def de_doc(cls, doc, regras):
+        import numpy as np
+        from spacy import attrs, symbols
+        
+        # Uma única extração por Doc; daqui em diante, só operações vetorizadas sobre IDs
+        colunas = doc.to_array([getattr(attrs, nome) for nome in _COLUNAS_TOKEN])
+        pos = colunas[:, _POS]
+        significativas = (np.isin(pos, [getattr(symbols, nome) for nome in _POS_SIGNIFICATIVAS])
+                          & (colunas[:, _IS_STOP] == 0) & (colunas[:, _LENGTH] > 3))
+        # Cada ID de lema distinto vira, uma vez só, o código estável do lema em minúsculas
+        strings = doc.vocab.strings
+        ids, inverso = np.unique(colunas[significativas, _LEMMA], return_inverse=True)
+        lemas_significativos = [strings[int(i)].lower() for i in ids.tolist()]
+        codigos = np.array([_codigo_lema(lema) for lema in lemas_significativos], dtype=np.int64)
+        palavras = (colunas[:, _IS_PUNCT] == 0) & (colunas[:, _IS_SPACE] == 0)
+        n_palavras = int(np.count_nonzero(palavras))
+        inicios = colunas[significativas, _IDX].astype(np.int64)
+        repeticoes = RepeticoesLemas(
+            [(codigos[inverso.reshape(-1)], (np.cumsum(palavras) - 1)[significativas], inicios,
+              inicios + colunas[significativas, _LENGTH].astype(np.int64))],
+            dict(zip(codigos.tolist(), lemas_significativos)), n_palavras)
+        n_adjetivos = int(np.count_nonzero(pos == symbols.ADJ))
+        ocorrencias = regras.motor_lexico.buscar(doc, colunas[:, [_LOWER, _LEMMA]], colunas[:, _IDX],
+                                                 colunas[:, _LENGTH])
+        conteudo = (colunas[:, _IS_ALPHA] == 1) & (colunas[:, _IS_STOP] == 0) & (colunas[:, _LENGTH] > 2)
+        lemas = Counter()
+        for lema, n in zip(*np.unique(colunas[conteudo, _LEMMA], return_counts=True)):
+            lemas[normalizar_termo(strings[int(lema)])] += int(n)
+        return cls(repeticoes, n_adjetivos, n_palavras, ocorrencias, lemas)
+    
+    def deslocado(self, deslocamento):
+        """Cópia com as posições das ocorrências e palavras somadas a `deslocamento`."""
+        ocorrencias = [o._replace(inicio=o.inicio + deslocamento, fim=o.fim + deslocamento)
+                       for o in self.ocorrencias]
+        return AgregadosDoc(self.repeticoes.deslocado(deslocamento), self.n_adjetivos, self.n_palavras,
+                            ocorrencias, Counter(self.lemas))
+    
+    def somar(self, outro):
+        """Acumula `outro` (um trecho posterior do mesmo texto) neste agregado."""
+        self.repeticoes.somar(outro.repeticoes)
+        self.n_adjetivos += outro.n_adjetivos
+        self.n_palavras += outro.n_palavras
+        self.ocorrencias.extend(outro.ocorrencias)
+        self.lemas.update(outro.lemas)
+        return self
+    
+    def posicoes(self):
+        """Posições iniciais das ocorrências e palavras guardadas (as que podem virar achados)."""
+        return [o.inicio for o in self.ocorrencias] + self.repeticoes.inicios()
+    
+    def compactar(self):
+        """Mantém só a primeira ocorrência de cada termo (o que as verificações usam), limitando a memória."""
+        vistos = set()
+        primeiras = []
+        for o in self.ocorrencias:
+            if (o.categoria, o.chave, o.termo) not in vistos:
+                vistos.add((o.categoria, o.chave, o.termo))
+                primeiras.append(o)
+        self.ocorrencias = primeiras
+        self.repeticoes.compactar()
+        return self
+
+
+class AgregadosTexto:
+    """Contagens e achados das verificações baseadas em regex (parágrafos, frases, voz passiva).
+    
+    O texto pode ser alimentado em blocos consecutivos, desde que os cortes caiam
+    em espaço em branco; frases e parágrafos abertos no fim de um bloco continuam
+    no seguinte. O resultado é o mesmo de processar o texto de uma só vez.
+    """
+    
+    __slots__ = ('n_paragrafos_longos', 'n_frases_longas', 'n_frases_prolixas', 'sequencia_curtas',
+                 'voz_passiva', 'n_voz_passiva', 'achados', 'n_frases', 'limite_achados',
+                 '_bloco_inicio', '_frases_antes_bloco', '_fins_bloco', '_frases_fixadas',
+                 '_paragrafo_inicio', '_paragrafo_frase', '_paragrafo_tamanho', '_paragrafo_conteudo',
+                 '_frase_inicio', '_frase_palavras', '_curtas_seguidas', '_curtas_inicio', '_curtas_frase',
+                 '_curtas_fim', '_fim')
+    
+    def __init__(self, limite_achados=None):
+        self.n_paragrafos_longos = 0   # parágrafos com mais de 600 caracteres
+        self.n_frases_longas = 0       # frases com mais de 30 palavras
+        self.n_frases_prolixas = 0     # frases com mais de 25 palavras
+        self.sequencia_curtas = False  # houve 3+ frases curtas seguidas
+        # Ocorrências (início, fim, trecho, frase) de voz passiva, até o limite; a contagem é sempre exata
+        self.voz_passiva = []
+        self.n_voz_passiva = 0
+        # Achados de comprimento e de frases curtas, até o limite (None: sem limite)
+        self.achados = []
+        self.limite_achados = limite_achados
+        # Frases encerradas até aqui (na divisão de _RE_FIM_FRASE): o índice da frase aberta
+        self.n_frases = 0
+        # Fins de frase só do último bloco, para localizar posições dentro dele; posições de blocos
+        # anteriores só se guardadas com fixar_frases(). A memória não cresce com o texto.
+        self._bloco_inicio = 0
+        self._frases_antes_bloco = 0
+        self._fins_bloco = array('q')
+        self._frases_fixadas = {}
+        self._paragrafo_inicio = 0
+        self._paragrafo_frase = 0
+        self._paragrafo_tamanho = 0
+        self._paragrafo_conteudo = False
+        # Primeiro caractere não branco da frase aberta (None enquanto ela está vazia)
+        self._frase_inicio = None
+        self._frase_palavras = 0
+        self._curtas_seguidas = 0
+        self._curtas_inicio = 0
+        self._curtas_frase = 0
+        self._curtas_fim = 0
+        self._fim = 0  # fim do último bloco alimentado
+    
+    @classmethod
+    def de_texto(cls, texto):
+        agregados = cls()
+        agregados.alimentar(texto)
+        return agregados.finalizar()
+    
+    def frase_em(self, posicao):
+        """Índice da frase que contém a posição de caractere.
+        
+        Vale para posições do último bloco alimentado (o texto todo, em de_texto) e
+        para as guardadas antes com fixar_frases().
+        """
+        if posicao < self._bloco_inicio:
+            return self._frases_fixadas[posicao]
+        return self._frases_antes_bloco + bisect_right(self._fins_bloco, posicao)
+    
+    def fixar_frases(self, posicoes):
+        """Guarda o índice da frase de posições do último bloco, para consultá-lo depois dos blocos seguintes."""
+        for posicao in posicoes:
+            self._frases_fixadas[posicao] = self.frase_em(posicao)
+    
+    def manter_frases(self, posicoes):
+        """Esquece as posições guardadas com fixar_frases() que não estão em `posicoes`."""
+        posicoes = set(posicoes)
+        self._frases_fixadas = {p: frase for p, frase in self._frases_fixadas.items() if p in posicoes}
+    
+    def alimentar(self, bloco, inicio=0):
+        """Processa o próximo bloco do texto; `inicio` é a posição do bloco no texto completo."""
+        fins_frase = list(_RE_FIM_FRASE.finditer(bloco))
+        self._bloco_inicio = inicio
+        self._frases_antes_bloco = self.n_frases
+        self._fins_bloco = array('q', [inicio + m.end() for m in fins_frase])
+        
+        for m in _RE_VOZ_PASSIVA.finditer(bloco):
+            self.n_voz_passiva += 1
+            if self.limite_achados is None or len(self.voz_passiva) < self.limite_achados:
+                self.voz_passiva.append((inicio + m.start(), inicio + m.end(), m.group(0),
+                                         self.frase_em(inicio + m.start())))
+        
+        posicao = inicio
+        linhas = bloco.split('\n')
+        for i, linha in enumerate(linhas):
+            self._paragrafo_tamanho += len(linha)
+            self._paragrafo_conteudo = self._paragrafo_conteudo or bool(linha.strip())
+            posicao += len(linha)
+            if i < len(linhas) - 1:
+                self._fechar_paragrafo(posicao)
+                posicao += 1
+                self._paragrafo_inicio = posicao
+                self._paragrafo_frase = self.frase_em(posicao)
+        
+        anterior = 0
+        for m in fins_frase:
+            self._acumular_frase(bloco, anterior, m.start(), inicio)
+            self._fechar_frase(inicio + m.end())
+            anterior = m.end()
+            self.n_frases += 1
+        self._acumular_frase(bloco, anterior, len(bloco), inicio)
+        self._fim = inicio + len(bloco)
+        return self
+    
+    def finalizar(self):
+        """Fecha o parágrafo e a frase em aberto no fim do texto."""
+        self._fechar_paragrafo(self._fim)
+        self._fechar_frase(self._fim)
+        self._registrar_curtas()
+        return self
+    
+    def _registrar(self, tipo, gravidade, inicio, fim, frase, mensagem):
+        if self.limite_achados is None or len(self.achados) < self.limite_achados:
+            self.achados.append(Achado(tipo, gravidade, inicio, fim, frase, mensagem))
+    
+    def _acumular_frase(self, bloco, de, ate, inicio):
+        fragmento = bloco[de:ate]
+        self._frase_palavras += len(fragmento.split())
+        if self._frase_inicio is None:
+            recuo = len(fragmento) - len(fragmento.lstrip())
+            if recuo < len(fragmento):
+                self._frase_inicio = inicio + de + recuo
+    
+    def _fechar_paragrafo(self, fim):
+        if self._paragrafo_conteudo and self._paragrafo_tamanho > 600:
+            self.n_paragrafos_longos += 1
+            self._registrar('paragrafo_longo', 'alta', self._paragrafo_inicio, fim, self._paragrafo_frase,
+                            f"Parágrafo com {self._paragrafo_tamanho} caracteres")
+        self._paragrafo_tamanho = 0
+        self._paragrafo_conteudo = False
+    
+    def _fechar_frase(self, fim):
+        palavras = self._frase_palavras
+        if palavras > 30:
+            self.n_frases_longas += 1
+        if palavras > 25:
+            self.n_frases_prolixas += 1
+            self._registrar('frase_longa', 'alta' if palavras > 30 else 'media', self._frase_inicio, fim,
+                            self.n_frases, f"Frase com {palavras} palavras")
+        if palavras < 5 and self._frase_inicio is not None:
+            if self._curtas_seguidas == 0:
+                self._curtas_inicio = self._frase_inicio
+                self._curtas_frase = self.n_frases
+            self._curtas_seguidas += 1
+            self._curtas_fim = fim
+            if self._curtas_seguidas >= 3:
+                self.sequencia_curtas = True
+        else:
+            self._registrar_curtas()
+        self._frase_palavras = 0
+        self._frase_inicio = None
+    
+    def _registrar_curtas(self):
+        if self._curtas_seguidas >= 3:
+            self._registrar('frases_curtas', 'baixa', self._curtas_inicio, self._curtas_fim, self._curtas_frase,
+                            f"{self._curtas_seguidas} frases curtas em sequência")
+        self._curtas_seguidas = 0
+
+
+def dividir_em_blocos(pedacos, tamanho_bloco=TAMANHO_BLOCO):
+    """Reagrupa um fluxo de pedaços de texto em blocos de ~tamanho_bloco caracteres.
+    
+    Gera (posição inicial, bloco). Os cortes caem logo após o fim de uma frase ou,
+    na falta dele, numa quebra de linha ou espaço, nunca no meio de uma palavra
+    nem entre o auxiliar e o particípio de uma voz passiva.
+    """
+    if isinstance(pedacos, str):
+        pedacos = [pedacos]
+    buffer = ''
+    inicio = 0
+    for pedaco in pedacos:
+        buffer += pedaco
+        while len(buffer) > tamanho_bloco:
+            corte = None
+            for m in _RE_CORTE_BLOCO.finditer(buffer, 0, tamanho_bloco):
+                corte = m.end()
+            if corte is None:
+                corte = buffer.rfind('\n', 0, tamanho_bloco) + 1 or None
+            if corte is None and len(buffer) > 2 * tamanho_bloco:
+                # Bloco enorme sem pontuação nem quebra de linha: corta no último espaço
+                espacos = [buffer.rfind(c, 0, tamanho_bloco) for c in ' \t']
+                corte = max(espacos) if max(espacos) > 0 else tamanho_bloco
+            if corte is None:
+                break  # espera mais texto para encontrar um bom ponto de corte
+            if not _RE_CORTE_BLOCO.match(buffer, corte - 1):
+                # Corte em espaço: o auxiliar e o particípio da voz passiva ficam no mesmo bloco
+                if len(buffer) < corte + _FOLGA_CORTE:
+                    break
+                corte = _corte_fora_da_voz_passiva(buffer, corte)
+            yield inicio, buffer[:corte]
+            inicio += corte
+            buffer = buffer[corte:]
+    if buffer:
+        yield inicio, buffer
+
+
+def _corte_fora_da_voz_passiva(buffer, corte):
+    """Move o corte para fora de uma voz passiva que ele partiria ao meio (de preferência para antes dela)."""
+    for m in _RE_VOZ_PASSIVA.finditer(buffer, max(corte - _FOLGA_CORTE, 0), corte + _FOLGA_CORTE):
+        if m.start() >= corte:
+            break
+        if m.end() > corte:
+            espaco = m.start() - 1
+            while espaco >= 0 and not buffer[espaco].isspace():
+                espaco -= 1
+            # Sem espaço antes dela (o bloco ficaria vazio), o corte avança para o fim da voz passiva
+            return espaco + 1 if espaco >= 0 else m.end()
+    return corte
+
+
+class ContextoAnalise:
+    """Visões de um release calculadas uma única vez e compartilhadas por todas as verificações."""
+
+    def __init__(self, texto, doc, regras, agregados=None, textual=None, preparar_doc=None):
+        # Texto completo (None na análise em blocos, em que ele nunca fica inteiro na memória)
+        self.texto = texto
+        # Doc do spaCy (None quando os agregados vêm prontos, como na análise incremental,
+        # ou enquanto nenhuma verificação precisou dele)
+        self.doc = doc
+        # Pacote de regras usado do início ao fim desta análise
+        self.regras = regras
+        # Medidor de etapas da instrumentação (None quando desativada)
+        self.medidor = None
+        # Função que produz o Doc sob demanda (ver garantir_doc)
+        self._preparar_doc = preparar_doc
+        if agregados is None:
+            agregados = AgregadosDoc() if preparar_doc is not None else AgregadosDoc.de_doc(doc, regras)
+        self._definir_agregados(agregados)
+        # Parágrafos, frases e voz passiva, numa única passada pelo texto
+        self.textual = textual if textual is not None else AgregadosTexto.de_texto(texto)
+    
+    def _definir_agregados(self, agregados):
+        self.agregados = agregados
+        # Termos dos léxicos encontrados no texto: {categoria: {chave: [ocorrências]}}
+        self.lexico = agrupar_ocorrencias(agregados.ocorrencias)
+    
+    def garantir_doc(self):
+        """Processa o texto no spaCy, se ainda não foi feito, antes da primeira verificação que precisa dele."""
+        if self._preparar_doc is None:
+            return
+        preparar, self._preparar_doc = self._preparar_doc, None
+        self.doc = preparar()
+        self._definir_agregados(medir(self.medidor, 'agregados', AgregadosDoc.de_doc, self.doc, self.regras))
+
 
 class ReleaseAnalyzer:
-    def __init__(self):
-        # Carregar modelo de linguagem em português
-        self.nlp = spacy.load('pt_core_news_sm')
-        
-        # Palavras comuns que podem indicar redundância quando repetidas
-        self.common_words = set(['empresa', 'produto', 'serviço', 'cliente', 'mercado', 
-                                'tecnologia', 'inovação', 'qualidade', 'solução', 'projeto'])
-        
-        # Palavras que podem indicar jargões corporativos
-        self.jargoes = set(['sinergia', 'proativo', 'disruptivo', 'escalável', 'otimizar', 
-                           'paradigma', 'alavancagem', 'verticalizar', 'ecossistema', 'holístico'])
-        
-        # Informações essenciais que um release deve conter
-        self.info_essenciais = ['quem', 'o que', 'quando', 'onde', 'por que', 'como']
-        
-        # Dicionário de editorias e palavras-chave relacionadas
-        self.editorias = {
-            'esporte': ['atleta', 'jogo', 'campeonato', 'competição', 'time', 'equipe', 'vitória', 'derrota', 'treinador', 'técnico'],
-            'entretenimento': ['filme', 'série', 'música', 'show', 'artista', 'ator', 'atriz', 'diretor', 'lançamento', 'estreia'],
-            'tecnologia': ['inovação', 'aplicativo', 'software', 'hardware', 'digital', 'internet', 'dispositivo', 'plataforma', 'startup', 'inteligência artificial'],
-            'economia': ['mercado', 'investimento', 'economia', 'financeiro', 'bolsa', 'ações', 'empresa', 'negócio', 'lucro', 'prejuízo'],
-            'política': ['governo', 'presidente', 'ministro', 'congresso', 'senado', 'câmara', 'eleição', 'partido', 'lei', 'projeto']
-        }
+    def __init__(self, nlp=None, perfil=PERFIL_PADRAO, cache=None, regras=None, instrumentar=False, coletor=None,
+                 classificador=None, duplicatas=None, verificacoes=None, historico=None):
+        # Carregar modelo de linguagem em português (compartilhado pelo processo).
+        # A análise só lê atributos da instância, então o mesmo analisador pode
+        # atender várias sessões simultâneas.
+        # O modelo só é carregado na primeira análise (ou em aquecer()).
+        _validar_perfil(perfil)
+        self.perfil = perfil
+        self._nlp = nlp
+        self._versao_modelo = None
         
-    def analisar_release(self, texto, editoria=None):
-        """Analisa um release e retorna um relatório com pontuação e sugestões."""
-        doc = self.nlp(texto)
+        # Cache opcional de relatórios (ver cache.CacheResultados)
+        self.cache = cache
         
-        # Inicializar pontuação (0-100)
-        pontuacao = 100
+        # Léxicos e editorias vêm de pacotes de regras externos (ver regras.py),
+        # recarregados quando o arquivo muda e escolhidos a cada análise
+        self.regras = regras if regras is not None else repositorio_padrao()
         
-        # Inicializar lista de problemas e sugestões
-        problemas = []
-        sugestoes = []
+        # Instrumentação opcional (ver metricas.py): tempos por etapa no relatório
+        # e, com um coletor, histogramas exportáveis para o Prometheus
+        self.coletor = coletor if coletor is not None else (ColetorMetricas() if instrumentar else None)
+        
+        # Classificador de editorias treinado (ver classificador.py); sem ele, a
+        # relevância é medida pelas palavras-chave do pacote de regras
+        self._classificador = classificador
+        
+        # Índice opcional de quase duplicados (ver duplicatas.py): releases reenviados
+        # com pequenas edições recebem o relatório da versão anterior, sem spaCy
+        self.duplicatas = duplicatas
         
-        # Análise de redundâncias
-        redundancias = self._verificar_redundancias(doc)
-        if redundancias:
-            pontuacao -= min(len(redundancias) * 5, 20)  # Máximo de 20 pontos de penalidade
-            problemas.append(f"Encontramos {len(redundancias)} palavras repetidas em excesso.")
-            sugestoes.append("Considere usar sinônimos para: " + ", ".join(redundancias))
-        
-        # Análise de voz passiva
-        voz_passiva = self._verificar_voz_passiva(texto)
-        if voz_passiva:
-            pontuacao -= min(len(voz_passiva) * 3, 15)  # Máximo de 15 pontos de penalidade
-            problemas.append(f"Encontramos {len(voz_passiva)} ocorrências de voz passiva.")
-            sugestoes.append("Considere reescrever em voz ativa: " + "; ".join(voz_passiva[:3]))
-        
-        # Análise de comprimento de parágrafos e frases
-        problemas_comprimento, sugestoes_comprimento, penalidade_comprimento = self._verificar_comprimento(texto)
-        if problemas_comprimento:
-            pontuacao -= penalidade_comprimento
-            problemas.extend(problemas_comprimento)
-            sugestoes.extend(sugestoes_comprimento)
-        
-        # Análise de jargões
-        jargoes_encontrados = self._verificar_jargoes(doc)
-        if jargoes_encontrados:
-            pontuacao -= min(len(jargoes_encontrados) * 2, 10)  # Máximo de 10 pontos de penalidade
-            problemas.append(f"Encontramos {len(jargoes_encontrados)} jargões corporativos.")
-            sugestoes.append("Considere substituir: " + ", ".join(jargoes_encontrados))
-        
-        # Análise de informações essenciais
-        info_faltantes = self._verificar_info_essenciais(texto)
-        if info_faltantes:
-            pontuacao -= min(len(info_faltantes) * 5, 25)  # Máximo de 25 pontos de penalidade
-            problemas.append(f"Seu release pode estar faltando informações essenciais.")
-            sugestoes.append("Considere incluir: " + ", ".join(info_faltantes))
-        
-        # Análise de clareza e objetividade
-        clareza_score, clareza_problemas, clareza_sugestoes = self._verificar_clareza(texto)
-        pontuacao -= (100 - clareza_score) * 0.15  # Máximo de 15 pontos de penalidade
-        if clareza_problemas:
-            problemas.extend(clareza_problemas)
-            sugestoes.extend(clareza_sugestoes)
-        
-        # Análise de editoria (se fornecida)
-        editoria_feedback = ""
-        if editoria and editoria.lower() in self.editorias:
-            relevancia = self._verificar_relevancia_editoria(texto, editoria.lower())
-            if relevancia < 0.3:
-                pontuacao -= 10
-                problemas.append(f"Seu release tem baixa relevância para a editoria de {editoria}.")
-                sugestoes.append(f"Considere incluir mais termos relacionados à {editoria}.")
-                editoria_feedback = f"Seu release parece não estar bem alinhado com a editoria de {editoria}. Considere revisar o conteúdo para torná-lo mais relevante."
-            elif relevancia < 0.6:
-                editoria_feedback = f"Seu release está parcialmente alinhado com a editoria de {editoria}. Pode melhorar a relevância."
+        # Verificações executadas, com custo e peso (ver verificacoes.py)
+        self.verificacoes = verificacoes if verificacoes is not None else REGISTRO_PADRAO
+        
+        # Histórico opcional das análises (ver historico.py): cada relatório entregue é gravado em lote
+        self.historico = historico
+    
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            self._nlp = carregar_modelo(perfil=self.perfil)
+        return self._nlp
+    
+    @property
+    def versao_modelo(self):
+        if self._versao_modelo is None:
+            meta = self.nlp.meta
+            self._versao_modelo = f"{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}/{self.perfil}"
+        return self._versao_modelo
+    
+    def tamanho_vocabulario(self):
+        """Strings no vocabulário do modelo (0 antes da carga); só cresce, a cada palavra nova analisada."""
+        return len(self._nlp.vocab.strings) if self._nlp is not None else 0
+
+    @property
+    def classificador(self):
+        if self._classificador is None:
+            from classificador import obter_padrao
+            self._classificador = obter_padrao() or False
+        return self._classificador or None
+    
+    # Léxicos do pacote padrão, mantidos como atributos por compatibilidade
+    @property
+    def common_words(self):
+        return self.regras.obter().common_words
+    
+    @property
+    def jargoes(self):
+        return self.regras.obter().jargoes
+    
+    @property
+    def info_essenciais(self):
+        return self.regras.obter().info_essenciais
+    
+    @property
+    def editorias(self):
+        return self.regras.obter().editorias
+    
+    def analisar_release(self, texto, editoria=None, pacote=None, modo=MODO_COMPLETO, piso=None):
+        """Analisa um release e retorna um relatório com pontuação e sugestões.
+        
+        `pacote` escolhe o pacote de regras do cliente (padrão: 'padrao').
+        `modo='rapido'` roda só as verificações baseadas em regex, sem spaCy; com
+        `piso`, a análise para assim que a pontuação chega a esse valor (triagem).
+        """
+        inicio = time.perf_counter()
+        regras = self.regras.obter(pacote or PACOTE_PADRAO)
+        relatorio = self._obter_relatorio(texto, editoria, regras, modo, piso)
+        self._registrar_historico(texto, editoria, regras, relatorio, inicio)
+        return relatorio
+    
+    def _registrar_historico(self, texto, editoria, regras, relatorio, inicio=None):
+        """Grava o relatório entregue no histórico, se houver um (com a duração desde `inicio`)."""
+        if self.historico is not None:
+            duracao = time.perf_counter() - inicio if inicio is not None else None
+            self.historico.registrar(texto, relatorio, editoria, regras.nome, duracao)
+    
+    def _obter_relatorio(self, texto, editoria, regras, modo=MODO_COMPLETO, piso=None, analisar=None):
+        """Relatório do cache, do índice de duplicatas ou de uma análise nova.
+        
+        `analisar(texto)` faz a análise nova (padrão: _analisar com os mesmos parâmetros).
+        O que se analisa e o que vai na chave é o texto normalizado; as posições dos
+        achados voltam convertidas para o texto recebido.
+        """
+        if analisar is None:
+            analisar = partial(self._analisar, editoria=editoria, regras=regras, modo=modo, piso=piso)
+        texto, origem = normalizar_com_posicoes(texto)
+        return _no_texto_original(self._relatorio_normalizado(texto, editoria, regras, modo, piso, analisar), origem)
+    
+    def _relatorio_normalizado(self, texto, editoria, regras, modo, piso, analisar):
+        if self.cache is None and self.duplicatas is None:
+            return analisar(texto)
+        if self.cache is not None:
+            chave = gerar_chave(texto, editoria, self._versao_regras(regras, modo, piso), self._versao_modelo_de(modo))
+            relatorio = self.cache.obter(chave)
+            if relatorio is not None:
+                return relatorio
+        
+        if self.duplicatas is not None:
+            contexto = self._contexto_relatorio(editoria, regras, modo, piso)
+            anterior = self.duplicatas.consultar(texto, contexto)
+            if anterior is not None:
+                relatorio, similaridade, id_ = anterior
+                relatorio['duplicata'] = {'id': id_, 'similaridade': round(similaridade, 3)}
+                return relatorio
+        
+        relatorio = analisar(texto)
+        # As métricas descrevem esta execução, não o conteúdo: ficam fora do cache e do índice
+        guardado = {k: v for k, v in relatorio.items() if k != 'metricas'}
+        if self.cache is not None:
+            self.cache.guardar(chave, guardado)
+        if self.duplicatas is not None:
+            self.duplicatas.adicionar(texto, contexto, guardado)
+        return relatorio
+    
+    def _versao_regras(self, regras, modo=MODO_COMPLETO, piso=None):
+        """Tudo, além do texto e do modelo, que muda o relatório: verificações, pacote, classificador e modo."""
+        versao = f"{VERSAO_REGRAS}/{self.verificacoes.identificador}/{regras.identificador}/{modo}/{piso}"
+        if modo != MODO_RAPIDO:
+            classificador = self.classificador
+            if classificador is not None:
+                versao += f"/{classificador.identificador}"
+        return versao
+    
+    def _versao_modelo_de(self, modo):
+        # O modo rápido não usa o modelo: nem precisa carregá-lo para montar a chave
+        return 'sem-modelo' if modo == MODO_RAPIDO else self.versao_modelo
+    
+    def _contexto_relatorio(self, editoria, regras, modo=MODO_COMPLETO, piso=None):
+        """Em que condições um relatório vale para outro texto parecido (chave do índice de duplicatas)."""
+        return gerar_chave('', editoria, self._versao_regras(regras, modo, piso), self._versao_modelo_de(modo))
+    
+    def _novo_medidor(self):
+        return MedidorEtapas() if self.coletor is not None else None
+    
+    def _analisar(self, texto, editoria, regras, modo=MODO_COMPLETO, piso=None):
+        if len(texto) > LIMITE_TEXTO_UNICO:
+            # Documentos muito longos não cabem no max_length do spaCy: análise em blocos
+            return self._analisar_em_blocos(texto, editoria, regras, modo=modo, piso=piso)
+        medidor = self._novo_medidor()
+        # O texto é processado pelo spaCy uma única vez por análise, e só se alguma
+        # verificação que precisa do Doc chegar a rodar
+        ctx = medir(medidor, 'textual', ContextoAnalise, texto, None, regras, None, None,
+                    lambda: medir(medidor, 'spacy', self.nlp, texto))
+        ctx.medidor = medidor
+        return self._gerar_relatorio(ctx, editoria, modo, piso)
+    
+    def analisar_fluxo(self, pedacos, editoria=None, pacote=None, tamanho_bloco=TAMANHO_BLOCO, modo=MODO_COMPLETO):
+        """Analisa um documento arbitrariamente longo com memória limitada.
+        
+        `pedacos` é um texto ou um iterável de trechos consecutivos (por exemplo, as
+        linhas de um arquivo aberto). O texto é reagrupado em blocos alinhados ao fim
+        das frases, processados em sequência pelo spaCy, e só contagens acumuladas
+        são mantidas entre um bloco e outro.
+        """
+        return self._analisar_em_blocos(pedacos, editoria, self.regras.obter(pacote or PACOTE_PADRAO),
+                                        tamanho_bloco, modo)
+    
+    def _analisar_em_blocos(self, pedacos, editoria, regras, tamanho_bloco=TAMANHO_BLOCO, modo=MODO_COMPLETO,
+                            piso=None):
+        medidor = self._novo_medidor()
+        agregados = AgregadosDoc()
+        textual = AgregadosTexto(limite_achados=LIMITE_ACHADOS)
+        
+        def _processar():
+            blocos = ((bloco, inicio) for inicio, bloco in dividir_em_blocos(pedacos, tamanho_bloco))
+            if modo == MODO_RAPIDO:
+                for bloco, inicio in blocos:
+                    textual.alimentar(bloco, inicio)
             else:
-                editoria_feedback = f"Muito bem, marujo! Seu release condiz com a editoria de {editoria} que você quer trabalhar. Avante!"
+                for doc, inicio in self.nlp.pipe(blocos, as_tuples=True, batch_size=2):
+                    textual.alimentar(doc.text, inicio)
+                    do_bloco = AgregadosDoc.de_doc(doc, regras).deslocado(inicio)
+                    # Frases das posições que podem virar achados, enquanto o bloco é o último alimentado
+                    textual.fixar_frases(do_bloco.posicoes())
+                    agregados.somar(do_bloco).compactar()
+                    textual.manter_frases(agregados.posicoes())
+            textual.finalizar()
+        
+        medir(medidor, 'textual' if modo == MODO_RAPIDO else 'spacy', _processar)
+        ctx = ContextoAnalise(None, None, regras, agregados, textual)
+        ctx.medidor = medidor
+        return self._gerar_relatorio(ctx, editoria, modo, piso)
+    
+    def analisar_lote(self, textos, editorias=None, batch_size=64, n_process=1, pacote=None, modo=MODO_COMPLETO,
+                      piso=None):
+        """Analisa um fluxo de releases com nlp.pipe e gera os relatórios na ordem de entrada.
+        
+        `textos` e `editorias` podem ser iteráveis preguiçosos (arquivos, geradores):
+        nada é materializado além do lote corrente. Use n_process=-1 para todos os núcleos.
+        O pacote de regras é resolvido uma vez e vale para o lote inteiro. No modo
+        'rapido', os textos não passam pelo spaCy.
+        """
+        regras = self.regras.obter(pacote or PACOTE_PADRAO)
+        if editorias is None:
+            editorias = repeat(None)
+        # Como em analisar_release: analisa o texto normalizado e devolve posições do texto recebido
+        normalizados = (normalizar_com_posicoes(texto) + (editoria,) for texto, editoria in zip(textos, editorias))
+        if modo == MODO_RAPIDO:
+            for texto, origem, editoria in normalizados:
+                relatorio = _no_texto_original(self._analisar(texto, editoria, regras, modo, piso), origem)
+                self._registrar_historico(texto, editoria, regras, relatorio)
+                yield relatorio
+            return
+        # Documentos muito longos passam vazios pelo pipe (para manter a ordem) e são analisados em blocos
+        pares = ((texto, (editoria, origem, None)) if len(texto) <= LIMITE_TEXTO_UNICO
+                 else ('', (editoria, origem, texto))
+                 for texto, origem, editoria in normalizados)
+        for doc, (editoria, origem, longo) in self.nlp.pipe(pares, as_tuples=True, batch_size=batch_size,
+                                                             n_process=n_process):
+            if longo is not None:
+                relatorio = _no_texto_original(self._analisar_em_blocos(longo, editoria, regras, piso=piso), origem)
+                self._registrar_historico(longo, editoria, regras, relatorio)
+                yield relatorio
+                continue
+            medidor = self._novo_medidor()
+            ctx = medir(medidor, 'agregados', ContextoAnalise, doc.text, doc, regras)
+            ctx.medidor = medidor
+            relatorio = _no_texto_original(self._gerar_relatorio(ctx, editoria, modo, piso), origem)
+            self._registrar_historico(doc.text, editoria, regras, relatorio)
+            yield relatorio
+    
+    def _gerar_relatorio(self, ctx, editoria=None, modo=MODO_COMPLETO, piso=None):
+        """Executa as verificações do modo sobre um contexto e monta o relatório."""
+        medidor = ctx.medidor
+        
+        # Verificações registradas: as baratas primeiro, parando no piso (ver verificacoes.py)
+        execucao = self.verificacoes.executar(self, ctx, editoria, modo, piso)
         
         # Garantir que a pontuação esteja entre 0 e 100
-        pontuacao = max(0, min(100, pontuacao))
+        pontuacao = max(0, min(100, 100 - execucao.penalidade))
         
         # Preparar feedback náutico baseado na pontuação
         feedback_nautico = self._gerar_feedback_nautico(pontuacao)
         
+        editoria_dados = execucao.dados.get('editoria') or {'ranking': [], 'feedback': ""}
+        
         # Preparar relatório final
         relatorio = {
             'pontuacao': round(pontuacao),
             'feedback_nautico': feedback_nautico,
-            'problemas': problemas,
-            'sugestoes': sugestoes,
-            'editoria_feedback': editoria_feedback
+            'problemas': execucao.problemas,
+            'sugestoes': execucao.sugestoes,
+            'editoria_feedback': editoria_dados['feedback'],
+            'editorias_sugeridas': [{'editoria': nome, 'probabilidade': round(p, 3)}
+                                    for nome, p in editoria_dados['ranking'][:3]],
+            'achados': medir(medidor, 'achados', self._localizar_achados, ctx,
+                             execucao.dados.get('redundancias') or ()),
+            'perfil': self.perfil,
+            'modo': modo,
+            'verificacoes_omitidas': execucao.omitidas,
+            'regras': ctx.regras.identificador
         }
         
+        if medidor is not None:
+            relatorio['metricas'] = medidor.como_dict()
+            self.coletor.registrar(medidor)
+        
         return relatorio
     
-    def _verificar_redundancias(self, doc):
-        """Verifica palavras repetidas em excesso no texto."""
-        # Contar palavras significativas (substantivos, verbos, adjetivos)
-        palavras = [token.text.lower() for token in doc 
-                   if token.pos_ in ['NOUN', 'VERB', 'ADJ'] 
-                   and not token.is_stop and len(token.text) > 3]
-        
-        # Contar ocorrências
-        contador = Counter(palavras)
+    @staticmethod
+    def _localizar_achados(ctx, redundancias=()):
+        """Lista os problemas com posição no texto, em ordem, como dicionários (ver Achado)."""
+        textual = ctx.textual
+        achados = list(textual.achados)
+        for inicio, fim, trecho, frase in textual.voz_passiva:
+            achados.append(Achado('voz_passiva', 'media', inicio, fim, frase,
+                                  f'Voz passiva: "{trecho}"', trecho.lower()))
+        for ocorrencias in ctx.lexico.get('jargao', {}).values():
+            for o in ocorrencias:
+                achados.append(Achado('jargao', 'media', o.inicio, o.fim, textual.frase_em(o.inicio),
+                                      f'Jargão: "{o.termo}"', o.termo))
+        for repeticao in redundancias:
+            for inicio, fim in repeticao.trechos:
+                achados.append(Achado('redundancia', 'baixa', inicio, fim, textual.frase_em(inicio),
+                                      f'Repetição: "{repeticao.lema}" aparece {repeticao.vezes} vezes '
+                                      f'em {JANELA_REDUNDANCIA} palavras', repeticao.lema))
+        achados.sort(key=lambda a: (a.inicio, a.fim))
+        return [a._asdict() for a in achados[:LIMITE_ACHADOS]]
+    
+    def _verificar_redundancias(self, ctx):
+        """Verifica lemas repetidos em excesso num mesmo trecho do texto, como Repeticao."""
+        # Ocorrências de palavras significativas (substantivos, verbos, adjetivos), agrupadas
+        # pelo lema ("lançamento", "lançamentos") e contadas na janela de palavras mais cheia
+        repeticoes = ctx.agregados.repeticoes.mais_repetidos(JANELA_REDUNDANCIA)
         
-        # Identificar palavras repetidas em excesso (mais de 3 vezes)
+        # Identificar lemas repetidos em excesso (mais de 3 vezes na janela)
         # Damos mais atenção a palavras comuns que são frequentemente redundantes
         redundancias = []
-        for palavra, contagem in contador.items():
-            if palavra in self.common_words and contagem > 2:
-                redundancias.append(palavra)
-            elif contagem > 3:
-                redundancias.append(palavra)
+        for repeticao in repeticoes:
+            if repeticao.lema in ctx.regras.common_words and repeticao.vezes > 2:
+                redundancias.append(repeticao)
+            elif repeticao.vezes > 3:
+                redundancias.append(repeticao)
                 
         return redundancias
     
-    def _verificar_voz_passiva(self, texto):
-        """Identifica ocorrências de voz passiva no texto."""
-        # Padrões comuns de voz passiva em português
-        padroes_voz_passiva = [
-            r'\bfoi\s+\w+ado\b', r'\bfoi\s+\w+ido\b', 
-            r'\bforam\s+\w+ados\b', r'\bforam\s+\w+idos\b',
-            r'\bé\s+\w+ado\b', r'\bé\s+\w+ido\b',
-            r'\bsão\s+\w+ados\b', r'\bsão\s+\w+idos\b',
-            r'\bsera\s+\w+ado\b', r'\bsera\s+\w+ido\b',
-            r'\bserão\s+\w+ados\b', r'\bserão\s+\w+idos\b'
-        ]
-        
-        voz_passiva = []
-        for padrao in padroes_voz_passiva:
-            matches = re.finditer(padrao, texto, re.IGNORECASE)
-            for match in matches:
-                voz_passiva.append(match.group(0))
-                
-        return voz_passiva
+    @staticmethod
+    def _verificar_voz_passiva(ctx):
+        """Identifica ocorrências de voz passiva, em ordem, como (início, fim, trecho, frase)."""
+        # Encontradas na mesma passada que divide parágrafos e frases (AgregadosTexto)
+        return ctx.textual.voz_passiva
     
-    def _verificar_comprimento(self, texto):
+    @staticmethod
+    def _verificar_comprimento(ctx):
         """Verifica o comprimento de parágrafos e frases."""
         problemas = []
         sugestoes = []
         penalidade = 0
         
-        # Dividir em parágrafos
-        paragrafos = [p for p in texto.split('\n') if p.strip()]
-        
         # Verificar parágrafos muito longos (mais de 6 linhas ou 600 caracteres)
-        paragrafos_longos = [p for p in paragrafos if len(p) > 600]
+        paragrafos_longos = ctx.textual.n_paragrafos_longos
         if paragrafos_longos:
-            problemas.append(f"Encontramos {len(paragrafos_longos)} parágrafos muito longos.")
+            problemas.append(f"Encontramos {paragrafos_longos} parágrafos muito longos.")
             sugestoes.append("Considere dividir parágrafos longos em unidades menores para melhorar a legibilidade.")
-            penalidade += min(len(paragrafos_longos) * 3, 15)
+            penalidade += min(paragrafos_longos * 3, 15)
         
         # Verificar frases muito longas (mais de 30 palavras)
-        frases = re.split(r'[.!?]+', texto)
-        frases_longas = [f for f in frases if len(f.split()) > 30]
+        frases_longas = ctx.textual.n_frases_longas
         if frases_longas:
-            problemas.append(f"Encontramos {len(frases_longas)} frases muito longas.")
+            problemas.append(f"Encontramos {frases_longas} frases muito longas.")
             sugestoes.append("Considere dividir frases longas em unidades menores para melhorar a clareza.")
-            penalidade += min(len(frases_longas) * 2, 10)
+            penalidade += min(frases_longas * 2, 10)
             
         return problemas, sugestoes, penalidade
     
-    def _verificar_jargoes(self, doc):
-        """Identifica jargões corporativos no texto."""
-        palavras = [token.text.lower() for token in doc]
-        jargoes_encontrados = [palavra for palavra in palavras if palavra in self.jargoes]
-        return list(set(jargoes_encontrados))  # Remover duplicatas
+    def _verificar_jargoes(self, ctx):
+        """Identifica jargões corporativos no texto (sem duplicatas, na ordem em que aparecem)."""
+        return list(ctx.lexico.get('jargao', {}))
     
-    def _verificar_info_essenciais(self, texto):
+    def _verificar_info_essenciais(self, ctx):
         """Verifica se o release contém as informações essenciais."""
-        texto_lower = texto.lower()
-        info_faltantes = []
-        
-        # Verificar cada informação essencial
-        for info in self.info_essenciais:
-            # Verificação simplificada - poderia ser mais sofisticada
-            if info not in texto_lower and not any(termo in texto_lower for termo in self._termos_relacionados(info)):
-                info_faltantes.append(info)
-                
-        return info_faltantes
-    
-    def _termos_relacionados(self, info):
-        """Retorna termos relacionados a cada informação essencial."""
-        mapeamento = {
-            'quem': ['empresa', 'organização', 'pessoa', 'profissional', 'equipe'],
-            'o que': ['produto', 'serviço', 'evento', 'lançamento', 'iniciativa'],
-            'quando': ['data', 'dia', 'mês', 'ano', 'período', 'prazo'],
-            'onde': ['local', 'cidade', 'país', 'endereço', 'região'],
-            'por que': ['motivo', 'razão', 'objetivo', 'propósito', 'meta'],
-            'como': ['método', 'processo', 'forma', 'maneira', 'procedimento']
-        }
-        return mapeamento.get(info, [])
+        # A própria pergunta ou um de seus termos relacionados precisa aparecer
+        encontradas = ctx.lexico.get('essencial', {})
+        return [info for info in ctx.regras.info_essenciais if info not in encontradas]
     
-    def _verificar_clareza(self, texto):
+    def _verificar_clareza(self, ctx):
         """Avalia a clareza e objetividade do texto."""
         # Análise simplificada de clareza
         problemas = []
         sugestoes = []
         
         # Verificar frases muito curtas em sequência (estilo telegráfico)
-        frases = re.split(r'[.!?]+', texto)
-        frases_curtas_consecutivas = 0
-        for frase in frases:
-            if len(frase.split()) < 5 and len(frase.strip()) > 0:
-                frases_curtas_consecutivas += 1
-            else:
-                frases_curtas_consecutivas = 0
-                
-            if frases_curtas_consecutivas >= 3:
-                problemas.append("Detectamos várias frases muito curtas em sequência.")
-                sugestoes.append("Considere combinar algumas frases curtas para melhorar o fluxo do texto.")
-                break
+        if ctx.textual.sequencia_curtas:
+            problemas.append("Detectamos várias frases muito curtas em sequência.")
+            sugestoes.append("Considere combinar algumas frases curtas para melhorar o fluxo do texto.")
         
         # Verificar uso excessivo de adjetivos
-        doc = self.nlp(texto)
-        adjetivos = [token.text for token in doc if token.pos_ == 'ADJ']
-        total_palavras = len([token for token in doc if not token.is_punct])
-        
-        proporcao_adjetivos = len(adjetivos) / total_palavras if total_palavras > 0 else 0
+        total_palavras = ctx.agregados.n_palavras
+        proporcao_adjetivos = ctx.agregados.n_adjetivos / total_palavras if total_palavras > 0 else 0
         if proporcao_adjetivos > 0.15:  # Mais de 15% de adjetivos
             problemas.append("Seu texto contém muitos adjetivos, o que pode reduzir a objetividade.")
             sugestoes.append("Considere reduzir o uso de adjetivos e focar em fatos concretos.")
         
         # Calcular pontuação de clareza (0-100)
         clareza_score = 100
-        if frases_curtas_consecutivas >= 3:
+        if ctx.textual.sequencia_curtas:
             clareza_score -= 20
         clareza_score -= min(int(proporcao_adjetivos * 100), 30)
         
         # Penalizar por frases muito longas
-        frases_longas = [f for f in frases if len(f.split()) > 25]
-        clareza_score -= min(len(frases_longas) * 5, 30)
+        clareza_score -= min(ctx.textual.n_frases_prolixas * 5, 30)
         
         return clareza_score, problemas, sugestoes
     
-    def _verificar_relevancia_editoria(self, texto, editoria):
+    def _classificar_editorias(self, ctx):
+        """[(editoria, probabilidade), ...] em ordem decrescente; vazio sem classificador treinado."""
+        classificador = self.classificador
+        if classificador is None:
+            return []
+        return classificador.probabilidades(ctx.agregados.lemas)
+    
+    def _verificar_relevancia_editoria(self, ctx, editoria, ranking=None):
         """Verifica a relevância do texto para a editoria especificada."""
-        if editoria not in self.editorias:
+        if editoria not in ctx.regras.editorias:
             return 0.5  # Valor neutro se a editoria não for reconhecida
         
+        # Com o classificador: probabilidade da editoria relativa à da mais provável
+        probabilidades = dict(ranking or ())
+        if editoria in probabilidades:
+            return probabilidades[editoria] / ranking[0][1]
+        
         # Palavras-chave para a editoria
-        palavras_chave = self.editorias[editoria]
+        palavras_chave = ctx.regras.editorias[editoria]
         
-        # Contar ocorrências de palavras-chave
-        texto_lower = texto.lower()
-        ocorrencias = sum(1 for palavra in palavras_chave if palavra in texto_lower)
+        # Contar palavras-chave distintas presentes no texto
+        ocorrencias = len({o.termo for o in ctx.lexico.get('editoria', {}).get(editoria, [])})
         
         # Calcular relevância (0-1)
         relevancia = min(ocorrencias / len(palavras_chave), 1.0)
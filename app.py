@@ -1,5 +1,94 @@
+import asyncio
+import html
+import os
+import time
+
 import streamlit as st
 import analyzer
+import assincrono
+import incremental
+from cache import normalizar_texto
+from regras import repositorio_padrao
+
+# Ordem das gravidades dos achados, para escolher a cor de trechos com mais de um achado
+GRAVIDADES = {'baixa': 1, 'media': 2, 'alta': 3}
+
+@st.cache_resource(show_spinner="Preparando a bússola...")
+def obter_analisador():
+    """Analisador único do processo, já aquecido, compartilhado entre as sessões."""
+    return analyzer.aquecer()
+
+@st.cache_resource
+def obter_analisador_incremental():
+    """Reanálise por parágrafo: ao editar um trecho, só ele volta a passar pelo spaCy."""
+    return incremental.AnalisadorIncremental(obter_analisador())
+
+@st.cache_resource(show_spinner="Preparando a bússola...")
+def obter_executor():
+    """Executor assíncrono das análises: threads sobre o analisador incremental ou, com
+    BUSSOLA_PROCESSOS=N, um pool de N processos com o modelo já carregado."""
+    processos = int(os.environ.get('BUSSOLA_PROCESSOS', '0'))
+    if processos > 0:
+        return assincrono.ExecutorAssincrono(processos=processos).aquecer()
+    return assincrono.ExecutorAssincrono(obter_analisador_incremental())
+
+def exibir_preliminar(area, preliminar):
+    """Mostra os achados das verificações rápidas enquanto a análise completa roda."""
+    with area.container():
+        st.markdown("<h3>🔭 Primeiras observações</h3>", unsafe_allow_html=True)
+        if preliminar['problemas']:
+            for problema in preliminar['problemas']:
+                st.markdown(f"- {problema}")
+        else:
+            st.markdown("Nenhum problema de voz passiva ou de comprimento à vista.")
+        aviso = st.empty()
+    return aviso
+
+async def analisar_com_parciais(executor, texto, editoria, area):
+    """Exibe o relatório preliminar e aguarda o completo.
+    
+    O aviso de progresso é atualizado a cada fração de segundo; se o usuário enviar
+    um novo texto, o Streamlit interrompe o script numa dessas atualizações e a
+    análise pendente é cancelada ao fechar o gerador.
+    """
+    etapas = executor.analisar_em_etapas(texto, editoria)
+    proxima = None
+    try:
+        _, preliminar = await etapas.__anext__()
+        aviso = exibir_preliminar(area, preliminar)
+        inicio = time.perf_counter()
+        proxima = asyncio.ensure_future(etapas.__anext__())
+        while not proxima.done():
+            aviso.caption(f"Analisando o texto com o modelo de linguagem... {time.perf_counter() - inicio:.1f}s")
+            await asyncio.wait([proxima], timeout=0.25)
+        _, resultado = proxima.result()
+        return resultado
+    finally:
+        if proxima is not None and not proxima.done():
+            proxima.cancel()
+            await asyncio.wait([proxima])
+        await etapas.aclose()
+
+def destacar_texto(texto, achados):
+    """HTML do texto com os achados marcados no lugar, a partir das posições do relatório."""
+    fronteiras = sorted({0, len(texto)} | {a['inicio'] for a in achados} | {a['fim'] for a in achados})
+    por_inicio = sorted(achados, key=lambda a: a['inicio'])
+    ativos = []
+    proximo = 0
+    partes = []
+    for inicio, fim in zip(fronteiras, fronteiras[1:]):
+        while proximo < len(por_inicio) and por_inicio[proximo]['inicio'] <= inicio:
+            ativos.append(por_inicio[proximo])
+            proximo += 1
+        ativos = [a for a in ativos if a['fim'] > inicio]
+        trecho = html.escape(texto[inicio:fim]).replace('\n', '<br>')
+        if ativos:
+            gravidade = max((a['gravidade'] for a in ativos), key=GRAVIDADES.get)
+            titulo = html.escape(' | '.join(a['mensagem'] for a in ativos), quote=True)
+            partes.append(f'<mark class="achado {gravidade}" title="{titulo}">{trecho}</mark>')
+        else:
+            partes.append(trecho)
+    return ''.join(partes)
 
 def main():
     # Configuração da página
@@ -80,6 +169,26 @@ def main():
         max-width: 100px;
         margin-right: 20px;
     }
+    .texto-destacado {
+        border: 1px solid #0077b6;
+        border-radius: 5px;
+        padding: 15px;
+        line-height: 1.7;
+    }
+    mark.achado {
+        color: #2c2c2c;
+        border-radius: 3px;
+        padding: 0 2px;
+    }
+    mark.achado.alta {
+        background-color: #f8d7da;
+    }
+    mark.achado.media {
+        background-color: #fff3cd;
+    }
+    mark.achado.baixa {
+        background-color: #dbeefa;
+    }
     .nautical-divider {
         text-align: center;
         margin: 20px 0;
@@ -116,6 +225,9 @@ def main():
     Insira seu release abaixo e descubra como melhorar sua navegação textual.
     """)
     
+    # Carregar (uma única vez por processo) o analisador antes do primeiro clique
+    executor = obter_executor()
+    
     # Área para inserção do texto
     release_text = st.text_area("Digite seu release aqui:", height=250, 
                                placeholder="Cole seu texto aqui para análise...")
@@ -127,19 +239,20 @@ def main():
     with col2:
         editoria = st.selectbox(
             "Editoria",
-            ["", "Esporte", "Entretenimento", "Tecnologia", "Economia", "Política", "Outra"],
+            [""] + [nome.capitalize() for nome in repositorio_padrao().obter().editorias] + ["Outra"],
             label_visibility="collapsed"
         )
     
     # Botão de análise
     if st.button("Analisar Release"):
         if release_text:
+            # As posições dos achados se referem ao texto normalizado
+            texto = normalizar_texto(release_text)
+            area_preliminar = st.empty()
             with st.spinner("Navegando pelas águas do seu texto..."):
-                # Criar instância do analisador
-                release_analyzer = analyzer.ReleaseAnalyzer()
-                
-                # Analisar o texto
-                resultado = release_analyzer.analisar_release(release_text, editoria)
+                # Analisar o texto, mostrando primeiro os achados das verificações rápidas
+                resultado = asyncio.run(analisar_com_parciais(executor, texto, editoria, area_preliminar))
+                area_preliminar.empty()
                 
                 # Exibir resultados
                 st.markdown('<div class="nautical-divider">🌊 🌊 🌊</div>', unsafe_allow_html=True)
@@ -184,6 +297,24 @@ def main():
                     for sugestao in resultado['sugestoes']:
                         st.markdown(f"- {sugestao}")
                 
+                # Release quase idêntico a um já analisado: o relatório é o da versão anterior
+                if 'duplicata' in resultado:
+                    st.info(f"Este release é quase idêntico a um já analisado "
+                            f"(similaridade de {resultado['duplicata']['similaridade']:.0%}); "
+                            f"o relatório acima é o da versão anterior.")
+                
+                # Onde estão os problemas, marcados no próprio texto (as posições de uma
+                # duplicata se referem ao texto anterior, então não há marcação)
+                if resultado['achados'] and 'duplicata' not in resultado:
+                    st.markdown("<h3>🔎 Onde ajustar as velas</h3>", unsafe_allow_html=True)
+                    st.markdown("Passe o mouse sobre os trechos marcados para ver o motivo "
+                                "(vermelho: grave, amarelo: moderado, azul: leve).")
+                    st.markdown(f'<div class="texto-destacado">{destacar_texto(texto, resultado["achados"])}</div>',
+                                unsafe_allow_html=True)
+                    with st.expander(f"Lista de achados ({len(resultado['achados'])})"):
+                        for achado in resultado['achados']:
+                            st.markdown(f"- Frase {achado['frase'] + 1}: {achado['mensagem']}")
+                
                 # Divisor náutico final
                 st.markdown('<div class="nautical-divider">⚓ ⚓ ⚓</div>', unsafe_allow_html=True)
                 
@@ -0,0 +1,95 @@
+"""Fachada assíncrona da análise, para front-ends com laço de eventos (Streamlit, ASGI).
+
+    executor = ExecutorAssincrono(processos=2)
+    relatorio = await executor.analisar_release(texto, 'Tecnologia')
+
+    async for etapa, relatorio in executor.analisar_em_etapas(texto, 'Tecnologia'):
+        ...  # 'preliminar' (regex, imediato) e depois 'completo' (spaCy)
+
+Com processos=0 (padrão), as análises rodam em threads sobre um analisador do
+próprio processo (o compartilhado, ou o que for passado). Com processos=N, um
+pool de N processos, cada um com seu modelo spaCy carregado e aquecido na
+partida, tira a análise do processo do front-end; o relatório volta do worker
+como relatorios.RelatorioCompacto, que custa bem menos para serializar. A
+variável BUSSOLA_PROCESSOS define o padrão.
+
+Cancelar a tarefa (por exemplo, quando o usuário envia um novo texto) retira da
+fila a análise que ainda não começou; a que já está rodando termina no worker e
+o resultado é descartado.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import analyzer
+from relatorios import RelatorioCompacto
+
+# Analisador de cada processo do pool, criado pelo inicializador
+_analisador_worker = None
+
+
+def _inicializar_worker(perfil):
+    global _analisador_worker
+    _analisador_worker = analyzer.aquecer(perfil)
+
+
+def _analisar_no_worker(texto, editoria, pacote):
+    return RelatorioCompacto.de_dict(_analisador_worker.analisar_release(texto, editoria, pacote=pacote))
+
+
+def _worker_pronto():
+    return _analisador_worker is not None
+
+
+class ExecutorAssincrono:
+    """Executa análises fora do laço de eventos, em threads ou em um pool de processos aquecidos."""
+
+    def __init__(self, analisador=None, processos=None, perfil=analyzer.PERFIL_PADRAO, threads=4):
+        if processos is None:
+            processos = int(os.environ.get('BUSSOLA_PROCESSOS', '0'))
+        self.processos = processos
+        if processos > 0:
+            # spawn: seguro mesmo quando o processo pai já tem threads (caso do Streamlit)
+            self._pool = ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_inicializar_worker, initargs=(perfil,))
+            self._funcao = _analisar_no_worker
+        else:
+            analisador = analisador if analisador is not None else analyzer.obter_analisador(perfil)
+            self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='analise')
+            self._funcao = lambda texto, editoria, pacote: analisador.analisar_release(texto, editoria, pacote=pacote)
+
+    def aquecer(self):
+        """Inicia os processos do pool (cada um carrega o modelo) antes da primeira análise."""
+        if self.processos > 0:
+            # O inicializador de cada processo já aquece o modelo (sem passar pelo histórico)
+            futuros = [self._pool.submit(_worker_pronto) for _ in range(self.processos)]
+        else:
+            futuros = [self._pool.submit(self._funcao, "Aquecimento.", None, None)]
+        for futuro in futuros:
+            futuro.result()
+        return self
+
+    async def analisar_release(self, texto, editoria=None, pacote=None):
+        """Versão assíncrona de ReleaseAnalyzer.analisar_release."""
+        loop = asyncio.get_running_loop()
+        relatorio = await loop.run_in_executor(self._pool, self._funcao, texto, editoria, pacote)
+        return relatorio.como_dict() if isinstance(relatorio, RelatorioCompacto) else relatorio
+
+    async def analisar_em_etapas(self, texto, editoria=None, pacote=None):
+        """Gera ('preliminar', relatório parcial) e depois ('completo', relatório).
+
+        A análise completa começa antes das verificações baratas e roda em paralelo
+        a elas; se o consumidor abandonar o gerador, ela é cancelada.
+        """
+        completa = asyncio.ensure_future(self.analisar_release(texto, editoria, pacote))
+        try:
+            loop = asyncio.get_running_loop()
+            preliminar = await loop.run_in_executor(None, analyzer.analisar_preliminar, texto, pacote)
+            yield 'preliminar', preliminar
+            yield 'completo', await completa
+        finally:
+            completa.cancel()
+
+    def encerrar(self):
+        self._pool.shutdown(wait=False)
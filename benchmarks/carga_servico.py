@@ -0,0 +1,93 @@
+"""Teste de carga local para o serviço HTTP (servico.py).
+
+Uso:
+    python servico.py --workers 4 &
+    python benchmarks/carga_servico.py --url http://127.0.0.1:8600 --requisicoes 2000 --concorrencia 32
+
+Envia releases em paralelo para /analisar e informa vazão, latências
+(p50/p95/p99) e quantas respostas foram 429 (fila cheia) ou erro.
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+RELEASES = [
+    ("A XYZ Tech anuncia hoje o lançamento do TechNavigator 3000, uma plataforma de inteligência "
+     "artificial que reduz em até 40% o tempo de desenvolvimento de software. O lançamento acontece "
+     "em 15 de maio, em São Paulo.", "Tecnologia"),
+    ("O time do Atlético venceu o campeonato estadual neste domingo. O técnico afirmou que a vitória "
+     "foi construída ao longo da temporada com a dedicação de cada atleta.", "Esporte"),
+    ("Foi anunciado pela empresa que os lucros do trimestre foram recalculados. O mercado reagiu e as "
+     "ações da companhia subiram 3% na bolsa.", "Economia"),
+]
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Teste de carga do serviço da Bússola.')
+    parser.add_argument('--url', default='http://127.0.0.1:8600')
+    parser.add_argument('--requisicoes', type=int, default=1000)
+    parser.add_argument('--concorrencia', type=int, default=16)
+    parser.add_argument('--timeout', type=float, default=60.0)
+    args = parser.parse_args(argv)
+
+    latencias = []
+    status = Counter()
+    trava = threading.Lock()
+    proxima = iter(range(args.requisicoes))
+
+    def cliente():
+        while True:
+            with trava:
+                i = next(proxima, None)
+            if i is None:
+                return
+            texto, editoria = RELEASES[i % len(RELEASES)]
+            # Um sufixo distinto por requisição evita medir só acertos de cache
+            corpo = json.dumps({'texto': f"{texto} Referência {i}.", 'editoria': editoria}).encode('utf-8')
+            pedido = urllib.request.Request(f"{args.url}/analisar", data=corpo,
+                                            headers={'Content-Type': 'application/json'})
+            inicio = time.perf_counter()
+            try:
+                with urllib.request.urlopen(pedido, timeout=args.timeout) as resposta:
+                    resposta.read()
+                    codigo = resposta.status
+            except urllib.error.HTTPError as erro:
+                codigo = erro.code
+            except (urllib.error.URLError, OSError):
+                codigo = 'conexao'
+            duracao = time.perf_counter() - inicio
+            with trava:
+                status[codigo] += 1
+                if codigo == 200:
+                    latencias.append(duracao)
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=cliente) for _ in range(args.concorrencia)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    total = time.perf_counter() - inicio
+
+    print(f"Requisições: {args.requisicoes} em {total:.2f}s ({status[200] / total:.1f} respostas 200/s)")
+    print("Status: " + ", ".join(f"{codigo}={n}" for codigo, n in sorted(status.items(), key=str)))
+    if latencias:
+        print(f"Latência (ms): p50={percentil(latencias, 50) * 1000:.1f} "
+              f"p95={percentil(latencias, 95) * 1000:.1f} p99={percentil(latencias, 99) * 1000:.1f} "
+              f"média={statistics.mean(latencias) * 1000:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Gerador determinístico de releases sintéticos em português, para benchmarks e testes.
+
+Uso:
+    python benchmarks/corpus.py --saida corpus.jsonl --quantidade 100
+
+Cada release é montado a partir de modelos de frase e das palavras-chave da
+editoria no pacote de regras, com voz passiva, jargões e repetições em doses
+variadas. A mesma semente gera sempre o mesmo corpus. A saída JSONL tem o
+formato {"id", "texto", "editoria"} aceito por bussola.py.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from regras import repositorio_padrao  # noqa: E402
+
+TAMANHOS_PADRAO = (200, 1000, 5000, 20000, 50000)
+
+SUJEITOS = ['A empresa {org}', 'O grupo {org}', 'A diretoria da {org}', 'A equipe da {org}',
+            'O presidente da {org}', 'A associação {org}']
+ORGANIZACOES = ['XYZ Tech', 'Atlântica', 'Rumo Norte', 'Vela Azul', 'Porto Seguro Digital', 'Maré Alta']
+CIDADES = ['São Paulo', 'Recife', 'Porto Alegre', 'Belo Horizonte', 'Salvador', 'Curitiba']
+VERBOS = ['anuncia', 'apresenta', 'divulga', 'lança', 'confirma', 'inaugura']
+MESES = ['janeiro', 'março', 'maio', 'julho', 'setembro', 'novembro']
+
+MODELOS = [
+    '{sujeito} {verbo} hoje {chave} em {cidade}.',
+    'O {chave2} foi desenvolvido ao longo de {n} meses e será apresentado em {mes}.',
+    'Segundo a organização, o objetivo é ampliar o alcance de {chave} na região.',
+    'Os resultados foram divulgados pela {org} durante o evento, que reuniu {n} profissionais.',
+    'A iniciativa tem como meta fortalecer {chave} e {chave2} em todo o país.',
+    '"Estamos muito felizes com {chave}", afirma o diretor da {org}.',
+    'O processo de seleção começa no dia {n} de {mes} e vai até o fim do período.',
+    'A proposta busca {jargao} as operações e gerar uma {jargao2} real com os parceiros.',
+    'O projeto é considerado estratégico pela {org}, que investiu R$ {n} milhões na ação.',
+    'Mais informações estão disponíveis no site oficial da {org}.',
+    'O evento acontece em {cidade} e é aberto ao público.',
+    'A {org} espera que o {chave2} seja bem recebido pelo mercado e pelos clientes.',
+]
+
+
+def gerar_release(rng, editoria, palavras, palavras_chave, jargoes):
+    """Gera um release com aproximadamente `palavras` palavras para a editoria."""
+    paragrafos = []
+    total = 0
+    while total < palavras:
+        frases = []
+        for _ in range(rng.randint(2, 6)):
+            org = rng.choice(ORGANIZACOES)
+            frase = rng.choice(MODELOS).format(
+                sujeito=rng.choice(SUJEITOS).format(org=org), org=org, verbo=rng.choice(VERBOS),
+                chave=rng.choice(palavras_chave), chave2=rng.choice(palavras_chave),
+                cidade=rng.choice(CIDADES), mes=rng.choice(MESES), n=rng.randint(2, 90),
+                jargao=rng.choice(jargoes), jargao2=rng.choice(jargoes))
+            frases.append(frase)
+            total += len(frase.split())
+        paragrafos.append(' '.join(frases))
+    return '\n\n'.join(paragrafos)
+
+
+def gerar_corpus(quantidade=None, tamanhos=TAMANHOS_PADRAO, semente=42, pacote=None):
+    """Gera registros {id, texto, editoria} cobrindo todas as editorias e tamanhos."""
+    regras = repositorio_padrao().obter(pacote) if pacote else repositorio_padrao().obter()
+    rng = random.Random(semente)
+    editorias = list(regras.editorias)
+    jargoes = sorted(regras.jargoes)
+    quantidade = quantidade or len(editorias) * len(tamanhos)
+    for i in range(quantidade):
+        editoria = editorias[i % len(editorias)]
+        palavras = tamanhos[(i // len(editorias)) % len(tamanhos)]
+        texto = gerar_release(rng, editoria, palavras, list(regras.editorias[editoria]), jargoes)
+        yield {'id': f'sintetico-{i:05d}', 'texto': texto, 'editoria': editoria, 'palavras': palavras}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--saida', help='Arquivo JSONL de saída (padrão: stdout).')
+    parser.add_argument('--quantidade', type=int, help='Número de releases (padrão: editorias x tamanhos).')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=list(TAMANHOS_PADRAO),
+                        help='Tamanhos aproximados, em palavras, usados em rodízio.')
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    saida = open(args.saida, 'w', encoding='utf-8') if args.saida else sys.stdout
+    try:
+        for registro in gerar_corpus(args.quantidade, tuple(args.tamanhos), args.semente):
+            saida.write(json.dumps(registro, ensure_ascii=False) + '\n')
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""Benchmark reprodutível do analisador, com resultados em JSON comparáveis entre commits.
+
+Uso:
+    python benchmarks/executar.py --saida base.json
+    python benchmarks/executar.py --saida novo.json --comparar base.json
+
+Mede, sobre o corpus sintético de benchmarks/corpus.py (200 a 50 mil palavras,
+todas as editorias):
+  - tempo de carga do modelo spaCy;
+  - latência de cada etapa (spaCy, contexto e cada verificação registrada), por tamanho;
+  - latência ponta a ponta de analisar_release (p50/p95/p99), sem cache;
+  - vazão de analisar_lote (releases/s e palavras/s), completa e na triagem (modo
+    'rapido' e piso de pontuação);
+  - pico de memória residente (RSS) do processo.
+Com --comparar, aponta as métricas que pioraram além da tolerância e sai com
+código 1, para uso em CI.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import spacy  # noqa: E402
+
+import analyzer  # noqa: E402
+from benchmarks.corpus import TAMANHOS_PADRAO, gerar_corpus  # noqa: E402
+
+# Piso usado na medida de triagem: releases com nota até aqui são separados para revisão
+PISO_TRIAGEM = 70
+
+
+def percentis(valores):
+    ordenados = sorted(valores)
+
+    def p(q):
+        return ordenados[min(len(ordenados) - 1, int(round(q / 100 * (len(ordenados) - 1))))]
+    return {'p50': p(50), 'p95': p(95), 'p99': p(99), 'min': ordenados[0], 'max': ordenados[-1],
+            'n': len(ordenados)}
+
+
+def pico_rss_mb():
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def medir_carga_modelo(perfil):
+    analyzer._modelos.clear()
+    inicio = time.perf_counter()
+    analyzer.carregar_modelo(perfil=perfil)
+    return time.perf_counter() - inicio
+
+
+def medir_etapas(analisador, corpus, repeticoes):
+    """Latência de cada etapa da análise, agrupada pelo tamanho do release (ms)."""
+    tempos = defaultdict(lambda: defaultdict(list))
+    regras = analisador.regras.obter()
+    for registro in corpus:
+        texto, editoria, tamanho = registro['texto'], registro['editoria'], registro['palavras']
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            doc = analisador.nlp(texto)
+            tempos[tamanho]['spacy'].append(time.perf_counter() - inicio)
+
+            inicio = time.perf_counter()
+            ctx = analyzer.ContextoAnalise(texto, doc, regras)
+            tempos[tamanho]['contexto'].append(time.perf_counter() - inicio)
+
+            # Cada verificação do registro, medida individualmente
+            for verificacao in analisador.verificacoes:
+                inicio = time.perf_counter()
+                verificacao.avaliar(analisador, ctx, editoria)
+                tempos[tamanho][verificacao.nome].append(time.perf_counter() - inicio)
+    return {str(tamanho): {etapa: round(min(v) * 1000, 4) for etapa, v in etapas.items()}
+            for tamanho, etapas in sorted(tempos.items())}
+
+
+def medir_ponta_a_ponta(analisador, corpus, repeticoes):
+    """Percentis de analisar_release por tamanho (ms)."""
+    tempos = defaultdict(list)
+    for registro in corpus:
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            analisador.analisar_release(registro['texto'], registro['editoria'])
+            tempos[registro['palavras']].append(time.perf_counter() - inicio)
+    return {str(tamanho): {k: round(v * 1000, 3) if k != 'n' else v for k, v in percentis(valores).items()}
+            for tamanho, valores in sorted(tempos.items())}
+
+
+def medir_lote(analisador, corpus, n_process, batch_size, **kwargs):
+    textos = [r['texto'] for r in corpus]
+    editorias = [r['editoria'] for r in corpus]
+    inicio = time.perf_counter()
+    n = sum(1 for _ in analisador.analisar_lote(textos, editorias, batch_size=batch_size, n_process=n_process,
+                                                **kwargs))
+    duracao = time.perf_counter() - inicio
+    palavras = sum(len(t.split()) for t in textos)
+    return {'releases': n, 'segundos': round(duracao, 3), 'releases_por_s': round(n / duracao, 2),
+            'palavras_por_s': round(palavras / duracao, 1), 'n_process': n_process, 'batch_size': batch_size}
+
+
+def comparar(atual, anterior, tolerancia):
+    """Lista as métricas de tempo que pioraram mais que `tolerancia` (fração) em relação à base."""
+    regressoes = []
+
+    def percorrer(a, b, caminho):
+        if isinstance(a, dict) and isinstance(b, dict):
+            for chave in a:
+                if chave in b:
+                    percorrer(a[chave], b[chave], caminho + [chave])
+        elif isinstance(a, (int, float)) and isinstance(b, (int, float)) and b > 0:
+            nome = '.'.join(caminho)
+            # Métricas de vazão melhoram quando sobem; as demais (tempo, memória) quando descem
+            maior_melhor = nome.endswith('_por_s')
+            variacao = (b - a) / b if maior_melhor else (a - b) / b
+            ignoradas = ('.n', '.min', '.max', '.releases', '.segundos', '.n_process', '.batch_size')
+            if variacao > tolerancia and not nome.endswith(ignoradas):
+                regressoes.append((nome, b, a, variacao))
+
+    percorrer(atual['resultados'], anterior['resultados'], [])
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark da Bússola de Releases.')
+    parser.add_argument('--saida', default='resultados_benchmark.json', help='Arquivo JSON de resultados.')
+    parser.add_argument('--comparar', help='Resultados anteriores para detectar regressões.')
+    parser.add_argument('--tolerancia', type=float, default=0.15, help='Piora relativa aceita (padrão: 15%%).')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=list(TAMANHOS_PADRAO))
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--perfil', default=analyzer.PERFIL_PADRAO, choices=sorted(analyzer.PERFIS_PIPELINE))
+    parser.add_argument('--n-process', type=int, default=1, help='Processos para o benchmark de lote.')
+    parser.add_argument('--batch-size', type=int, default=16)
+    args = parser.parse_args(argv)
+
+    carga = medir_carga_modelo(args.perfil)
+    analisador = analyzer.ReleaseAnalyzer(perfil=args.perfil)
+    # Um release de cada editoria por tamanho
+    corpus = list(gerar_corpus(tamanhos=tuple(args.tamanhos), semente=args.semente))
+    analisador.analisar_release(corpus[0]['texto'])  # aquecimento
+
+    resultados = {
+        'carga_modelo_s': round(carga, 3),
+        'etapas_ms': medir_etapas(analisador, corpus, args.repeticoes),
+        'analisar_release_ms': medir_ponta_a_ponta(analisador, corpus, args.repeticoes),
+        'lote': medir_lote(analisador, corpus, args.n_process, args.batch_size),
+        'lote_rapido': medir_lote(analisador, corpus, args.n_process, args.batch_size, modo=analyzer.MODO_RAPIDO),
+        'lote_piso': medir_lote(analisador, corpus, args.n_process, args.batch_size, piso=PISO_TRIAGEM),
+    }
+    resultados['pico_rss_mb'] = round(pico_rss_mb(), 1)
+
+    saida = {
+        'commit': commit_atual(),
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'spacy': spacy.__version__,
+        'modelo': analisador.versao_modelo,
+        'versao_regras': analyzer.VERSAO_REGRAS,
+        'parametros': vars(args),
+        'resultados': resultados,
+    }
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(saida, f, ensure_ascii=False, indent=2)
+
+    print(f"Carga do modelo: {resultados['carga_modelo_s']:.2f}s | pico de RSS: {resultados['pico_rss_mb']:.0f} MB")
+    for tamanho, p in resultados['analisar_release_ms'].items():
+        print(f"{tamanho:>6} palavras: p50={p['p50']:.1f}ms p95={p['p95']:.1f}ms p99={p['p99']:.1f}ms")
+    for chave, nome in (('lote', 'Lote'), ('lote_rapido', 'Lote, modo rápido'),
+                        ('lote_piso', f'Lote, piso {PISO_TRIAGEM}')):
+        lote = resultados[chave]
+        print(f"{nome}: {lote['releases_por_s']:.1f} releases/s ({lote['palavras_por_s']:.0f} palavras/s)")
+    print(f"Resultados gravados em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+        regressoes = comparar(saida, anterior, args.tolerancia)
+        for nome, antes, depois, variacao in regressoes:
+            print(f"REGRESSÃO {nome}: {antes} -> {depois} ({variacao:+.0%})")
+        if regressoes:
+            return 1
+        print(f"Sem regressões acima de {args.tolerancia:.0%} em relação a {anterior.get('commit')}.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
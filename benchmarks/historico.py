@@ -0,0 +1,88 @@
+"""Mede a gravação e as consultas agregadas do histórico de análises com milhões de linhas.
+
+Uso:
+    python benchmarks/historico.py --analises 1000000 --banco /tmp/historico.db
+
+Preenche um histórico com relatórios sintéticos (editorias, pacotes, meses,
+pontuações e jargões sorteados, sem passar pelo spaCy), em lotes do tamanho
+padrão, e informa a vazão de gravação e a latência (mediana de várias
+repetições) das consultas usadas pelo painel.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from historico import HistoricoAnalises  # noqa: E402
+
+EDITORIAS = ('economia', 'tecnologia', 'esporte', 'política', 'entretenimento', 'saúde', '')
+PACOTES = ('padrao', 'cliente_a', 'cliente_b')
+JARGOES = ('sinergia', 'paradigma', 'disruptivo', 'alavancagem', 'ecossistema', 'holístico', 'escalável')
+TIPOS = ('voz_passiva', 'frase_longa', 'paragrafo_longo')
+# 1º de janeiro de 2023, 00:00 UTC: os relatórios se espalham pelos 24 meses seguintes
+INICIO = 1672531200
+DOIS_ANOS = 2 * 365 * 24 * 3600
+
+
+def relatorio_sintetico(aleatorio):
+    achados = [{'tipo': 'jargao', 'termo': aleatorio.choice(JARGOES)} for _ in range(aleatorio.randint(0, 3))]
+    achados += [{'tipo': aleatorio.choice(TIPOS)} for _ in range(aleatorio.randint(0, 4))]
+    return {'pontuacao': max(0, min(100, int(aleatorio.gauss(72, 12)))), 'modo': 'completo', 'achados': achados}
+
+
+def medir_consulta(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark do histórico de análises.')
+    parser.add_argument('--analises', type=int, default=1000000)
+    parser.add_argument('--banco', default='historico_benchmark.db')
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    for sufixo in ('', '-wal', '-shm'):
+        if os.path.exists(args.banco + sufixo):
+            os.remove(args.banco + sufixo)
+    aleatorio = random.Random(args.semente)
+    historico = HistoricoAnalises(args.banco, intervalo=float('inf'))
+    inicio = time.perf_counter()
+    for i in range(args.analises):
+        historico.registrar(f"release {i}", relatorio_sintetico(aleatorio), aleatorio.choice(EDITORIAS),
+                            aleatorio.choice(PACOTES), aleatorio.uniform(0.01, 0.5),
+                            INICIO + aleatorio.random() * DOIS_ANOS)
+    historico.descarregar()
+    duracao = time.perf_counter() - inicio
+    print(f"{args.analises} análises gravadas em {duracao:.1f}s ({args.analises / duracao:.0f}/s), "
+          f"{os.path.getsize(args.banco) / 2 ** 20:.0f} MiB")
+
+    consultas = {
+        'distribuicao por editoria e mes': lambda: historico.distribuicao('editoria'),
+        'distribuicao por pacote em 2024': lambda: historico.distribuicao('pacote', '2024-01', '2024-12'),
+        'media mensal de uma editoria': lambda: historico.distribuicao('editoria', editoria='economia'),
+        'jargoes mais frequentes': lambda: historico.termos_frequentes('jargao', 10),
+        'jargoes de um pacote desde 2024-06': lambda: historico.termos_frequentes('jargao', 10, '2024-06',
+                                                                                  pacote='cliente_a'),
+        'total de analises': lambda: len(historico),
+        'ultimas 50 analises': lambda: historico.recentes(50),
+    }
+    print(f"Consultas (mediana de {args.repeticoes} repetições):")
+    for nome, consulta in consultas.items():
+        print(f"  {nome:>36}: {medir_consulta(consulta, args.repeticoes):8.2f} ms")
+    historico.fechar()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
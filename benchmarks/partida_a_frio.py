@@ -0,0 +1,80 @@
+"""Mede a partida a frio: de um processo Python novo até o primeiro relatório.
+
+Uso:
+    python benchmarks/partida_a_frio.py --repeticoes 5
+    python benchmarks/partida_a_frio.py --snapshot /tmp/modelo --gerar-snapshot
+
+Cada repetição roda em um processo novo e informa, em segundos: a importação do
+analisador, a importação do spaCy, a carga do modelo (do pacote ou do snapshot
+em BUSSOLA_MODELO_SNAPSHOT), o aquecimento e a primeira análise, além do tempo
+total medido de fora do processo. Para medir o contêiner inteiro, rode o script
+dentro da imagem, logo após a criação.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executado em cada processo novo; imprime os tempos em JSON na última linha
+PROGRAMA = """
+import json, sys, time
+inicio = time.perf_counter()
+import analyzer
+importacao = time.perf_counter() - inicio
+analisador = analyzer.aquecer(sys.argv[1])
+inicio = time.perf_counter()
+analisador.analisar_release("A Empresa XYZ anuncia hoje, em Recife, o novo produto, que foi desenvolvido em 2024.")
+tempos = analyzer.relatorio_partida()
+tempos['importacao_analyzer_s'] = round(importacao, 3)
+tempos['primeira_analise_s'] = round(time.perf_counter() - inicio, 3)
+print(json.dumps(tempos))
+"""
+
+
+def medir_partida(perfil, snapshot=None):
+    ambiente = dict(os.environ)
+    if snapshot:
+        ambiente['BUSSOLA_MODELO_SNAPSHOT'] = snapshot
+    inicio = time.perf_counter()
+    saida = subprocess.run([sys.executable, '-c', PROGRAMA, perfil], cwd=RAIZ, env=ambiente,
+                           capture_output=True, text=True, check=True).stdout
+    tempos = json.loads(saida.strip().splitlines()[-1])
+    tempos['total_s'] = round(time.perf_counter() - inicio, 3)
+    return tempos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mede a partida a frio da Bússola de Releases.')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--perfil', default='rapido')
+    parser.add_argument('--snapshot', help='Diretório do snapshot do modelo (BUSSOLA_MODELO_SNAPSHOT).')
+    parser.add_argument('--gerar-snapshot', action='store_true', help='Gera o snapshot antes de medir.')
+    parser.add_argument('--saida', help='Grava as medidas em JSON.')
+    args = parser.parse_args(argv)
+
+    if args.gerar_snapshot:
+        if not args.snapshot:
+            parser.error('--gerar-snapshot exige --snapshot')
+        subprocess.run([sys.executable, '-c', 'import sys, analyzer; analyzer.salvar_snapshot(sys.argv[1], perfil=sys.argv[2])',
+                        args.snapshot, args.perfil], cwd=RAIZ, check=True)
+
+    medidas = [medir_partida(args.perfil, args.snapshot) for _ in range(args.repeticoes)]
+    origem = medidas[0].get(f'origem_modelo_{args.perfil}')
+    print(f"Partida a frio ({args.repeticoes} processos, perfil {args.perfil}, modelo do {origem}), mediana em segundos:")
+    for chave in medidas[0]:
+        if chave.endswith('_s'):
+            print(f"  {chave:>28}: {statistics.median(m[chave] for m in medidas):.3f}")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({'perfil': args.perfil, 'snapshot': args.snapshot, 'medidas': medidas}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Teste de resistência do serviço HTTP: a memória de cada worker fica estável ao longo de muitas análises?
+
+Uso:
+    python servico.py --workers 4 &
+    python benchmarks/resistencia.py --url http://127.0.0.1:8600 --analises 1000000
+
+Envia releases sintéticos em lotes para /analisar/lote, cada um com nomes
+inventados que o vocabulário do spaCy ainda não conhece (como os nomes próprios
+e de produtos dos releases reais), e a intervalos regulares consulta /saude de
+todos os workers: RSS, tamanho do vocabulário e, quando o serviço roda na mesma
+máquina, PSS (a memória que cabe a cada worker descontando as páginas do
+modelo compartilhadas com o pai). No fim compara a memória do início e do fim da
+rodada. Para ver o crescimento sem a reciclagem dos workers, suba o serviço com
+--max-vocabulario 0.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import gerar_corpus  # noqa: E402
+from metricas import memoria_processo  # noqa: E402
+
+SILABAS = ('ba', 'ce', 'di', 'fo', 'gu', 'la', 'me', 'ni', 'po', 'ru', 'sa', 'te', 'vi', 'xo', 'za', 'tra', 'bri')
+
+
+def nome_inventado(aleatorio):
+    return ''.join(aleatorio.choice(SILABAS) for _ in range(aleatorio.randint(3, 5))).capitalize()
+
+
+def gerar_releases(n, palavras, semente):
+    """Releases do corpus sintético, cada um com três nomes novos para o vocabulário."""
+    aleatorio = random.Random(semente)
+    for registro in gerar_corpus(n, (palavras,), semente):
+        nomes = [nome_inventado(aleatorio) for _ in range(3)]
+        texto = (f"{registro['texto']}\n\nParticipam do anúncio {nomes[0]} {nomes[1]}, "
+                 f"da {nomes[2]} Sistemas.")
+        yield {'id': registro['id'], 'texto': texto, 'editoria': registro['editoria']}
+
+
+def chamar(url, caminho, corpo=None, timeout=60.0):
+    dados = json.dumps(corpo).encode('utf-8') if corpo is not None else None
+    pedido = urllib.request.Request(f"{url}{caminho}", data=dados, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(pedido, timeout=timeout) as resposta:
+        return json.loads(resposta.read())
+
+
+def amostrar_workers(url, workers, consultas):
+    """Estado de cada worker distinto que respondeu a `consultas` chamadas a /saude (pid -> dados)."""
+    vistos = {}
+    for _ in range(consultas):
+        try:
+            saude = chamar(url, '/saude', timeout=10)
+        except (urllib.error.URLError, OSError):
+            continue
+        pid = saude['pid']
+        if pid not in vistos:
+            # Com o serviço na mesma máquina, o PSS vem direto do /proc
+            saude['pss_mb'] = memoria_processo(pid)['pss_mb'] if os.path.exists(f'/proc/{pid}') else None
+            vistos[pid] = saude
+        if len(vistos) >= workers:
+            break
+    return vistos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Teste de resistência (memória) do serviço da Bússola.')
+    parser.add_argument('--url', default='http://127.0.0.1:8600')
+    parser.add_argument('--analises', type=int, default=1000000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Workers do serviço (para saber quantos amostrar).')
+    parser.add_argument('--lote', type=int, default=50, help='Releases por chamada de /analisar/lote.')
+    parser.add_argument('--concorrencia', type=int, default=None, help='Clientes simultâneos (padrão: --workers).')
+    parser.add_argument('--palavras', type=int, default=150, help='Tamanho aproximado de cada release.')
+    parser.add_argument('--amostras', type=int, default=20, help='Amostras de memória ao longo da rodada.')
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    releases = gerar_releases(args.analises, args.palavras, args.semente)
+    trava = threading.Lock()
+    status = Counter()
+    feitas = 0
+
+    def cliente():
+        nonlocal feitas
+        while True:
+            with trava:
+                lote = [release for _, release in zip(range(args.lote), releases)]
+            if not lote:
+                return
+            try:
+                chamar(args.url, '/analisar/lote', {'releases': lote})
+                codigo = 200
+            except urllib.error.HTTPError as erro:
+                codigo = erro.code
+            except (urllib.error.URLError, OSError):
+                codigo = 'conexao'
+            with trava:
+                status[codigo] += 1
+                if codigo == 200:
+                    feitas += len(lote)
+
+    amostras = []
+    pids = set()
+
+    def amostrar():
+        workers = amostrar_workers(args.url, args.workers, args.workers * 8)
+        pids.update(workers)
+        if not workers:
+            return
+        rss = [w['rss_mb'] for w in workers.values()]
+        pss = [w['pss_mb'] for w in workers.values() if w['pss_mb'] is not None]
+        amostra = {'analises': feitas, 'workers': len(workers), 'rss_max': max(rss), 'rss_medio': sum(rss) / len(rss),
+                   'pss_medio': sum(pss) / len(pss) if pss else None,
+                   'vocabulario_max': max(w['vocabulario'] for w in workers.values())}
+        amostras.append(amostra)
+        pss_texto = f"{amostra['pss_medio']:8.1f}" if pss else '       -'
+        print(f"{amostra['analises']:>10} {amostra['workers']:>7} {amostra['rss_max']:9.1f} "
+              f"{amostra['rss_medio']:9.1f} {pss_texto} {amostra['vocabulario_max']:>12}", flush=True)
+
+    print(f"{'análises':>10} {'workers':>7} {'RSS máx':>9} {'RSS méd':>9} {'PSS méd':>8} {'vocabulário':>12}")
+    amostrar()
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=cliente, daemon=True) for _ in range(args.concorrencia or args.workers)]
+    for thread in threads:
+        thread.start()
+    passo = max(args.analises // args.amostras, 1)
+    proxima_amostra = passo
+    while any(thread.is_alive() for thread in threads):
+        time.sleep(0.5)
+        if feitas >= proxima_amostra:
+            amostrar()
+            proxima_amostra = (feitas // passo + 1) * passo
+    total = time.perf_counter() - inicio
+    if not amostras or amostras[-1]['analises'] != feitas:
+        amostrar()
+
+    print(f"\n{feitas} análises em {total:.0f}s ({feitas / total:.0f}/s); "
+          f"{len(pids)} workers diferentes responderam (os extras são reciclagens)")
+    print("Lotes: " + ", ".join(f"{codigo}={n}" for codigo, n in sorted(status.items(), key=str)))
+    if len(amostras) >= 3:
+        # A primeira amostra é de antes da carga; a referência é a segunda, com caches já em uso
+        referencia, final = amostras[1], amostras[-1]
+        print(f"RSS máximo por worker: {referencia['rss_max']:.1f} MiB -> {final['rss_max']:.1f} MiB "
+              f"({final['rss_max'] - referencia['rss_max']:+.1f} MiB); "
+              f"pico da rodada {max(a['rss_max'] for a in amostras):.1f} MiB")
+    return 0 if set(status) <= {200} else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
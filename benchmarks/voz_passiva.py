@@ -0,0 +1,64 @@
+"""Micro-benchmark do detector de voz passiva: 12 padrões separados x expressão única pré-compilada.
+
+Uso:
+    python benchmarks/voz_passiva.py [--repeticoes 20]
+
+Não depende do modelo spaCy: mede apenas a varredura por expressões regulares.
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer import _RE_VOZ_PASSIVA  # noqa: E402
+
+# Implementação anterior, mantida aqui só como referência de comparação
+PADROES_ANTIGOS = [
+    r'\bfoi\s+\w+ado\b', r'\bfoi\s+\w+ido\b',
+    r'\bforam\s+\w+ados\b', r'\bforam\s+\w+idos\b',
+    r'\bé\s+\w+ado\b', r'\bé\s+\w+ido\b',
+    r'\bsão\s+\w+ados\b', r'\bsão\s+\w+idos\b',
+    r'\bsera\s+\w+ado\b', r'\bsera\s+\w+ido\b',
+    r'\bserão\s+\w+ados\b', r'\bserão\s+\w+idos\b'
+]
+
+PARAGRAFO = (
+    "A Empresa XYZ anuncia hoje o lançamento de seu novo produto, que foi desenvolvido "
+    "pela equipe de pesquisa ao longo de dois anos. As primeiras unidades foram vendidas "
+    "em São Paulo e o sistema está sendo avaliado por clientes de todo o país. O CEO afirma "
+    "que a solução será entregue em maio e que os resultados serão divulgados no segundo "
+    "semestre, quando o relatório for publicado.\n"
+)
+
+
+def detector_antigo(texto):
+    encontrados = []
+    for padrao in PADROES_ANTIGOS:
+        for match in re.finditer(padrao, texto, re.IGNORECASE):
+            encontrados.append(match.group(0))
+    return encontrados
+
+
+def detector_novo(texto):
+    return [(m.start(), m.end(), m.group(0)) for m in _RE_VOZ_PASSIVA.finditer(texto)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(f"{'palavras':>10} {'antigo (ms)':>12} {'novo (ms)':>10} {'ganho':>7} {'ocorrências':>12}")
+    for paragrafos in (1, 10, 100, 1000):
+        texto = PARAGRAFO * paragrafos
+        antigo = min(timeit.repeat(lambda: detector_antigo(texto), number=1, repeat=args.repeticoes))
+        novo = min(timeit.repeat(lambda: detector_novo(texto), number=1, repeat=args.repeticoes))
+        print(f"{len(texto.split()):>10} {antigo * 1000:>12.3f} {novo * 1000:>10.3f} "
+              f"{antigo / novo:>6.1f}x {len(detector_novo(texto)):>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""Linha de comando da Bússola de Releases: pontua releases em massa, sem navegador.
+
+Exemplos:
+    python bussola.py releases/ --editoria Tecnologia -o relatorios.jsonl
+    python bussola.py arquivo.jsonl -o relatorios.jsonl --workers 4 --retomar
+    cat arquivo.jsonl | python bussola.py - > relatorios.jsonl
+    python bussola.py acervo/ --modo rapido -o triagem.jsonl
+
+Entradas JSONL têm um objeto por linha no formato {"id", "texto", "editoria"}.
+A saída é JSONL com um relatório por linha; o próprio arquivo de saída serve de
+checkpoint, e --retomar pula os ids que já estão nele.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from itertools import tee
+
+import analyzer
+
+EXTENSOES_TEXTO = ('.txt', '.md')
+
+
+def ler_diretorio(caminho, editoria=None):
+    """Gera registros a partir dos arquivos .txt/.md de um diretório (id = caminho relativo)."""
+    for raiz, dirs, arquivos in os.walk(caminho):
+        dirs.sort()
+        for nome in sorted(arquivos):
+            if not nome.lower().endswith(EXTENSOES_TEXTO):
+                continue
+            completo = os.path.join(raiz, nome)
+            with open(completo, encoding='utf-8') as f:
+                texto = f.read()
+            yield {'id': os.path.relpath(completo, caminho), 'texto': texto, 'editoria': editoria}
+
+
+def ler_jsonl(arquivo, editoria=None):
+    """Gera registros de um fluxo JSONL, ignorando linhas vazias ou inválidas."""
+    for numero, linha in enumerate(arquivo, 1):
+        linha = linha.strip()
+        if not linha:
+            continue
+        try:
+            registro = json.loads(linha)
+        except json.JSONDecodeError as erro:
+            print(f"Linha {numero} ignorada: JSON inválido ({erro}).", file=sys.stderr)
+            continue
+        if not isinstance(registro, dict) or not registro.get('texto'):
+            print(f"Linha {numero} ignorada: campo 'texto' ausente.", file=sys.stderr)
+            continue
+        registro.setdefault('id', str(numero))
+        registro.setdefault('editoria', editoria)
+        yield registro
+
+
+def ids_processados(caminho):
+    """Lê os ids já gravados em um arquivo de saída anterior (checkpoint)."""
+    ids = set()
+    if not os.path.exists(caminho):
+        return ids
+    with open(caminho, encoding='utf-8') as f:
+        for linha in f:
+            try:
+                ids.add(str(json.loads(linha)['id']))
+            except (json.JSONDecodeError, KeyError, TypeError):
+                # Última linha truncada por uma interrupção: será reprocessada
+                continue
+    return ids
+
+
+def analisar_registros(release_analyzer, registros, batch_size=64, n_process=1, pacote=None,
+                       modo=analyzer.MODO_COMPLETO, piso=None):
+    """Analisa registros em lote e gera (registro, relatório) na ordem de entrada."""
+    # tee só guarda os registros entre o que o nlp.pipe já leu e o que já saiu
+    para_textos, para_editorias, para_saida = tee(registros, 3)
+    textos = (registro['texto'] for registro in para_textos)
+    editorias = (registro.get('editoria') or None for registro in para_editorias)
+    relatorios = release_analyzer.analisar_lote(textos, editorias, batch_size=batch_size, n_process=n_process,
+                                                pacote=pacote, modo=modo, piso=piso)
+    yield from zip(para_saida, relatorios)
+
+
+def _abrir_entrada(entrada, editoria):
+    if entrada == '-':
+        return ler_jsonl(sys.stdin, editoria)
+    if os.path.isdir(entrada):
+        return ler_diretorio(entrada, editoria)
+
+    def _arquivo():
+        with open(entrada, encoding='utf-8') as f:
+            yield from ler_jsonl(f, editoria)
+    return _arquivo()
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        prog='bussola',
+        description='Pontua releases em massa e grava os relatórios em JSONL.')
+    parser.add_argument('entrada', help="Diretório com arquivos .txt/.md, arquivo JSONL ou '-' para stdin.")
+    parser.add_argument('-o', '--saida', help='Arquivo JSONL de saída (padrão: stdout).')
+    parser.add_argument('--editoria', help='Editoria padrão para registros sem editoria.')
+    parser.add_argument('--pacote', help='Pacote de regras do cliente, em regras/ (padrão: padrao).')
+    parser.add_argument('--perfil', default=analyzer.PERFIL_PADRAO, choices=sorted(analyzer.PERFIS_PIPELINE),
+                        help='Perfil de pipeline do spaCy (padrão: %(default)s).')
+    parser.add_argument('--modo', default=analyzer.MODO_COMPLETO, choices=sorted(analyzer.MODOS),
+                        help="'rapido' roda só as verificações sem spaCy, para triagem (padrão: %(default)s).")
+    parser.add_argument('--piso', type=float,
+                        help='Para a análise de um release assim que a pontuação chega a este valor.')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processos de análise em paralelo (-1 = todos os núcleos).')
+    parser.add_argument('--batch-size', type=int, default=64, help='Textos por lote do nlp.pipe.')
+    parser.add_argument('--retomar', action='store_true',
+                        help='Pula ids já presentes no arquivo de saída e acrescenta os novos.')
+    parser.add_argument('--checkpoint-cada', type=int, default=100,
+                        help='Força a gravação em disco a cada N relatórios.')
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.retomar and not args.saida:
+        print("--retomar exige --saida.", file=sys.stderr)
+        return 2
+
+    registros = _abrir_entrada(args.entrada, args.editoria)
+    ja_feitos = ids_processados(args.saida) if args.retomar else set()
+    pulados = 0
+    if ja_feitos:
+        def _filtrar(registros):
+            nonlocal pulados
+            for registro in registros:
+                if str(registro['id']) in ja_feitos:
+                    pulados += 1
+                    continue
+                yield registro
+        registros = _filtrar(registros)
+
+    saida = open(args.saida, 'a' if args.retomar else 'w', encoding='utf-8') if args.saida else sys.stdout
+    if args.retomar and saida.tell() > 0:
+        # Garante que um relatório novo não fique colado a uma linha truncada
+        with open(args.saida, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                saida.write('\n')
+    release_analyzer = analyzer.obter_analisador(args.perfil)
+
+    inicio = time.perf_counter()
+    total = 0
+    soma_pontuacao = 0
+    try:
+        for registro, relatorio in analisar_registros(release_analyzer, registros, args.batch_size, args.workers,
+                                                         args.pacote, args.modo, args.piso):
+            linha = {'id': registro['id'], 'editoria': registro.get('editoria')}
+            linha.update(relatorio)
+            saida.write(json.dumps(linha, ensure_ascii=False) + '\n')
+            total += 1
+            soma_pontuacao += relatorio['pontuacao']
+            if args.saida and total % args.checkpoint_cada == 0:
+                saida.flush()
+                os.fsync(saida.fileno())
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+        else:
+            saida.flush()
+
+    duracao = time.perf_counter() - inicio
+    taxa = total / duracao if duracao > 0 else 0.0
+    media = soma_pontuacao / total if total else 0.0
+    print(f"{total} releases analisados em {duracao:.1f}s ({taxa:.1f} releases/s); "
+          f"{pulados} já processados foram pulados; pontuação média {media:.1f}.", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""Cache de relatórios endereçado por conteúdo, na frente de ReleaseAnalyzer.analisar_release.
+
+A chave é o hash de (texto normalizado, editoria, versão das regras, versão do
+modelo). Há uma camada em memória (LRU com limite de itens e TTL, que guarda os
+relatórios como relatorios.RelatorioCompacto) e uma camada opcional em SQLite,
+compartilhável entre processos de worker.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+
+from relatorios import RelatorioCompacto
+
+
+# Quebras de linha (\r\n ou \r, que viram \n) e os trechos entre elas
+_RE_TRECHO_LINHA = re.compile(r'\r\n?|[^\r]+')
+
+
+def normalizar_texto(texto):
+    """Normaliza o texto antes do hash (e da análise): NFC, quebras de linha Unix e sem bordas em branco."""
+    texto = unicodedata.normalize('NFC', texto)
+    return texto.replace('\r\n', '\n').replace('\r', '\n').strip()
+
+
+def normalizar_com_posicoes(texto):
+    """normalizar_texto(texto) e, para cada posição do texto normalizado, a posição correspondente em `texto`.
+    
+    Retorna (normalizado, origem), em que origem[i] é onde começa no original o
+    caractere i do normalizado e origem[len(normalizado)] é o fim do conteúdo.
+    Se o texto já está normalizado, origem é None.
+    """
+    normalizado = normalizar_texto(texto)
+    if normalizado == texto:
+        return normalizado, None
+    partes = []
+    origem = array('q')
+    for m in _RE_TRECHO_LINHA.finditer(texto):
+        trecho, inicio = m.group(0), m.start()
+        if trecho[0] == '\r':
+            partes.append('\n')
+            origem.append(inicio)
+        elif unicodedata.is_normalized('NFC', trecho):
+            partes.append(trecho)
+            origem.extend(range(inicio, m.end()))
+        else:
+            _compor_com_posicoes(trecho, inicio, partes, origem)
+    origem.append(len(texto))
+    completo = ''.join(partes)
+    # As bordas em branco saem como em normalizar_texto
+    esquerda = len(completo) - len(completo.lstrip())
+    direita = len(completo.rstrip())
+    return normalizado, origem[esquerda:direita] + origem[direita:direita + 1]
+
+
+def _compor_com_posicoes(trecho, inicio, partes, origem):
+    # NFC por grupo: cada caractere base com as marcas combinantes seguintes, juntando
+    # grupos vizinhos que se compõem entre si (jamos do hangul, por exemplo)
+    grupos = []
+    for i, caractere in enumerate(trecho):
+        if grupos and unicodedata.combining(caractere):
+            grupos[-1][1] = i + 1
+            continue
+        if grupos:
+            de, ate = grupos[-1]
+            if (unicodedata.normalize('NFC', trecho[de:i + 1])
+                    != unicodedata.normalize('NFC', trecho[de:ate]) + unicodedata.normalize('NFC', caractere)):
+                grupos[-1][1] = i + 1
+                continue
+        grupos.append([i, i + 1])
+    compostos = [unicodedata.normalize('NFC', trecho[de:ate]) for de, ate in grupos]
+    composto = unicodedata.normalize('NFC', trecho)
+    if ''.join(compostos) != composto:
+        # Composição que o agrupamento não previu: o trecho inteiro aponta para o seu início
+        partes.append(composto)
+        origem.extend([inicio] * len(composto))
+        return
+    for (de, ate), grupo in zip(grupos, compostos):
+        partes.append(grupo)
+        origem.extend(inicio + min(de + j, ate - 1) for j in range(len(grupo)))
+
+
+def gerar_chave(texto_normalizado, editoria, versao_regras, versao_modelo):
+    """Gera a chave do cache a partir do conteúdo e das versões que influenciam o resultado."""
+    h = hashlib.sha256()
+    for parte in (texto_normalizado, (editoria or '').lower(), versao_regras, versao_modelo):
+        h.update(parte.encode('utf-8'))
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+class CacheResultados:
+    """Cache LRU em memória com TTL e, opcionalmente, uma segunda camada em SQLite."""
+
+    def __init__(self, max_itens=1024, ttl=3600, caminho_sqlite=None, max_itens_disco=100000):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self.max_itens_disco = max_itens_disco
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+        self._gravacoes_disco = 0
+        self._conexao = None
+        if caminho_sqlite:
+            self._abrir_sqlite(caminho_sqlite)
+
+    def _abrir_sqlite(self, caminho):
+        # Uma conexão por instância, protegida pela trava; WAL permite leitores
+        # concorrentes de outros processos enquanto um deles grava.
+        self._conexao = sqlite3.connect(caminho, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conexao.execute('PRAGMA journal_mode=WAL')
+        self._conexao.execute('PRAGMA synchronous=NORMAL')
+        self._conexao.execute(
+            'CREATE TABLE IF NOT EXISTS resultados ('
+            ' chave TEXT PRIMARY KEY, relatorio TEXT NOT NULL, criado_em REAL NOT NULL)')
+        self._conexao.execute('CREATE INDEX IF NOT EXISTS idx_resultados_criado_em ON resultados (criado_em)')
+
+    def obter(self, chave):
+        """Retorna um relatório novo, igual ao guardado, ou None se não houver (ou tiver expirado)."""
+        agora = time.time()
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is not None:
+                expira_em, relatorio = item
+                if expira_em >= agora:
+                    self._itens.move_to_end(chave)
+                    self.acertos_memoria += 1
+                    return relatorio.como_dict()
+                del self._itens[chave]
+
+            if self._conexao is not None:
+                linha = self._conexao.execute(
+                    'SELECT relatorio, criado_em FROM resultados WHERE chave = ?', (chave,)).fetchone()
+                if linha is not None and (self.ttl is None or linha[1] + self.ttl >= agora):
+                    relatorio = json.loads(linha[0])
+                    self._guardar_memoria(chave, RelatorioCompacto.de_dict(relatorio), linha[1])
+                    self.acertos_disco += 1
+                    return relatorio
+
+            self.falhas += 1
+            return None
+
+    def guardar(self, chave, relatorio):
+        """Guarda um relatório nas duas camadas."""
+        agora = time.time()
+        # A versão compacta já é uma cópia: quem guardou pode alterar o dicionário depois
+        compacto = RelatorioCompacto.de_dict(relatorio)
+        with self._trava:
+            self._guardar_memoria(chave, compacto, agora)
+            if self._conexao is not None:
+                self._conexao.execute(
+                    'INSERT OR REPLACE INTO resultados (chave, relatorio, criado_em) VALUES (?, ?, ?)',
+                    (chave, json.dumps(relatorio, ensure_ascii=False), agora))
+                self._gravacoes_disco += 1
+                if self._gravacoes_disco % 1000 == 0:
+                    self._podar_disco(agora)
+
+    def _guardar_memoria(self, chave, compacto, criado_em):
+        expira_em = criado_em + self.ttl if self.ttl is not None else float('inf')
+        self._itens[chave] = (expira_em, compacto)
+        self._itens.move_to_end(chave)
+        while len(self._itens) > self.max_itens:
+            self._itens.popitem(last=False)
+
+    def _podar_disco(self, agora):
+        """Remove do SQLite itens expirados e os mais antigos além do limite."""
+        if self.ttl is not None:
+            self._conexao.execute('DELETE FROM resultados WHERE criado_em < ?', (agora - self.ttl,))
+        self._conexao.execute(
+            'DELETE FROM resultados WHERE chave IN ('
+            ' SELECT chave FROM resultados ORDER BY criado_em DESC LIMIT -1 OFFSET ?)',
+            (self.max_itens_disco,))
+
+    def limpar(self):
+        """Esvazia as duas camadas."""
+        with self._trava:
+            self._itens.clear()
+            if self._conexao is not None:
+                self._conexao.execute('DELETE FROM resultados')
+
+    def estatisticas(self):
+        """Contadores de acertos e falhas para monitoramento."""
+        with self._trava:
+            consultas = self.acertos_memoria + self.acertos_disco + self.falhas
+            return {
+                'acertos_memoria': self.acertos_memoria,
+                'acertos_disco': self.acertos_disco,
+                'falhas': self.falhas,
+                'taxa_acerto': (self.acertos_memoria + self.acertos_disco) / consultas if consultas else 0.0,
+                'itens_memoria': len(self._itens),
+            }
+
+    def fechar(self):
+        with self._trava:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
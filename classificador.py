@@ -0,0 +1,228 @@
+"""Classificador de editorias treinado em um corpus de releases rotulados.
+
+Cada release vira um saco de lemas (sem acentos, em minúsculas) projetado por
+hashing em um vetor de dimensão fixa, com peso log(1 + tf) x idf. O modelo
+guarda o centroide normalizado de cada editoria; a pontuação de todas as
+editorias sai de um único produto matriz-vetor, e uma softmax com temperatura
+calibrada no treino transforma as similaridades em probabilidades.
+
+O artefato é um .npz compacto (sem pickle). Por padrão o analisador procura
+modelos/editorias.npz (ou o caminho em BUSSOLA_MODELO_EDITORIAS); sem ele, a
+relevância volta a ser medida pelas palavras-chave do pacote de regras.
+
+Uso:
+    python classificador.py treinar corpus.jsonl --saida modelos/editorias.npz
+    python classificador.py avaliar teste.jsonl --modelo modelos/editorias.npz
+
+O corpus é JSONL no formato de bussola.py, com {"texto", "editoria"} por linha.
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import threading
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+CAMINHO_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modelos', 'editorias.npz')
+VARIAVEL_MODELO = 'BUSSOLA_MODELO_EDITORIAS'
+DIMENSAO_PADRAO = 2 ** 15
+TEMPERATURAS = (0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5)
+
+_padrao = None
+_trava_padrao = threading.Lock()
+
+
+@lru_cache(maxsize=200000)
+def _balde(lema, dimensao):
+    return zlib.crc32(lema.encode('utf-8')) % dimensao
+
+
+class ClassificadorEditorias:
+    """Centroides TF-IDF por editoria sobre lemas com hashing."""
+
+    def __init__(self, editorias, idf, centroides, temperatura, versao='1'):
+        self.editorias = [str(e) for e in editorias]
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.centroides = np.asarray(centroides, dtype=np.float32)
+        self.temperatura = float(temperatura)
+        self.versao = str(versao)
+        self.identificador = f"editorias@{self.versao}#{hashlib.sha1(self.centroides.tobytes()).hexdigest()[:12]}"
+
+    @property
+    def dimensao(self):
+        return len(self.idf)
+
+    def _frequencias(self, lemas):
+        """Vetor de log(1 + tf) por balde, a partir de um Counter de lemas."""
+        vetor = np.zeros(self.dimensao, dtype=np.float32)
+        if lemas:
+            baldes = np.fromiter((_balde(lema, self.dimensao) for lema in lemas), dtype=np.int64, count=len(lemas))
+            np.add.at(vetor, baldes, np.fromiter(lemas.values(), dtype=np.float32, count=len(lemas)))
+        return np.log1p(vetor)
+
+    def vetorizar(self, lemas):
+        vetor = self._frequencias(lemas) * self.idf
+        norma = np.linalg.norm(vetor)
+        return vetor / norma if norma > 0 else vetor
+
+    def probabilidades(self, lemas):
+        """Probabilidade de cada editoria, em ordem decrescente: [(editoria, p), ...]."""
+        similaridades = self.centroides @ self.vetorizar(lemas)
+        return self._ranking(similaridades)
+
+    def _ranking(self, similaridades):
+        escalado = similaridades / self.temperatura
+        p = np.exp(escalado - escalado.max())
+        p /= p.sum()
+        ordem = np.argsort(-p, kind='stable')
+        return [(self.editorias[i], float(p[i])) for i in ordem]
+
+    @classmethod
+    def treinar(cls, amostras, dimensao=DIMENSAO_PADRAO, versao='1'):
+        """Treina a partir de pares (Counter de lemas, editoria)."""
+        amostras = [(lemas, editoria.lower()) for lemas, editoria in amostras]
+        editorias = sorted({editoria for _, editoria in amostras})
+        if len(editorias) < 2:
+            raise ValueError("O corpus precisa de releases de pelo menos duas editorias.")
+        modelo = cls(editorias, np.ones(dimensao), np.zeros((len(editorias), dimensao)), 1.0, versao)
+
+        frequencias = np.stack([modelo._frequencias(lemas) for lemas, _ in amostras])
+        documentos = np.count_nonzero(frequencias, axis=0)
+        idf = np.log((1 + len(amostras)) / (1 + documentos)) + 1
+        vetores = frequencias * idf
+        vetores /= np.maximum(np.linalg.norm(vetores, axis=1, keepdims=True), 1e-12)
+
+        rotulos = np.array([editorias.index(editoria) for _, editoria in amostras])
+        centroides = np.stack([vetores[rotulos == k].mean(axis=0) for k in range(len(editorias))])
+        centroides /= np.maximum(np.linalg.norm(centroides, axis=1, keepdims=True), 1e-12)
+
+        # Temperatura que minimiza a perda logarítmica no próprio corpus
+        similaridades = vetores @ centroides.T
+        melhor = None
+        for temperatura in TEMPERATURAS:
+            escalado = similaridades / temperatura
+            escalado -= escalado.max(axis=1, keepdims=True)
+            log_p = escalado - np.log(np.exp(escalado).sum(axis=1, keepdims=True))
+            perda = -log_p[np.arange(len(rotulos)), rotulos].mean()
+            if melhor is None or perda < melhor[0]:
+                melhor = (perda, temperatura)
+        return cls(editorias, idf, centroides, melhor[1], versao)
+
+    def salvar(self, caminho):
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        with open(caminho, 'wb') as f:
+            np.savez_compressed(f, editorias=np.array(self.editorias), idf=self.idf, centroides=self.centroides,
+                                temperatura=np.float32(self.temperatura), versao=np.array(self.versao))
+        return caminho
+
+    @classmethod
+    def carregar(cls, caminho):
+        with np.load(caminho, allow_pickle=False) as dados:
+            return cls(dados['editorias'], dados['idf'], dados['centroides'], dados['temperatura'],
+                       dados['versao'].item())
+
+
+def obter_padrao():
+    """Classificador do artefato padrão, carregado uma vez por processo; None se não existir."""
+    global _padrao
+    if _padrao is None:
+        with _trava_padrao:
+            if _padrao is None:
+                caminho = os.environ.get(VARIAVEL_MODELO, CAMINHO_PADRAO)
+                _padrao = ClassificadorEditorias.carregar(caminho) if os.path.exists(caminho) else False
+    return _padrao or None
+
+
+def extrair_lemas(release_analyzer, textos, batch_size=64):
+    """Sacos de lemas de cada texto, pelo mesmo caminho (nlp.pipe + AgregadosDoc) da análise."""
+    from analyzer import AgregadosDoc
+    regras = release_analyzer.regras.obter()
+    for doc in release_analyzer.nlp.pipe(textos, batch_size=batch_size):
+        yield AgregadosDoc.de_doc(doc, regras).lemas
+
+
+def _ler_corpus(caminho):
+    from bussola import ler_jsonl
+    with open(caminho, encoding='utf-8') as f:
+        return [r for r in ler_jsonl(f) if r.get('editoria')]
+
+
+def avaliar(modelo, lemas, editorias):
+    """Acurácia, F1 macro e matriz de confusão (linhas: editoria real)."""
+    classes = modelo.editorias
+    confusao = np.zeros((len(classes), len(classes)), dtype=np.int64)
+    for saco, real in zip(lemas, editorias):
+        previsto = modelo.probabilidades(saco)[0][0]
+        if real.lower() in classes:
+            confusao[classes.index(real.lower()), classes.index(previsto)] += 1
+    acertos = np.trace(confusao)
+    total = confusao.sum()
+    f1 = []
+    for k in range(len(classes)):
+        verdadeiros = confusao[k, k]
+        precisao = verdadeiros / confusao[:, k].sum() if confusao[:, k].sum() else 0.0
+        revocacao = verdadeiros / confusao[k].sum() if confusao[k].sum() else 0.0
+        f1.append(2 * precisao * revocacao / (precisao + revocacao) if precisao + revocacao else 0.0)
+    return {'acuracia': acertos / total if total else 0.0, 'f1_macro': float(np.mean(f1)),
+            'classes': classes, 'confusao': confusao.tolist(), 'n': int(total)}
+
+
+def _imprimir_avaliacao(resultado):
+    print(f"{resultado['n']} releases | acurácia {resultado['acuracia']:.3f} | F1 macro {resultado['f1_macro']:.3f}")
+    largura = max(len(c) for c in resultado['classes'])
+    print(' ' * (largura + 2) + ' '.join(f"{c[:6]:>6}" for c in resultado['classes']))
+    for classe, linha in zip(resultado['classes'], resultado['confusao']):
+        print(f"{classe:>{largura}}  " + ' '.join(f"{n:>6}" for n in linha))
+
+
+def main(argv=None):
+    import analyzer
+
+    parser = argparse.ArgumentParser(description='Treina e avalia o classificador de editorias.')
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    treino = subcomandos.add_parser('treinar', help='Treina a partir de um corpus JSONL rotulado.')
+    treino.add_argument('corpus')
+    treino.add_argument('--saida', default=CAMINHO_PADRAO)
+    treino.add_argument('--dimensao', type=int, default=DIMENSAO_PADRAO)
+    treino.add_argument('--versao', default='1')
+    treino.add_argument('--teste', type=float, default=0.2,
+                        help='Fração separada para avaliação antes do treino final (0 desativa).')
+    treino.add_argument('--semente', type=int, default=42)
+    avaliacao = subcomandos.add_parser('avaliar', help='Avalia um modelo em um corpus JSONL rotulado.')
+    avaliacao.add_argument('corpus')
+    avaliacao.add_argument('--modelo', default=CAMINHO_PADRAO)
+    for sub in (treino, avaliacao):
+        sub.add_argument('--perfil', default=analyzer.PERFIL_PADRAO, choices=sorted(analyzer.PERFIS_PIPELINE))
+    args = parser.parse_args(argv)
+
+    registros = _ler_corpus(args.corpus)
+    release_analyzer = analyzer.obter_analisador(args.perfil)
+    lemas = list(extrair_lemas(release_analyzer, (r['texto'] for r in registros)))
+    editorias = [r['editoria'] for r in registros]
+
+    if args.comando == 'avaliar':
+        _imprimir_avaliacao(avaliar(ClassificadorEditorias.carregar(args.modelo), lemas, editorias))
+        return 0
+
+    if args.teste > 0:
+        indices = list(range(len(registros)))
+        random.Random(args.semente).shuffle(indices)
+        corte = int(len(indices) * args.teste)
+        teste, treino_idx = indices[:corte], indices[corte:]
+        parcial = ClassificadorEditorias.treinar(((lemas[i], editorias[i]) for i in treino_idx), args.dimensao,
+                                                 args.versao)
+        print("Avaliação com os releases separados para teste:")
+        _imprimir_avaliacao(avaliar(parcial, [lemas[i] for i in teste], [editorias[i] for i in teste]))
+    modelo = ClassificadorEditorias.treinar(zip(lemas, editorias), args.dimensao, args.versao)
+    modelo.salvar(args.saida)
+    print(f"Modelo {modelo.identificador} ({len(modelo.editorias)} editorias, temperatura {modelo.temperatura}) "
+          f"gravado em {args.saida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
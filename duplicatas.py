@@ -0,0 +1,323 @@
+"""Índice de releases quase duplicados (MinHash + LSH), na frente da análise completa.
+
+Cada release vira o conjunto de seus shingles (sequências de 3 palavras, sem
+acentos nem pontuação) e é resumido por uma assinatura MinHash de 128 valores.
+As assinaturas são divididas em 16 faixas; releases com alguma faixa idêntica
+são candidatos, e a similaridade de Jaccard estimada pelas assinaturas decide se
+são quase duplicados. A consulta custa um hash por palavra e algumas buscas em
+dicionário, sem passar pelo spaCy.
+
+O índice guarda no máximo `max_itens` releases em um anel de tamanho fixo (o mais
+antigo sai quando entra um novo) e, com `caminho_sqlite`, persiste assinaturas e
+relatórios em disco, recarregados ao abrir. Cada processo carrega o índice na
+partida; inclusões feitas por outros processos aparecem na próxima abertura.
+Ao abrir, as linhas além das `max_itens` mais recentes são apagadas, para o
+arquivo não crescer sem limite.
+
+Para indexar o acervo de uma vez:
+    python duplicatas.py construir acervo.jsonl --indice duplicatas.db --editoria Economia
+"""
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from itertools import islice, tee
+
+import numpy as np
+
+from lexico import normalizar_trecho
+from relatorios import RelatorioCompacto
+
+PERMUTACOES = 128
+BANDAS = 16
+TAMANHO_SHINGLE = 3
+LIMIAR_PADRAO = 0.8
+SEMENTE = 20240501
+
+# Primo logo acima de 2**32: os hashes das palavras e dos shingles têm 32 bits
+_PRIMO = np.uint64(4294967311)
+_MASCARA_32 = np.uint64(0xFFFFFFFF)
+_RE_PALAVRA = re.compile(r'\w+')
+
+
+def hashes_shingles(texto, tamanho=TAMANHO_SHINGLE):
+    """Hash de 32 bits de cada sequência de `tamanho` palavras normalizadas do texto."""
+    palavras = _RE_PALAVRA.findall(normalizar_trecho(texto))
+    if not palavras:
+        return np.zeros(0, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(p.encode('utf-8')) for p in palavras), dtype=np.uint64, count=len(palavras))
+    tamanho = min(tamanho, len(hashes))
+    # Combinação polinomial das palavras de cada janela (módulo 2**64, truncada em 32 bits)
+    combinados = np.zeros(len(hashes) - tamanho + 1, dtype=np.uint64)
+    for j in range(tamanho):
+        combinados = combinados * np.uint64(1000003) + hashes[j:len(hashes) - tamanho + 1 + j]
+    return np.unique(combinados & _MASCARA_32)
+
+
+class IndiceDuplicatas:
+    """Assinaturas MinHash em LSH, com anel de tamanho fixo e persistência opcional em SQLite."""
+
+    def __init__(self, limiar=LIMIAR_PADRAO, max_itens=50000, caminho_sqlite=None, permutacoes=PERMUTACOES,
+                 bandas=BANDAS, tamanho_shingle=TAMANHO_SHINGLE):
+        if permutacoes % bandas:
+            raise ValueError("O número de permutações deve ser múltiplo do número de bandas.")
+        self.limiar = limiar
+        self.max_itens = max_itens
+        self.bandas = bandas
+        self.linhas = permutacoes // bandas
+        self.tamanho_shingle = tamanho_shingle
+        # Assinaturas gravadas com outros parâmetros não são comparáveis e ficam de fora
+        self.parametros = f"minhash/{permutacoes}/{tamanho_shingle}/{SEMENTE}"
+        aleatorio = np.random.default_rng(SEMENTE)
+        self._a = aleatorio.integers(1, 2 ** 32, size=(permutacoes, 1), dtype=np.uint64)
+        self._b = aleatorio.integers(0, 2 ** 32, size=(permutacoes, 1), dtype=np.uint64)
+
+        # Anel de entradas: assinatura, contexto, id e (sem SQLite) relatório compacto de cada posição
+        self._assinaturas = np.zeros((max_itens, permutacoes), dtype=np.uint32)
+        self._contextos = [None] * max_itens
+        self._ids = [None] * max_itens
+        self._relatorios = [None] * max_itens
+        self._proxima = 0
+        self._total = 0
+        self._ultimo_id = 0
+        # (faixa, bytes da faixa) -> posições do anel
+        self._faixas = {}
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self._conexao = None
+        if caminho_sqlite:
+            self._abrir_sqlite(caminho_sqlite)
+
+    def _abrir_sqlite(self, caminho):
+        self._conexao = sqlite3.connect(caminho, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conexao.execute('PRAGMA journal_mode=WAL')
+        self._conexao.execute('PRAGMA synchronous=NORMAL')
+        self._conexao.execute(
+            'CREATE TABLE IF NOT EXISTS duplicatas ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT, parametros TEXT NOT NULL, contexto TEXT NOT NULL,'
+            ' assinatura BLOB NOT NULL, relatorio TEXT NOT NULL, criado_em REAL NOT NULL)')
+        # O que ficou fora do anel nunca mais seria consultado
+        self._conexao.execute(
+            'DELETE FROM duplicatas WHERE parametros = ? AND id NOT IN'
+            ' (SELECT id FROM duplicatas WHERE parametros = ? ORDER BY id DESC LIMIT ?)',
+            (self.parametros, self.parametros, self.max_itens))
+        linhas = self._conexao.execute(
+            'SELECT id, contexto, assinatura FROM duplicatas WHERE parametros = ? ORDER BY id DESC LIMIT ?',
+            (self.parametros, self.max_itens)).fetchall()
+        for id_, contexto, assinatura in reversed(linhas):
+            self._inserir(np.frombuffer(assinatura, dtype=np.uint32), contexto, id_, None)
+
+    def assinatura(self, texto):
+        """Assinatura MinHash do texto (None se ele não tiver palavras)."""
+        shingles = hashes_shingles(texto, self.tamanho_shingle)
+        if not len(shingles):
+            return None
+        # Uma permutação por linha, todos os shingles de uma vez: (a*h + b) mod p, mínimo por linha
+        return ((self._a * shingles + self._b) % _PRIMO).min(axis=1).astype(np.uint32)
+
+    def _chaves_faixas(self, assinatura):
+        bruto = assinatura.tobytes()
+        passo = self.linhas * 4
+        return [(faixa, bruto[faixa * passo:(faixa + 1) * passo]) for faixa in range(self.bandas)]
+
+    def _inserir(self, assinatura, contexto, id_, relatorio):
+        posicao = self._proxima
+        if self._ids[posicao] is not None:
+            self._remover(posicao)
+        self._assinaturas[posicao] = assinatura
+        self._contextos[posicao] = contexto
+        self._ids[posicao] = id_
+        self._relatorios[posicao] = relatorio
+        for chave in self._chaves_faixas(assinatura):
+            self._faixas.setdefault(chave, []).append(posicao)
+        self._proxima = (posicao + 1) % self.max_itens
+        self._total = min(self._total + 1, self.max_itens)
+        self._ultimo_id = max(self._ultimo_id, id_)
+
+    def _remover(self, posicao):
+        """Tira do índice a entrada mais antiga, que vai ceder a posição."""
+        for chave in self._chaves_faixas(self._assinaturas[posicao]):
+            posicoes = self._faixas.get(chave)
+            if posicoes is not None:
+                posicoes.remove(posicao)
+                if not posicoes:
+                    del self._faixas[chave]
+        if self._conexao is not None:
+            self._conexao.execute('DELETE FROM duplicatas WHERE id = ?', (self._ids[posicao],))
+        self._ids[posicao] = self._contextos[posicao] = self._relatorios[posicao] = None
+
+    def consultar(self, texto, contexto):
+        """Retorna (relatório anterior, similaridade, id) do release mais parecido, ou None.
+
+        Só valem releases analisados no mesmo `contexto` (editoria, regras e modelo).
+        """
+        assinatura = self.assinatura(texto)
+        if assinatura is None:
+            return None
+        with self._trava:
+            candidatos = set()
+            for chave in self._chaves_faixas(assinatura):
+                candidatos.update(self._faixas.get(chave, ()))
+            melhor = None
+            for posicao in candidatos:
+                if self._contextos[posicao] != contexto:
+                    continue
+                similaridade = float(np.count_nonzero(self._assinaturas[posicao] == assinatura)) / len(assinatura)
+                if similaridade >= self.limiar and (melhor is None or similaridade > melhor[1]):
+                    melhor = (posicao, similaridade)
+            if melhor is None:
+                self.falhas += 1
+                return None
+            posicao, similaridade = melhor
+            relatorio = self._relatorios[posicao]
+            if relatorio is None:
+                linha = self._conexao.execute('SELECT relatorio FROM duplicatas WHERE id = ?',
+                                              (self._ids[posicao],)).fetchone()
+                if linha is None:
+                    self.falhas += 1
+                    return None
+                relatorio = RelatorioCompacto(linha[0])
+            self.acertos += 1
+            return relatorio.como_dict(), similaridade, self._ids[posicao]
+
+    def adicionar(self, texto, contexto, relatorio):
+        """Indexa um release analisado; retorna o id da entrada (None se o texto não tiver palavras)."""
+        ids = self.adicionar_lote([(texto, contexto, relatorio)])
+        return ids[0] if ids else None
+
+    def adicionar_lote(self, itens):
+        """Indexa vários (texto, contexto, relatório) numa única transação; retorna os ids.
+
+        Os itens são preparados todos antes da gravação: acervos grandes vão em grupos (ver indexar_acervo).
+        """
+        preparados = []
+        for texto, contexto, relatorio in itens:
+            assinatura = self.assinatura(texto)
+            if assinatura is not None:
+                # Sem SQLite, o relatório fica no anel em forma compacta; com ele, só no disco
+                guardado = (RelatorioCompacto.de_dict(relatorio) if self._conexao is None
+                            else json.dumps(relatorio, ensure_ascii=False))
+                preparados.append((assinatura, contexto, guardado))
+        ids = []
+        with self._trava:
+            if self._conexao is None:
+                for assinatura, contexto, relatorio in preparados:
+                    self._inserir(assinatura, contexto, self._ultimo_id + 1, relatorio)
+                    ids.append(self._ultimo_id)
+                return ids
+            with self._conexao:
+                self._conexao.execute('BEGIN')
+                for assinatura, contexto, relatorio in preparados:
+                    id_ = self._conexao.execute(
+                        'INSERT INTO duplicatas (parametros, contexto, assinatura, relatorio, criado_em)'
+                        ' VALUES (?, ?, ?, ?, ?)',
+                        (self.parametros, contexto, assinatura.tobytes(), relatorio, time.time())).lastrowid
+                    self._inserir(assinatura, contexto, id_, None)
+                    ids.append(id_)
+        return ids
+
+    def __len__(self):
+        return self._total
+
+    def limpar(self):
+        with self._trava:
+            self._faixas.clear()
+            self._contextos = [None] * self.max_itens
+            self._ids = [None] * self.max_itens
+            self._relatorios = [None] * self.max_itens
+            self._proxima = 0
+            self._total = 0
+            self._ultimo_id = 0
+            if self._conexao is not None:
+                self._conexao.execute('DELETE FROM duplicatas')
+
+    def estatisticas(self):
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {'itens': self._total, 'acertos': self.acertos, 'falhas': self.falhas,
+                    'taxa_acerto': self.acertos / consultas if consultas else 0.0}
+
+    def fechar(self):
+        with self._trava:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+
+def indexar_acervo(release_analyzer, indice, registros, pacote=None, batch_size=64, n_process=1):
+    """Analisa registros {"texto", "editoria"} em lote e indexa todos, retornando quantos entraram.
+
+    Os registros são consumidos sob demanda e gravados a cada `batch_size`, numa
+    transação por grupo: a memória não depende do tamanho do acervo.
+    """
+    from cache import normalizar_texto
+    from regras import PACOTE_PADRAO
+
+    regras = release_analyzer.regras.obter(pacote or PACOTE_PADRAO)
+    registros = (dict(r, texto=normalizar_texto(r['texto'])) for r in registros)
+    # Cópias do mesmo fluxo: tee só guarda o que o pipe do spaCy já leu e ainda não foi indexado
+    para_textos, para_editorias, para_indice = tee(registros, 3)
+    relatorios = release_analyzer.analisar_lote((r['texto'] for r in para_textos),
+                                                (r.get('editoria') or None for r in para_editorias),
+                                                batch_size=batch_size, n_process=n_process, pacote=pacote)
+    itens = ((r['texto'], release_analyzer._contexto_relatorio(r.get('editoria'), regras),
+              {k: v for k, v in relatorio.items() if k != 'metricas'})
+             for r, relatorio in zip(para_indice, relatorios))
+    total = 0
+    while True:
+        grupo = list(islice(itens, batch_size))
+        if not grupo:
+            return total
+        total += len(indice.adicionar_lote(grupo))
+
+
+def main(argv=None):
+    import analyzer
+    from bussola import _abrir_entrada
+
+    parser = argparse.ArgumentParser(description='Índice de releases quase duplicados.')
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    construir = subcomandos.add_parser('construir', help='Analisa e indexa um acervo (diretório ou JSONL).')
+    construir.add_argument('entrada', help="Diretório com arquivos .txt/.md, arquivo JSONL ou '-' para stdin.")
+    construir.add_argument('--batch-size', type=int, default=64)
+    consultar = subcomandos.add_parser('consultar', help='Procura no índice um release parecido com o arquivo.')
+    consultar.add_argument('arquivo')
+    for sub in (construir, consultar):
+        sub.add_argument('--indice', required=True, help='Arquivo SQLite do índice.')
+        sub.add_argument('--editoria')
+        sub.add_argument('--pacote')
+        sub.add_argument('--max-itens', type=int, default=50000)
+        sub.add_argument('--limiar', type=float, default=LIMIAR_PADRAO)
+        sub.add_argument('--perfil', default=analyzer.PERFIL_PADRAO, choices=sorted(analyzer.PERFIS_PIPELINE))
+    args = parser.parse_args(argv)
+
+    indice = IndiceDuplicatas(args.limiar, args.max_itens, args.indice)
+    release_analyzer = analyzer.obter_analisador(args.perfil)
+    if args.comando == 'construir':
+        inicio = time.perf_counter()
+        total = indexar_acervo(release_analyzer, indice, _abrir_entrada(args.entrada, args.editoria), args.pacote,
+                               args.batch_size)
+        print(f"{total} releases indexados em {time.perf_counter() - inicio:.1f}s ({len(indice)} no índice).")
+    else:
+        from cache import normalizar_texto
+        from regras import PACOTE_PADRAO
+        with open(args.arquivo, encoding='utf-8') as f:
+            texto = normalizar_texto(f.read())
+        regras = release_analyzer.regras.obter(args.pacote or PACOTE_PADRAO)
+        encontrado = indice.consultar(texto, release_analyzer._contexto_relatorio(args.editoria, regras))
+        if encontrado is None:
+            print("Nenhum release parecido no índice.")
+        else:
+            relatorio, similaridade, id_ = encontrado
+            print(f"Quase duplicado da entrada {id_} (similaridade {similaridade:.0%}), pontuação {relatorio['pontuacao']}.")
+    indice.fechar()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
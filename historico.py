@@ -0,0 +1,242 @@
+"""Histórico das análises em SQLite, para acompanhar as pontuações ao longo do tempo.
+
+Cada relatório entregue pelo analisador vira uma linha em `analises` (hash do
+texto, pacote de regras do cliente, editoria, modo, pontuação, duração), com os
+achados agrupados por tipo e termo em `achados` e, quando a instrumentação está
+ativa, os tempos de cada etapa em `tempos`. As gravações são acumuladas em
+memória e vão para o disco em lotes, numa única transação, a cada `tamanho_lote`
+relatórios ou `intervalo` segundos (e ao fechar o processo).
+
+As consultas agregadas não varrem `analises`: cada lote atualiza, na mesma
+transação, dois resumos pequenos, um com a contagem por pacote, editoria, mês e
+faixa de pontuação, outro com a contagem de termos (jargões, lemas repetidos)
+por mês. Distribuições por editoria e os jargões mais frequentes saem em
+milissegundos mesmo com milhões de análises gravadas.
+
+A variável BUSSOLA_HISTORICO (caminho do arquivo SQLite) ativa o histórico no
+analisador compartilhado; a página "Histórico" do app mostra os resumos.
+
+Uso:
+    python historico.py resumo historico.db --desde 2025-01
+"""
+import argparse
+import atexit
+import hashlib
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+from cache import normalizar_texto
+
+# Largura das faixas de pontuação nos resumos (a última faixa é a da nota 100)
+LARGURA_FAIXA = 10
+N_FAIXAS = 100 // LARGURA_FAIXA + 1
+# Tipos de achado cujos termos entram no resumo de termos frequentes
+TIPOS_COM_TERMO = ('jargao', 'redundancia', 'voz_passiva')
+
+_ESQUEMA = (
+    'CREATE TABLE IF NOT EXISTS analises ('
+    ' id INTEGER PRIMARY KEY, criado_em REAL NOT NULL, mes TEXT NOT NULL, hash_texto TEXT NOT NULL,'
+    ' pacote TEXT NOT NULL, editoria TEXT NOT NULL, modo TEXT, regras TEXT, pontuacao INTEGER NOT NULL,'
+    ' duracao_ms REAL, duplicata INTEGER NOT NULL DEFAULT 0)',
+    'CREATE INDEX IF NOT EXISTS idx_analises_editoria_mes ON analises (editoria, mes)',
+    'CREATE INDEX IF NOT EXISTS idx_analises_pacote_mes ON analises (pacote, mes)',
+    'CREATE INDEX IF NOT EXISTS idx_analises_hash ON analises (hash_texto)',
+    'CREATE INDEX IF NOT EXISTS idx_analises_criado_em ON analises (criado_em)',
+    'CREATE TABLE IF NOT EXISTS achados ('
+    ' analise_id INTEGER NOT NULL, tipo TEXT NOT NULL, termo TEXT, n INTEGER NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS idx_achados_analise ON achados (analise_id)',
+    'CREATE TABLE IF NOT EXISTS tempos ('
+    ' analise_id INTEGER NOT NULL, etapa TEXT NOT NULL, ms REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS idx_tempos_analise ON tempos (analise_id)',
+    'CREATE TABLE IF NOT EXISTS resumo_pontuacao ('
+    ' pacote TEXT NOT NULL, editoria TEXT NOT NULL, mes TEXT NOT NULL, faixa INTEGER NOT NULL,'
+    ' n INTEGER NOT NULL, soma INTEGER NOT NULL, PRIMARY KEY (pacote, editoria, mes, faixa)) WITHOUT ROWID',
+    'CREATE TABLE IF NOT EXISTS resumo_termos ('
+    ' tipo TEXT NOT NULL, termo TEXT NOT NULL, mes TEXT NOT NULL, pacote TEXT NOT NULL, editoria TEXT NOT NULL,'
+    ' n INTEGER NOT NULL, PRIMARY KEY (tipo, termo, mes, pacote, editoria)) WITHOUT ROWID',
+)
+
+
+def mes_de(instante):
+    """Mês (AAAA-MM, em UTC) de um instante em segundos desde a época."""
+    return time.strftime('%Y-%m', time.gmtime(instante))
+
+
+def hash_texto(texto):
+    return hashlib.sha256(normalizar_texto(texto).encode('utf-8')).hexdigest()
+
+
+class HistoricoAnalises:
+    """Relatórios gravados em lotes num SQLite, com resumos mantidos para consultas agregadas."""
+
+    def __init__(self, caminho, tamanho_lote=200, intervalo=5.0):
+        self.caminho = caminho
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self._pendentes = []
+        self._ultima_gravacao = time.monotonic()
+        self._trava = threading.Lock()
+        # Uma conexão por instância, protegida pela trava; WAL deixa o painel ler
+        # enquanto os workers gravam
+        self._conexao = sqlite3.connect(caminho, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conexao.execute('PRAGMA journal_mode=WAL')
+        self._conexao.execute('PRAGMA synchronous=NORMAL')
+        for comando in _ESQUEMA:
+            self._conexao.execute(comando)
+        atexit.register(self.fechar)
+
+    def registrar(self, texto, relatorio, editoria=None, pacote=None, duracao=None, quando=None):
+        """Acrescenta um relatório ao lote pendente; grava o lote se ele encheu ou envelheceu."""
+        quando = time.time() if quando is None else quando
+        achados = Counter((a['tipo'], a.get('termo') if a['tipo'] in TIPOS_COM_TERMO else None)
+                          for a in relatorio.get('achados', ()))
+        etapas = (relatorio.get('metricas') or {}).get('etapas', {})
+        linha = (quando, mes_de(quando), hash_texto(texto), pacote or relatorio.get('regras', '').split('@')[0],
+                 (editoria or '').lower(), relatorio.get('modo'), relatorio.get('regras'), int(relatorio['pontuacao']),
+                 None if duracao is None else round(duracao * 1000, 3), int('duplicata' in relatorio))
+        with self._trava:
+            self._pendentes.append((linha, list(achados.items()),
+                                    [(etapa, dados['ms']) for etapa, dados in etapas.items()]))
+            cheio = len(self._pendentes) >= self.tamanho_lote
+            velho = time.monotonic() - self._ultima_gravacao >= self.intervalo
+        if cheio or velho:
+            self.descarregar()
+
+    def descarregar(self):
+        """Grava o lote pendente numa única transação; retorna quantas análises foram gravadas."""
+        with self._trava:
+            pendentes, self._pendentes = self._pendentes, []
+            self._ultima_gravacao = time.monotonic()
+            if not pendentes or self._conexao is None:
+                return 0
+            # Contribuição do lote aos resumos, somada antes de ir ao disco
+            pontuacoes = {}
+            termos = Counter()
+            for linha, achados, _ in pendentes:
+                _, mes, _, pacote, editoria, _, _, pontuacao = linha[:8]
+                chave = (pacote, editoria, mes, pontuacao // LARGURA_FAIXA)
+                n, soma = pontuacoes.get(chave, (0, 0))
+                pontuacoes[chave] = (n + 1, soma + pontuacao)
+                for (tipo, termo), vezes in achados:
+                    if termo:
+                        termos[(tipo, termo, mes, pacote, editoria)] += vezes
+            with self._conexao:
+                # IMMEDIATE: os ids são reservados com a trava de escrita já obtida (vários processos gravam)
+                self._conexao.execute('BEGIN IMMEDIATE')
+                primeiro = self._conexao.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM analises').fetchone()[0]
+                ids = range(primeiro, primeiro + len(pendentes))
+                self._conexao.executemany(
+                    'INSERT INTO analises (id, criado_em, mes, hash_texto, pacote, editoria, modo, regras, pontuacao,'
+                    ' duracao_ms, duplicata) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(id_,) + linha for id_, (linha, _, _) in zip(ids, pendentes)])
+                self._conexao.executemany(
+                    'INSERT INTO achados (analise_id, tipo, termo, n) VALUES (?, ?, ?, ?)',
+                    [(id_, tipo, termo, n) for id_, (_, achados, _) in zip(ids, pendentes)
+                     for (tipo, termo), n in achados])
+                self._conexao.executemany(
+                    'INSERT INTO tempos (analise_id, etapa, ms) VALUES (?, ?, ?)',
+                    [(id_, etapa, ms) for id_, (_, _, tempos) in zip(ids, pendentes) for etapa, ms in tempos])
+                self._conexao.executemany(
+                    'INSERT INTO resumo_pontuacao (pacote, editoria, mes, faixa, n, soma) VALUES (?, ?, ?, ?, ?, ?)'
+                    ' ON CONFLICT (pacote, editoria, mes, faixa) DO UPDATE'
+                    ' SET n = n + excluded.n, soma = soma + excluded.soma',
+                    [chave + valores for chave, valores in pontuacoes.items()])
+                self._conexao.executemany(
+                    'INSERT INTO resumo_termos (tipo, termo, mes, pacote, editoria, n) VALUES (?, ?, ?, ?, ?, ?)'
+                    ' ON CONFLICT (tipo, termo, mes, pacote, editoria) DO UPDATE SET n = n + excluded.n',
+                    [chave + (n,) for chave, n in termos.items()])
+            return len(pendentes)
+
+    def _filtros(self, desde=None, ate=None, pacote=None, editoria=None):
+        condicoes = []
+        parametros = []
+        for coluna, operador, valor in (('mes', '>=', desde), ('mes', '<=', ate), ('pacote', '=', pacote),
+                                        ('editoria', '=', editoria.lower() if editoria else editoria)):
+            if valor is not None:
+                condicoes.append(f"{coluna} {operador} ?")
+                parametros.append(valor)
+        return (' WHERE ' + ' AND '.join(condicoes) if condicoes else ''), parametros
+
+    def distribuicao(self, por='editoria', desde=None, ate=None, pacote=None, editoria=None):
+        """Pontuações por grupo ('editoria' ou 'pacote') e mês: [{grupo, mes, n, media, faixas}, ...].
+
+        `faixas` traz a contagem de cada faixa de LARGURA_FAIXA pontos (0-9, 10-19, ..., 100).
+        Os meses são AAAA-MM; `desde` e `ate` são inclusivos.
+        """
+        if por not in ('editoria', 'pacote'):
+            raise ValueError("Agrupe por 'editoria' ou 'pacote'.")
+        onde, parametros = self._filtros(desde, ate, pacote, editoria)
+        linhas = self._conexao.execute(
+            f'SELECT {por}, mes, faixa, SUM(n), SUM(soma) FROM resumo_pontuacao{onde}'
+            f' GROUP BY {por}, mes, faixa ORDER BY {por}, mes', parametros).fetchall()
+        grupos = {}
+        for grupo, mes, faixa, n, soma in linhas:
+            item = grupos.setdefault((grupo, mes), {'grupo': grupo, 'mes': mes, 'n': 0, 'soma': 0,
+                                                    'faixas': [0] * N_FAIXAS})
+            item['n'] += n
+            item['soma'] += soma
+            item['faixas'][faixa] += n
+        resultado = []
+        for item in grupos.values():
+            item['media'] = round(item.pop('soma') / item['n'], 1)
+            resultado.append(item)
+        return resultado
+
+    def termos_frequentes(self, tipo='jargao', limite=10, desde=None, ate=None, pacote=None, editoria=None):
+        """Termos mais frequentes de um tipo de achado: [(termo, ocorrências), ...]."""
+        onde, parametros = self._filtros(desde, ate, pacote, editoria)
+        onde = (onde + ' AND' if onde else ' WHERE') + ' tipo = ?'
+        return self._conexao.execute(
+            f'SELECT termo, SUM(n) AS total FROM resumo_termos{onde} GROUP BY termo ORDER BY total DESC, termo LIMIT ?',
+            parametros + [tipo, limite]).fetchall()
+
+    def recentes(self, limite=20):
+        """Últimas análises gravadas, da mais nova para a mais antiga."""
+        cursor = self._conexao.execute(
+            'SELECT id, criado_em, hash_texto, pacote, editoria, modo, pontuacao, duracao_ms, duplicata'
+            ' FROM analises ORDER BY id DESC LIMIT ?', (limite,))
+        colunas = [c[0] for c in cursor.description]
+        return [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
+
+    def __len__(self):
+        return self._conexao.execute('SELECT COALESCE(SUM(n), 0) FROM resumo_pontuacao').fetchone()[0]
+
+    def fechar(self):
+        self.descarregar()
+        with self._trava:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Resumo do histórico de análises.')
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    resumo = subcomandos.add_parser('resumo', help='Pontuação média por editoria e mês e jargões mais frequentes.')
+    resumo.add_argument('historico', help='Arquivo SQLite do histórico.')
+    resumo.add_argument('--desde', help='Primeiro mês (AAAA-MM).')
+    resumo.add_argument('--ate', help='Último mês (AAAA-MM).')
+    resumo.add_argument('--pacote')
+    resumo.add_argument('--por', default='editoria', choices=('editoria', 'pacote'))
+    args = parser.parse_args(argv)
+
+    historico = HistoricoAnalises(args.historico)
+    inicio = time.perf_counter()
+    linhas = historico.distribuicao(args.por, args.desde, args.ate, args.pacote)
+    jargoes = historico.termos_frequentes('jargao', 10, args.desde, args.ate, args.pacote)
+    duracao = time.perf_counter() - inicio
+    print(f"{len(historico)} análises no histórico (consultas em {duracao * 1000:.1f} ms)")
+    for item in linhas:
+        print(f"  {item['grupo'] or '(sem editoria)':>16} {item['mes']}: {item['n']:>8} análises, "
+              f"média {item['media']:.1f}")
+    if jargoes:
+        print("Jargões mais frequentes: " + ", ".join(f"{termo} ({n})" for termo, n in jargoes))
+    historico.fechar()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Reanálise incremental de releases editados, na granularidade de parágrafo.
+
+O texto é dividido em parágrafos (a mesma divisão de _verificar_comprimento).
+Para cada parágrafo, os resultados que dependem do spaCy (AgregadosDoc:
+contagem de palavras, adjetivos, termos dos léxicos) ficam em cache pelo hash
+do conteúdo. Numa nova análise, só os parágrafos alterados passam pelo modelo;
+os demais são recombinados a partir do cache, e as verificações baratas (regex,
+comprimento, frases) rodam sobre o texto completo. O custo da reanálise passa a
+acompanhar o tamanho da edição, não o do release.
+
+Como cada parágrafo é processado isoladamente, as etiquetas do spaCy podem
+diferir marginalmente das de uma análise do texto inteiro nas fronteiras entre
+parágrafos; use sempre o mesmo modo para comparar pontuações.
+
+Antes de tudo, o release passa pelo cache de resultados e pelo índice de
+duplicatas do ReleaseAnalyzer (se houver), como em analisar_release.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from analyzer import AgregadosDoc, ContextoAnalise, obter_analisador
+from metricas import medir
+from regras import PACOTE_PADRAO
+
+
+def dividir_paragrafos(texto):
+    """Gera (posição inicial, parágrafo) para cada linha não vazia do texto."""
+    inicio = 0
+    for linha in texto.split('\n'):
+        if linha.strip():
+            yield inicio, linha
+        inicio += len(linha) + 1
+
+
+class AnalisadorIncremental:
+    """Envolve um ReleaseAnalyzer, reaproveitando a análise dos parágrafos que não mudaram."""
+
+    def __init__(self, release_analyzer=None, max_paragrafos=20000):
+        self.release_analyzer = release_analyzer if release_analyzer is not None else obter_analisador()
+        self.max_paragrafos = max_paragrafos
+        # hash do parágrafo (+ regras + modelo) -> AgregadosDoc com posições relativas ao parágrafo
+        self._paragrafos = OrderedDict()
+        self._trava = threading.Lock()
+
+    def _chave(self, paragrafo, regras):
+        h = hashlib.sha1(paragrafo.encode('utf-8'))
+        h.update(f"\x00{regras.identificador}\x00{self.release_analyzer.versao_modelo}".encode('utf-8'))
+        return h.hexdigest()
+
+    def _consultar(self, chave):
+        with self._trava:
+            agregados = self._paragrafos.get(chave)
+            if agregados is not None:
+                self._paragrafos.move_to_end(chave)
+            return agregados
+
+    def _guardar(self, chave, agregados):
+        with self._trava:
+            self._paragrafos[chave] = agregados
+            self._paragrafos.move_to_end(chave)
+            while len(self._paragrafos) > self.max_paragrafos:
+                self._paragrafos.popitem(last=False)
+
+    def analisar_release(self, texto, editoria=None, pacote=None):
+        """Analisa o release reprocessando no spaCy apenas os parágrafos novos ou alterados."""
+        analisador = self.release_analyzer
+        comeco = time.perf_counter()
+        regras = analisador.regras.obter(pacote or PACOTE_PADRAO)
+        contagem = {'paragrafos': 0, 'reprocessados': 0}
+        relatorio = analisador._obter_relatorio(
+            texto, editoria, regras, analisar=lambda texto: self._analisar(texto, editoria, regras, contagem))
+        if not contagem['paragrafos']:
+            # Relatório do cache ou de uma duplicata: nenhum parágrafo reprocessado
+            contagem['paragrafos'] = sum(1 for _ in dividir_paragrafos(texto))
+        relatorio['incremental'] = contagem
+        analisador._registrar_historico(texto, editoria, regras, relatorio, comeco)
+        return relatorio
+
+    def _analisar(self, texto, editoria, regras, contagem):
+        analisador = self.release_analyzer
+        medidor = analisador._novo_medidor()
+        paragrafos = list(dividir_paragrafos(texto))
+        chaves = [self._chave(paragrafo, regras) for _, paragrafo in paragrafos]
+        agregados = {}
+        faltando = {}
+        for chave, (_, paragrafo) in zip(chaves, paragrafos):
+            if chave in agregados or chave in faltando:
+                continue
+            encontrado = self._consultar(chave)
+            if encontrado is not None:
+                agregados[chave] = encontrado
+            else:
+                faltando[chave] = paragrafo
+
+        def _processar_faltando():
+            pares = ((paragrafo, chave) for chave, paragrafo in faltando.items())
+            for doc, chave in analisador.nlp.pipe(pares, as_tuples=True):
+                agregados[chave] = AgregadosDoc.de_doc(doc, regras)
+                self._guardar(chave, agregados[chave])
+
+        if faltando:
+            medir(medidor, 'spacy', _processar_faltando)
+
+        # Recombina na ordem do texto, com as posições convertidas para o texto completo
+        combinado = AgregadosDoc()
+        for chave, (inicio, _) in zip(chaves, paragrafos):
+            combinado.somar(agregados[chave].deslocado(inicio))
+
+        ctx = ContextoAnalise(texto, None, regras, combinado)
+        ctx.medidor = medidor
+        contagem.update(paragrafos=len(paragrafos), reprocessados=len(faltando))
+        return analisador._gerar_relatorio(ctx, editoria)
+
+    def limpar(self):
+        with self._trava:
+            self._paragrafos.clear()
@@ -0,0 +1,93 @@
+"""Motor de busca de termos (jargões, informações essenciais, editorias) em uma única passada.
+
+Os termos são compilados uma vez em um índice pela primeira palavra. A busca
+compara a forma e o lema de cada token sem acentos e em minúsculas, sempre em
+fronteira de token ("time" não casa com "timeline"). Ela trabalha sobre os IDs
+de hash do Doc (doc.to_array): cada forma distinta é normalizada uma única vez,
+e só os tokens cuja forma abre algum termo são examinados em Python. O custo
+não depende do tamanho dos léxicos.
+"""
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+# Um termo encontrado: categoria ('jargao', 'essencial', 'editoria'), chave dentro
+# da categoria (o jargão, a pergunta essencial ou o nome da editoria), o termo
+# canônico do léxico e as posições de caractere no texto.
+Ocorrencia = namedtuple('Ocorrencia', ['categoria', 'chave', 'termo', 'inicio', 'fim'])
+
+
+def normalizar_trecho(texto):
+    """Minúsculas e sem acentos: 'Inovação' -> 'inovacao'. Sem cache, para textos inteiros."""
+    decomposto = unicodedata.normalize('NFD', texto.lower())
+    return ''.join(c for c in decomposto if unicodedata.category(c) != 'Mn')
+
+
+@lru_cache(maxsize=200000)
+def normalizar_termo(texto):
+    """normalizar_trecho com cache, para termos e lemas (poucos, repetidos); nunca para textos inteiros."""
+    return normalizar_trecho(texto)
+
+
+class MotorLexico:
+    """Índice imutável de termos de uma ou mais palavras, consultado token a token."""
+
+    def __init__(self, entradas):
+        # entradas: iterável de (categoria, chave, termo)
+        indice = {}
+        for categoria, chave, termo in entradas:
+            partes = tuple(normalizar_termo(p) for p in termo.split())
+            if not partes:
+                continue
+            indice.setdefault(partes[0], []).append((partes[1:], categoria, chave, termo))
+        self._indice = indice
+
+    def __len__(self):
+        return sum(len(c) for c in self._indice.values())
+
+    def buscar(self, doc, ids=None, inicios=None, comprimentos=None):
+        """Retorna as ocorrências de todos os termos no Doc, em ordem de posição.
+
+        `ids` (tokens x 2: LOWER e LEMMA), `inicios` (IDX) e `comprimentos` (LENGTH)
+        são colunas de doc.to_array; quem já tem essa visão do Doc pode repassá-la.
+        """
+        import numpy as np
+
+        if ids is None:
+            from spacy.attrs import IDX, LEMMA, LENGTH, LOWER
+            colunas = doc.to_array([LOWER, LEMMA, IDX, LENGTH])
+            ids, inicios, comprimentos = colunas[:, :2], colunas[:, 2], colunas[:, 3]
+        if not len(ids):
+            return []
+        # Cada forma distinta (minúsculas ou lema) é normalizada uma única vez
+        distintos, inverso = np.unique(ids, return_inverse=True)
+        inverso = inverso.reshape(ids.shape)
+        strings = doc.vocab.strings
+        normalizadas = [normalizar_termo(strings[int(h)]) if h else '' for h in distintos]
+        abre_termo = np.fromiter((forma in self._indice for forma in normalizadas), dtype=bool,
+                                 count=len(normalizadas))
+
+        def formas(i):
+            return {normalizadas[inverso[i, 0]], normalizadas[inverso[i, 1]]} - {''}
+
+        ocorrencias = []
+        n_tokens = len(ids)
+        for i in np.flatnonzero(abre_termo[inverso].any(axis=1)).tolist():
+            for forma in formas(i):
+                for resto, categoria, chave, termo in self._indice.get(forma, ()):
+                    fim = i + 1 + len(resto)
+                    if fim > n_tokens:
+                        continue
+                    if all(parte in formas(i + 1 + j) for j, parte in enumerate(resto)):
+                        ocorrencias.append(Ocorrencia(categoria, chave, termo, int(inicios[i]),
+                                                      int(inicios[fim - 1] + comprimentos[fim - 1])))
+        ocorrencias.sort(key=lambda o: o.inicio)
+        return ocorrencias
+
+
+def agrupar_ocorrencias(ocorrencias):
+    """Agrupa ocorrências em {categoria: {chave: [ocorrências]}}, mantendo a ordem de aparição."""
+    grupos = {}
+    for ocorrencia in ocorrencias:
+        grupos.setdefault(ocorrencia.categoria, {}).setdefault(ocorrencia.chave, []).append(ocorrencia)
+    return grupos
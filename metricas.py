@@ -0,0 +1,164 @@
+"""Instrumentação opcional da análise: tempo e alocações por etapa, métricas e perfil.
+
+Ativada com ReleaseAnalyzer(instrumentar=True) ou passando um ColetorMetricas.
+Cada relatório ganha a chave 'metricas' com o tempo (ms) e o saldo de blocos de
+memória alocados em cada etapa (spaCy, agregados do Doc e cada verificação).
+O coletor acumula contadores e histogramas no formato de texto do Prometheus e
+pode repassar cada medida a um callback. Desativada, a instrumentação custa apenas
+um teste de None por etapa.
+
+Para perfilar uma única análise com cProfile:
+    python metricas.py release.txt --editoria Tecnologia --saida analise.prof
+"""
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+
+BALDES_SEGUNDOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MedidorEtapas:
+    """Mede as etapas de uma única análise."""
+
+    __slots__ = ('etapas',)
+
+    def __init__(self):
+        self.etapas = {}
+
+    def medir(self, nome, funcao, *args):
+        blocos = sys.getallocatedblocks()
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        duracao = time.perf_counter() - inicio
+        self.etapas[nome] = (duracao, sys.getallocatedblocks() - blocos)
+        return resultado
+
+    def como_dict(self):
+        total = sum(duracao for duracao, _ in self.etapas.values())
+        return {
+            'total_ms': round(total * 1000, 3),
+            'etapas': {nome: {'ms': round(duracao * 1000, 3), 'blocos_alocados': blocos}
+                       for nome, (duracao, blocos) in self.etapas.items()},
+        }
+
+
+def medir(medidor, nome, funcao, *args):
+    """Executa funcao(*args), medindo-a apenas se houver um medidor ativo."""
+    if medidor is None:
+        return funcao(*args)
+    return medidor.medir(nome, funcao, *args)
+
+
+class ColetorMetricas:
+    """Acumula as medidas de todas as análises do processo (contadores e histogramas)."""
+
+    def __init__(self, callback=None, baldes=BALDES_SEGUNDOS):
+        self.callback = callback
+        self.baldes = tuple(baldes)
+        self._trava = threading.Lock()
+        self.analises = 0
+        # etapa -> [contagens por balde..., soma de segundos, total de observações]
+        self._histogramas = {}
+        self._blocos = {}
+
+    def registrar(self, medidor):
+        with self._trava:
+            self.analises += 1
+            for nome, (duracao, blocos) in medidor.etapas.items():
+                histograma = self._histogramas.setdefault(nome, [0] * len(self.baldes) + [0.0, 0])
+                for i, limite in enumerate(self.baldes):
+                    if duracao <= limite:
+                        histograma[i] += 1
+                histograma[-2] += duracao
+                histograma[-1] += 1
+                self._blocos[nome] = self._blocos.get(nome, 0) + max(blocos, 0)
+        if self.callback is not None:
+            for nome, (duracao, blocos) in medidor.etapas.items():
+                self.callback(nome, duracao, blocos)
+
+    def exportar_prometheus(self, rotulos=None):
+        """Texto no formato de exposição do Prometheus."""
+        extra = ''.join(f',{chave}="{valor}"' for chave, valor in (rotulos or {}).items())
+        base = '{' + extra[1:] + '}' if extra else ''
+        linhas = [
+            '# HELP bussola_analises_total Análises instrumentadas.',
+            '# TYPE bussola_analises_total counter',
+        ]
+        with self._trava:
+            linhas.append(f'bussola_analises_total{base} {self.analises}')
+            linhas += ['# HELP bussola_etapa_segundos Duração de cada etapa da análise.',
+                       '# TYPE bussola_etapa_segundos histogram']
+            for nome, histograma in sorted(self._histogramas.items()):
+                for limite, contagem in zip(self.baldes, histograma):
+                    linhas.append(f'bussola_etapa_segundos_bucket{{etapa="{nome}"{extra},le="{limite}"}} {contagem}')
+                linhas.append(f'bussola_etapa_segundos_bucket{{etapa="{nome}"{extra},le="+Inf"}} {histograma[-1]}')
+                linhas.append(f'bussola_etapa_segundos_sum{{etapa="{nome}"{extra}}} {histograma[-2]:.6f}')
+                linhas.append(f'bussola_etapa_segundos_count{{etapa="{nome}"{extra}}} {histograma[-1]}')
+            linhas += ['# HELP bussola_etapa_blocos_alocados_total Blocos de memória alocados por etapa.',
+                       '# TYPE bussola_etapa_blocos_alocados_total counter']
+            for nome, blocos in sorted(self._blocos.items()):
+                linhas.append(f'bussola_etapa_blocos_alocados_total{{etapa="{nome}"{extra}}} {blocos}')
+        return '\n'.join(linhas) + '\n'
+
+
+def memoria_processo(pid='self', pss=True):
+    """Memória do processo em MiB: residente (RSS) e proporcional (PSS, que divide as páginas compartilhadas).
+
+    Lê /proc no Linux; em outros sistemas, traz só o pico de RSS do próprio processo.
+    PSS fica None quando o kernel não expõe smaps_rollup (ou com pss=False, que é mais barato).
+    """
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {'rss_mb': pico / 2 ** 20 if sys.platform == 'darwin' else pico / 1024, 'pss_mb': None}
+    proporcional = None
+    if pss:
+        try:
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                for linha in f:
+                    if linha.startswith('Pss:'):
+                        proporcional = int(linha.split()[1]) / 1024
+                        break
+        except OSError:
+            pass
+    return {'rss_mb': rss, 'pss_mb': proporcional}
+
+
+def perfilar_analise(release_analyzer, texto, editoria=None, caminho='analise.prof', **kwargs):
+    """Perfila uma única análise com cProfile e grava as estatísticas em `caminho`."""
+    perfil = cProfile.Profile()
+    relatorio = perfil.runcall(release_analyzer.analisar_release, texto, editoria, **kwargs)
+    perfil.dump_stats(caminho)
+    return relatorio, pstats.Stats(perfil)
+
+
+def main(argv=None):
+    import analyzer
+
+    parser = argparse.ArgumentParser(description='Perfila a análise de um release com cProfile.')
+    parser.add_argument('arquivo', help='Arquivo de texto com o release.')
+    parser.add_argument('--editoria')
+    parser.add_argument('--saida', default='analise.prof', help='Arquivo .prof (abre no snakeviz/pstats).')
+    parser.add_argument('--linhas', type=int, default=25, help='Funções mais caras a listar.')
+    args = parser.parse_args(argv)
+
+    with open(args.arquivo, encoding='utf-8') as f:
+        texto = f.read()
+    release_analyzer = analyzer.ReleaseAnalyzer(instrumentar=True)
+    release_analyzer.analisar_release(texto[:200])  # aquecimento, fora do perfil
+    relatorio, estatisticas = perfilar_analise(release_analyzer, texto, args.editoria, args.saida)
+    for nome, etapa in relatorio['metricas']['etapas'].items():
+        print(f"{nome:>20}: {etapa['ms']:9.3f} ms  {etapa['blocos_alocados']:>8} blocos")
+    estatisticas.sort_stats('cumulative').print_stats(args.linhas)
+    print(f"Perfil gravado em {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import pandas as pd
+import streamlit as st
+
+import analyzer
+from historico import LARGURA_FAIXA, N_FAIXAS
+
+# Rótulos das faixas de pontuação: 0-9, 10-19, ..., 100
+FAIXAS = [f"{i * LARGURA_FAIXA}-{(i + 1) * LARGURA_FAIXA - 1}" for i in range(N_FAIXAS - 1)] + ["100"]
+
+
+def main():
+    st.set_page_config(page_title="Histórico - Bússola de Releases", page_icon="🧭", layout="wide")
+    st.markdown("<h1>🗺️ Diário de bordo</h1>", unsafe_allow_html=True)
+    st.markdown("Como os releases analisados vêm navegando, por editoria e por cliente, mês a mês.")
+
+    # O analisador compartilhado só carrega o modelo na primeira análise
+    historico = analyzer.obter_analisador().historico
+    if historico is None:
+        st.info("O histórico está desativado. Defina a variável BUSSOLA_HISTORICO com o caminho de um "
+                "arquivo SQLite (por exemplo, historico.db) e reinicie o app para gravar as análises.")
+        return
+    # Análises deste processo ainda no lote pendente entram antes das consultas
+    historico.descarregar()
+    if not len(historico):
+        st.info("Nenhuma análise gravada ainda. Analise um release na página principal.")
+        return
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        por = st.radio("Agrupar por", ["editoria", "pacote"],
+                       format_func=lambda valor: "Editoria" if valor == "editoria" else "Cliente (pacote de regras)")
+    meses = sorted({item['mes'] for item in historico.distribuicao(por)})
+    with col2:
+        desde, ate = (st.select_slider("Período", meses, value=(meses[0], meses[-1])) if len(meses) > 1
+                      else (meses[0], meses[0]))
+
+    linhas = historico.distribuicao(por, desde, ate)
+    for item in linhas:
+        item['grupo'] = item['grupo'] or "(sem editoria)"
+    total = sum(item['n'] for item in linhas)
+    media = sum(item['media'] * item['n'] for item in linhas) / total if total else 0.0
+    metrica1, metrica2 = st.columns(2)
+    metrica1.metric("Análises no período", f"{total:,}".replace(',', '.'))
+    metrica2.metric("Pontuação média", f"{media:.1f}")
+
+    st.markdown("<h3>🧭 Pontuação média por mês</h3>", unsafe_allow_html=True)
+    medias = pd.DataFrame(linhas).pivot(index='mes', columns='grupo', values='media')
+    st.line_chart(medias)
+
+    st.markdown("<h3>⚓ Distribuição das pontuações</h3>", unsafe_allow_html=True)
+    distribuicao = {}
+    for item in linhas:
+        faixas = distribuicao.setdefault(item['grupo'], [0] * N_FAIXAS)
+        for i, n in enumerate(item['faixas']):
+            faixas[i] += n
+    st.bar_chart(pd.DataFrame(distribuicao, index=FAIXAS))
+
+    col_jargoes, col_repeticoes = st.columns(2)
+    with col_jargoes:
+        st.markdown("<h3>🚨 Jargões mais frequentes</h3>", unsafe_allow_html=True)
+        jargoes = historico.termos_frequentes('jargao', 15, desde, ate)
+        if jargoes:
+            st.dataframe(pd.DataFrame(jargoes, columns=["Jargão", "Ocorrências"]), hide_index=True)
+        else:
+            st.markdown("Nenhum jargão no período. Mar calmo!")
+    with col_repeticoes:
+        st.markdown("<h3>🔁 Palavras mais repetidas</h3>", unsafe_allow_html=True)
+        repeticoes = historico.termos_frequentes('redundancia', 15, desde, ate)
+        if repeticoes:
+            st.dataframe(pd.DataFrame(repeticoes, columns=["Palavra", "Ocorrências"]), hide_index=True)
+        else:
+            st.markdown("Nenhuma repetição em excesso no período.")
+
+    with st.expander("Últimas análises"):
+        st.dataframe(pd.DataFrame(historico.recentes(50)), hide_index=True)
+
+
+main()
@@ -0,0 +1,161 @@
+"""Pacotes de regras (léxicos e editorias) carregados de arquivos versionados.
+
+Cada pacote é um arquivo JSON (ou YAML, se o PyYAML estiver instalado) no
+diretório de regras, com o formato de regras/padrao.json. Ao ser carregado, o
+pacote é compilado em estruturas imutáveis (frozensets, mapeamentos somente
+leitura e o MotorLexico). O RepositorioRegras recarrega um pacote quando o
+arquivo muda, sem reiniciar o processo nem recarregar o modelo spaCy: o pacote
+novo é montado por inteiro e só então substitui o antigo, então cada análise
+enxerga sempre um pacote completo.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import warnings
+from types import MappingProxyType
+
+from lexico import MotorLexico
+
+try:
+    import yaml
+except ImportError:  # YAML é opcional; JSON sempre funciona
+    yaml = None
+
+DIRETORIO_PADRAO = os.environ.get(
+    'BUSSOLA_REGRAS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'regras'))
+PACOTE_PADRAO = 'padrao'
+EXTENSOES = ('.json', '.yaml', '.yml')
+CAMPOS_OBRIGATORIOS = ('palavras_comuns', 'jargoes', 'info_essenciais', 'editorias')
+
+
+class PacoteRegras:
+    """Conjunto imutável de léxicos de um cliente, já compilado para consulta."""
+
+    def __init__(self, dados, assinatura=''):
+        faltando = [campo for campo in CAMPOS_OBRIGATORIOS if campo not in dados]
+        if faltando:
+            raise ValueError(f"Pacote de regras incompleto, faltam: {', '.join(faltando)}.")
+        self.nome = str(dados.get('nome', PACOTE_PADRAO))
+        self.versao = str(dados.get('versao', '0'))
+        self.assinatura = assinatura
+
+        # Palavras comuns que podem indicar redundância quando repetidas
+        self.common_words = frozenset(p.lower() for p in dados['palavras_comuns'])
+        # Palavras que podem indicar jargões corporativos
+        self.jargoes = frozenset(p.lower() for p in dados['jargoes'])
+        # Informações essenciais (na ordem do arquivo) e seus termos relacionados
+        self.termos_relacionados = MappingProxyType(
+            {info.lower(): tuple(t.lower() for t in termos) for info, termos in dados['info_essenciais'].items()})
+        self.info_essenciais = tuple(self.termos_relacionados)
+        # Editorias e palavras-chave relacionadas
+        self.editorias = MappingProxyType(
+            {nome.lower(): tuple(p.lower() for p in palavras) for nome, palavras in dados['editorias'].items()})
+
+        # Todos os léxicos compilados em um único índice, consultado em uma passada por release
+        self.motor_lexico = self._compilar_lexico()
+
+    @property
+    def identificador(self):
+        """Identifica o conteúdo exato do pacote (usado no relatório e na chave do cache)."""
+        return f"{self.nome}@{self.versao}#{self.assinatura}"
+
+    def _compilar_lexico(self):
+        """Monta o motor de busca com jargões, termos essenciais e palavras-chave das editorias."""
+        entradas = [('jargao', jargao, jargao) for jargao in sorted(self.jargoes)]
+        for info, termos in self.termos_relacionados.items():
+            for termo in (info,) + termos:
+                entradas.append(('essencial', info, termo))
+        for editoria, palavras_chave in self.editorias.items():
+            entradas.extend(('editoria', editoria, palavra) for palavra in palavras_chave)
+        return MotorLexico(entradas)
+
+
+def carregar_pacote(caminho):
+    """Lê e compila um pacote de regras a partir de um arquivo JSON ou YAML."""
+    with open(caminho, 'rb') as f:
+        conteudo = f.read()
+    if caminho.endswith('.json'):
+        dados = json.loads(conteudo.decode('utf-8'))
+    elif yaml is not None:
+        dados = yaml.safe_load(conteudo.decode('utf-8'))
+    else:
+        raise RuntimeError(f"PyYAML não está instalado; não é possível ler {caminho}.")
+    if not isinstance(dados, dict):
+        raise ValueError(f"Pacote de regras inválido em {caminho}.")
+    dados.setdefault('nome', os.path.splitext(os.path.basename(caminho))[0])
+    return PacoteRegras(dados, assinatura=hashlib.sha256(conteudo).hexdigest()[:12])
+
+
+class RepositorioRegras:
+    """Pacotes de regras por nome, recarregados automaticamente quando o arquivo muda."""
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO, intervalo_verificacao=2.0):
+        self.diretorio = diretorio
+        self.intervalo_verificacao = intervalo_verificacao
+        # nome -> (pacote, caminho, (mtime_ns, tamanho), instante da última verificação)
+        self._pacotes = {}
+        self._trava = threading.Lock()
+
+    def _localizar(self, nome):
+        if os.sep in nome or (os.altsep and os.altsep in nome) or nome.startswith('.'):
+            raise ValueError(f"Nome de pacote de regras inválido: {nome!r}.")
+        for extensao in EXTENSOES:
+            caminho = os.path.join(self.diretorio, nome + extensao)
+            if os.path.exists(caminho):
+                return caminho
+        raise KeyError(f"Pacote de regras não encontrado: {nome!r} em {self.diretorio}.")
+
+    def nomes(self):
+        """Nomes dos pacotes disponíveis no diretório."""
+        return sorted(os.path.splitext(arquivo)[0] for arquivo in os.listdir(self.diretorio)
+                      if arquivo.endswith(EXTENSOES))
+
+    def obter(self, nome=PACOTE_PADRAO):
+        """Retorna o pacote pronto para uso, recarregando-o se o arquivo mudou."""
+        agora = time.monotonic()
+        entrada = self._pacotes.get(nome)
+        if entrada is not None and agora - entrada[3] < self.intervalo_verificacao:
+            return entrada[0]
+
+        with self._trava:
+            entrada = self._pacotes.get(nome)
+            if entrada is not None and agora - entrada[3] < self.intervalo_verificacao:
+                return entrada[0]
+            caminho = entrada[1] if entrada is not None else self._localizar(nome)
+            try:
+                estado = os.stat(caminho)
+                marca = (estado.st_mtime_ns, estado.st_size)
+            except OSError:
+                marca = None
+            if entrada is not None and (marca is None or marca == entrada[2]):
+                # Sem mudança (ou arquivo removido): mantém o pacote atual
+                self._pacotes[nome] = (entrada[0], caminho, entrada[2], agora)
+                return entrada[0]
+            try:
+                pacote = carregar_pacote(caminho)
+            except Exception as erro:
+                if entrada is None:
+                    raise
+                # Um arquivo inválido não derruba o serviço: segue com a versão anterior
+                warnings.warn(f"Falha ao recarregar o pacote de regras {nome!r}: {erro}")
+                self._pacotes[nome] = (entrada[0], caminho, marca, agora)
+                return entrada[0]
+            # Troca atômica: quem já pegou o pacote anterior termina a análise com ele
+            self._pacotes[nome] = (pacote, caminho, marca, agora)
+            return pacote
+
+
+_repositorio = None
+_trava_repositorio = threading.Lock()
+
+
+def repositorio_padrao():
+    """Repositório de regras compartilhado pelo processo."""
+    global _repositorio
+    if _repositorio is None:
+        with _trava_repositorio:
+            if _repositorio is None:
+                _repositorio = RepositorioRegras()
+    return _repositorio
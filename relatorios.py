@@ -0,0 +1,65 @@
+"""Representação compacta dos relatórios, para guardá-los em memória ou enviá-los entre processos.
+
+O relatório de ReleaseAnalyzer é um dicionário com listas de strings e um
+dicionário por achado: centenas de objetos Python por relatório, que o cache
+mantém vivos aos milhares. RelatorioCompacto guarda o mesmo conteúdo em três
+objetos: os achados num vetor de inteiros (sete por achado), os textos dos
+achados (tipo, gravidade, mensagem, termo) uma vez só numa tupla e os demais
+campos num único JSON.
+
+    compacto = RelatorioCompacto.de_dict(relatorio)
+    compacto.como_dict() == relatorio  # um relatório novo a cada chamada
+"""
+import json
+from array import array
+
+# Campos de cada achado, na ordem de analyzer.Achado; os de texto viram índices na tupla de textos
+CAMPOS_ACHADO = ('tipo', 'gravidade', 'inicio', 'fim', 'frase', 'mensagem', 'termo')
+_CAMPOS_TEXTO = frozenset(('tipo', 'gravidade', 'mensagem', 'termo'))
+_CONJUNTO_CAMPOS = frozenset(CAMPOS_ACHADO)
+
+
+class RelatorioCompacto:
+    """Relatório com poucos objetos: achados num array('i') e o restante num JSON."""
+
+    __slots__ = ('campos', 'textos', 'achados')
+
+    def __init__(self, campos, textos=(), achados=None):
+        self.campos = campos
+        self.textos = textos
+        self.achados = achados
+
+    @classmethod
+    def de_dict(cls, relatorio):
+        achados = relatorio.get('achados')
+        if not achados or any(achado.keys() != _CONJUNTO_CAMPOS for achado in achados):
+            # Sem achados no formato conhecido, tudo vai para o JSON
+            return cls(json.dumps(relatorio, ensure_ascii=False))
+
+        indices = {}
+        valores = array('i')
+        try:
+            for achado in achados:
+                for campo in CAMPOS_ACHADO:
+                    valor = achado[campo]
+                    if campo in _CAMPOS_TEXTO:
+                        valor = -1 if valor is None else indices.setdefault(valor, len(indices))
+                    valores.append(valor)
+        except (TypeError, OverflowError):
+            # Posição que não cabe num inteiro de 32 bits (ou não é inteiro)
+            return cls(json.dumps(relatorio, ensure_ascii=False))
+        # O marcador mantém a posição da chave 'achados' no dicionário reconstruído
+        campos = json.dumps(dict(relatorio, achados=None), ensure_ascii=False)
+        return cls(campos, tuple(indices), valores)
+
+    def como_dict(self):
+        relatorio = json.loads(self.campos)
+        if self.achados is not None:
+            textos = self.textos
+            valores = self.achados
+            relatorio['achados'] = [
+                {'tipo': textos[valores[i]], 'gravidade': textos[valores[i + 1]], 'inicio': valores[i + 2],
+                 'fim': valores[i + 3], 'frase': valores[i + 4], 'mensagem': textos[valores[i + 5]],
+                 'termo': textos[valores[i + 6]] if valores[i + 6] >= 0 else None}
+                for i in range(0, len(valores), len(CAMPOS_ACHADO))]
+        return relatorio
@@ -0,0 +1,408 @@
+"""Serviço HTTP de pontuação de releases, para integração com o CMS e outros sistemas.
+
+Uso:
+    python servico.py --porta 8600 --workers 4
+
+Endpoints:
+    POST /analisar       {"texto", "editoria"?, "pacote"?, "modo"?, "piso"?} -> relatório
+    POST /analisar/lote  {"releases": [{"id"?, "texto", "editoria"?}], "pacote"?, "modo"?, "piso"?}
+                                                                       -> {"relatorios": [...]}
+    GET  /saude                                                        -> estado do worker
+    GET  /metricas   (com --metricas)                                  -> métricas no formato Prometheus
+
+Modelo pre-fork: o processo pai carrega e aquece o modelo spaCy, abre o socket
+e só então cria os workers com fork, que compartilham as páginas do modelo por
+copy-on-write. Cada worker executa as análises em uma única thread, com uma fila
+limitada: quando a fila está cheia a resposta é 429, e uma análise que não
+termina dentro do prazo devolve 504.
+
+O vocabulário do spaCy guarda cada palavra nova que o worker vê e nunca
+encolhe. Por isso um worker é reciclado quando acumula --max-vocabulario
+strings novas (ou passa de --max-analises análises ou de --max-rss-mb de
+memória residente): para de aceitar conexões, termina as requisições já
+aceitas e sai, e o pai cria outro com fork, de novo com o vocabulário de
+partida. A memória de cada worker fica limitada, por mais análises que faça.
+"""
+import argparse
+import gc
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as PrazoEsgotado
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import analyzer
+from metricas import memoria_processo
+
+MAX_CORPO = 2 * 1024 * 1024  # bytes por requisição
+MAX_LOTE = 500  # releases por chamada de /analisar/lote
+MAX_VOCABULARIO = 100000  # strings novas no vocabulário antes de reciclar o worker
+
+
+class ErroRequisicao(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+class ExecutorAnalises:
+    """Fila limitada na frente de uma única thread de análise do worker."""
+
+    def __init__(self, release_analyzer, max_fila=32, prazo=30.0):
+        self.release_analyzer = release_analyzer
+        self.prazo = prazo
+        self.max_fila = max_fila
+        self._vagas = threading.BoundedSemaphore(max_fila)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analise')
+        self._ocupadas = 0
+        self._trava = threading.Lock()
+
+    @property
+    def ocupacao(self):
+        return self._ocupadas
+
+    def executar(self, funcao, *args, **kwargs):
+        if not self._vagas.acquire(blocking=False):
+            raise ErroRequisicao(429, 'Fila de análise cheia; tente novamente em instantes.')
+        with self._trava:
+            self._ocupadas += 1
+        futuro = self._executor.submit(funcao, *args, **kwargs)
+        futuro.add_done_callback(self._liberar)
+        try:
+            return futuro.result(timeout=self.prazo)
+        except PrazoEsgotado:
+            # Se ainda não começou, sai da fila; se já começou, o resultado é descartado
+            futuro.cancel()
+            raise ErroRequisicao(504, 'A análise excedeu o tempo limite.')
+
+    def _liberar(self, futuro):
+        with self._trava:
+            self._ocupadas -= 1
+        self._vagas.release()
+
+
+class LimitesWorker:
+    """Conta as análises do worker e diz quando ele deve ser reciclado (limites em 0 ficam desligados)."""
+
+    def __init__(self, release_analyzer, max_analises=0, max_vocabulario=MAX_VOCABULARIO, max_rss_mb=0):
+        self.release_analyzer = release_analyzer
+        self.max_analises = max_analises
+        self.max_vocabulario = max_vocabulario
+        self.max_rss_mb = max_rss_mb
+        # Vocabulário herdado do pai, compartilhado por copy-on-write
+        self.vocabulario_inicial = release_analyzer.tamanho_vocabulario()
+        self.analises = 0
+
+    @property
+    def vocabulario_novo(self):
+        return self.release_analyzer.tamanho_vocabulario() - self.vocabulario_inicial
+
+    def registrar(self, n=1):
+        """Soma n análises concluídas; retorna o motivo para reciclar o worker, ou None."""
+        self.analises += n
+        if self.max_analises and self.analises >= self.max_analises:
+            return 'analises'
+        if self.max_vocabulario and self.vocabulario_novo >= self.max_vocabulario:
+            return 'vocabulario'
+        if self.max_rss_mb and memoria_processo(pss=False)['rss_mb'] >= self.max_rss_mb:
+            return 'memoria'
+        return None
+
+
+def _texto_opcional(dados, campo):
+    """Valor de um campo de texto opcional (editoria, pacote): string ou ausente."""
+    valor = dados.get(campo)
+    if valor is not None and not isinstance(valor, str):
+        raise ErroRequisicao(400, f"Campo '{campo}' deve ser um texto.")
+    return valor
+
+
+def _opcoes_triagem(corpo):
+    """Pacote de regras, modo ('completo' ou 'rapido') e piso de pontuação opcionais da requisição."""
+    modo = corpo.get('modo') or analyzer.MODO_COMPLETO
+    if not isinstance(modo, str) or modo not in analyzer.MODOS:
+        raise ErroRequisicao(400, f"Campo 'modo' deve ser um de: {', '.join(sorted(analyzer.MODOS))}.")
+    piso = corpo.get('piso')
+    if piso is not None and (isinstance(piso, bool) or not isinstance(piso, (int, float))):
+        raise ErroRequisicao(400, "Campo 'piso' deve ser um número.")
+    return {'pacote': _texto_opcional(corpo, 'pacote'), 'modo': modo, 'piso': piso}
+
+
+class ManipuladorBussola(BaseHTTPRequestHandler):
+    server_version = 'Bussola/1.0'
+    protocol_version = 'HTTP/1.1'
+    # Prazo para o cliente enviar a requisição (protege contra conexões lentas)
+    timeout = 15
+
+    def log_message(self, formato, *args):
+        if self.server.verbose:
+            super().log_message(formato, *args)
+
+    def _responder(self, status, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        if status == 429:
+            self.send_header('Retry-After', '1')
+        if self.server.reciclando is not None:
+            # O worker está de saída: o cliente reconecta e cai em outro
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _ler_json(self):
+        try:
+            tamanho = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            raise ErroRequisicao(411, 'Content-Length obrigatório.')
+        if tamanho > MAX_CORPO:
+            raise ErroRequisicao(413, f'Corpo maior que {MAX_CORPO} bytes.')
+        try:
+            corpo = json.loads(self.rfile.read(tamanho).decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ErroRequisicao(400, 'JSON inválido.')
+        if not isinstance(corpo, dict):
+            raise ErroRequisicao(400, 'O corpo deve ser um objeto JSON.')
+        return corpo
+
+    def do_GET(self):
+        coletor = self.server.executor.release_analyzer.coletor
+        if self.path == '/metricas' and coletor is not None:
+            dados = coletor.exportar_prometheus({'pid': os.getpid()}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+            return
+        if self.path != '/saude':
+            return self._responder(404, {'erro': 'Rota não encontrada.'})
+        executor = self.server.executor
+        limites = self.server.limites
+        self._responder(200, {'status': 'ok', 'pid': os.getpid(), 'fila': executor.ocupacao,
+                              'max_fila': executor.max_fila,
+                              'analises': limites.analises if limites is not None else None,
+                              'vocabulario': executor.release_analyzer.tamanho_vocabulario(),
+                              'rss_mb': round(memoria_processo(pss=False)['rss_mb'], 1)})
+
+    def do_POST(self):
+        try:
+            if self.path == '/analisar':
+                resposta = self._analisar(self._ler_json())
+            elif self.path == '/analisar/lote':
+                resposta = self._analisar_lote(self._ler_json())
+            else:
+                raise ErroRequisicao(404, 'Rota não encontrada.')
+        except ErroRequisicao as erro:
+            return self._responder(erro.status, {'erro': erro.mensagem})
+        except (KeyError, ValueError) as erro:
+            return self._responder(400, {'erro': str(erro)})
+        self._responder(200, resposta)
+
+    def _analisar(self, corpo):
+        texto = corpo.get('texto')
+        if not isinstance(texto, str) or not texto.strip():
+            raise ErroRequisicao(400, "Campo 'texto' obrigatório.")
+        executor = self.server.executor
+        relatorio = executor.executar(executor.release_analyzer.analisar_release, texto,
+                                      _texto_opcional(corpo, 'editoria'), **_opcoes_triagem(corpo))
+        self.server.contar_analises(1)
+        return relatorio
+
+    def _analisar_lote(self, corpo):
+        releases = corpo.get('releases')
+        if not isinstance(releases, list) or not releases:
+            raise ErroRequisicao(400, "Campo 'releases' deve ser uma lista não vazia.")
+        if len(releases) > MAX_LOTE:
+            raise ErroRequisicao(413, f'No máximo {MAX_LOTE} releases por lote.')
+        for release in releases:
+            if not isinstance(release, dict) or not isinstance(release.get('texto'), str):
+                raise ErroRequisicao(400, "Cada release precisa de um campo 'texto'.")
+            _texto_opcional(release, 'editoria')
+        executor = self.server.executor
+        opcoes = _opcoes_triagem(corpo)
+
+        def _lote():
+            relatorios = executor.release_analyzer.analisar_lote(
+                (r['texto'] for r in releases), (r.get('editoria') for r in releases), **opcoes)
+            return [dict(relatorio, id=release.get('id', i))
+                    for i, (release, relatorio) in enumerate(zip(releases, relatorios))]
+        relatorios = executor.executar(_lote)
+        self.server.contar_analises(len(relatorios))
+        return {'relatorios': relatorios}
+
+
+class ServidorBussola(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, sock, executor, verbose=False, limites=None):
+        # O socket já vem aberto do processo pai; não refaz bind/listen
+        super().__init__(sock.getsockname()[:2], ManipuladorBussola, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.executor = executor
+        self.verbose = verbose
+        self.limites = limites
+        # Motivo da reciclagem (ou do encerramento), quando o worker para de aceitar conexões
+        self.reciclando = None
+        self._conexoes = 0
+        self._trava = threading.Lock()
+
+    def process_request(self, request, client_address):
+        # Contada já no accept, antes de a thread ler a requisição, para a reciclagem esperar por ela
+        with self._trava:
+            self._conexoes += 1
+        super().process_request(request, client_address)
+
+    def shutdown_request(self, request):
+        try:
+            super().shutdown_request(request)
+        finally:
+            with self._trava:
+                self._conexoes -= 1
+
+    def contar_analises(self, n):
+        """Soma análises entregues; passado um limite, deixa de aceitar conexões para o worker sair."""
+        if self.limites is None:
+            return
+        with self._trava:
+            if self.reciclando is not None:
+                return
+            self.reciclando = self.limites.registrar(n)
+            if self.reciclando is None:
+                return
+        # shutdown() espera o laço de serve_forever, que roda em outra thread
+        threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def encerrar(self, motivo):
+        """Deixa de aceitar conexões, como na reciclagem; chamado de fora da thread de serve_forever."""
+        with self._trava:
+            if self.reciclando is not None:
+                return
+            self.reciclando = motivo
+        self.shutdown()
+
+    def drenar(self, prazo):
+        """Espera as conexões já aceitas fecharem, por no máximo `prazo` segundos.
+
+        Durante a reciclagem as respostas saem com Connection: close; uma conexão
+        keep-alive ociosa fecha no próximo pedido ou ao fim do `timeout` do manipulador.
+        """
+        limite = time.monotonic() + prazo
+        while self._conexoes and time.monotonic() < limite:
+            time.sleep(0.01)
+
+
+def _executar_worker(sock, release_analyzer, args):
+    executor = ExecutorAnalises(release_analyzer, max_fila=args.max_fila, prazo=args.prazo)
+    limites = LimitesWorker(release_analyzer, args.max_analises, args.max_vocabulario, args.max_rss_mb)
+    servidor = ServidorBussola(sock, executor, verbose=args.verbose, limites=limites)
+    # SIGTERM do pai encerra como uma reciclagem, sem perder o que já foi aceito. O handler roda na
+    # thread de serve_forever (que pode estar com a trava do servidor): o encerramento vai para outra thread.
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=servidor.encerrar, args=('SIGTERM',),
+                                                              daemon=True).start())
+    # Ctrl+C chega a todo o grupo de processos; quem encerra os workers é o pai, com SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    servidor.serve_forever()
+    # Só chega aqui na reciclagem ou no encerramento: termina o que já foi aceito e sai
+    servidor.drenar(args.prazo + ManipuladorBussola.timeout)
+    if args.verbose:
+        print(f"Worker {os.getpid()} saindo ({servidor.reciclando}) após {limites.analises} análises e "
+              f"{limites.vocabulario_novo} strings novas no vocabulário.", file=sys.stderr)
+
+
+def _criar_worker(sock, release_analyzer, args):
+    pid = os.fork()
+    if pid == 0:
+        codigo = 1
+        try:
+            # Conexões SQLite (cache, duplicatas, histórico) são abertas aqui, nunca herdadas do pai
+            analyzer.reabrir_apos_fork()
+            _executar_worker(sock, release_analyzer, args)
+            codigo = 0
+        finally:
+            # os._exit não roda os handlers de atexit: o lote pendente do histórico é gravado aqui
+            try:
+                analyzer.fechar_persistencia()
+            finally:
+                os._exit(codigo)
+    return pid
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description='Serviço HTTP da Bússola de Releases.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8600)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Processos worker criados com fork (padrão: número de núcleos).')
+    parser.add_argument('--max-fila', type=int, default=32,
+                        help='Requisições aceitas por worker antes de responder 429.')
+    parser.add_argument('--prazo', type=float, default=30.0, help='Tempo limite de cada análise, em segundos.')
+    parser.add_argument('--max-vocabulario', type=int, default=MAX_VOCABULARIO,
+                        help='Strings novas no vocabulário do spaCy antes de reciclar o worker (0 desliga).')
+    parser.add_argument('--max-analises', type=int, default=0,
+                        help='Análises por worker antes de reciclá-lo (padrão: 0, sem limite).')
+    parser.add_argument('--max-rss-mb', type=float, default=0,
+                        help='Memória residente (MiB) a partir da qual o worker é reciclado (padrão: 0, sem limite).')
+    parser.add_argument('--perfil', default=analyzer.PERFIL_PADRAO, choices=sorted(analyzer.PERFIS_PIPELINE))
+    parser.add_argument('--metricas', action='store_true',
+                        help='Instrumenta as análises e expõe GET /metricas (formato Prometheus).')
+    parser.add_argument('--verbose', action='store_true', help='Registra cada requisição no stderr.')
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+
+    # Tudo que é pesado acontece antes do fork, para ser compartilhado pelos workers
+    release_analyzer = analyzer.aquecer(args.perfil)
+    if args.metricas:
+        release_analyzer.coletor = analyzer.ColetorMetricas()
+    sock = socket.create_server((args.host, args.porta), backlog=1024, reuse_port=False)
+    # Do aquecimento, o pai só leva o modelo para os workers: as conexões SQLite ficam fechadas
+    analyzer.fechar_persistencia()
+    gc.collect()
+    gc.freeze()  # evita que o coletor de lixo toque (e copie) as páginas herdadas
+
+    workers = {_criar_worker(sock, release_analyzer, args) for _ in range(args.workers)}
+    print(f"Bússola servindo em http://{args.host}:{args.porta} com {len(workers)} workers.", file=sys.stderr)
+    print("Partida: " + ", ".join(f"{k}={v}" for k, v in analyzer.relatorio_partida().items()), file=sys.stderr)
+
+    encerrando = False
+
+    def _encerrar(*_):
+        nonlocal encerrando
+        encerrando = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _encerrar)
+    signal.signal(signal.SIGINT, _encerrar)
+
+    # O pai só supervisiona: um worker que morre é substituído por outro
+    while workers:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not encerrando:
+            workers.add(_criar_worker(sock, release_analyzer, args))
+    sock.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
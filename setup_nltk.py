@@ -1,8 +0,0 @@
-import nltk
-
-# Baixar recursos necessários do NLTK
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('wordnet')
-
-print("Recursos do NLTK baixados com sucesso!")
@@ -1,6 +1,6 @@
 import os
 import tempfile
-from analyzer import ReleaseAnalyzer
+from analyzer import AgregadosTexto, ReleaseAnalyzer
 
 # Criar um analisador de releases
 analyzer = ReleaseAnalyzer()
@@ -87,6 +87,201 @@ for problema in resultado['problemas']:
 print("\nSugestões:")
 for sugestao in resultado['sugestoes']:
     print(f"- {sugestao}")
+# Palavras em -ada/-ida que não são particípios não contam como voz passiva
+for frase in ("A demanda é cada vez maior.", "Saúde é vida.", "No fim, não foi nada."):
+    assert not AgregadosTexto.de_texto(frase).voz_passiva, f"Falso positivo de voz passiva em: {frase}"
+assert AgregadosTexto.de_texto("A ferramenta foi desenvolvida.").voz_passiva, \
+    "Particípio feminino deveria contar como voz passiva"
+print("\n" + "="*50 + "\n")
+
+# Testar análise em lote (deve produzir os mesmos relatórios, na mesma ordem)
+print("TESTE 5: Análise em lote com nlp.pipe")
+textos = [release_teste, release_melhorado, release_voz_passiva]
+editorias_lote = ["Economia", "Tecnologia", None]
+individuais = [analyzer.analisar_release(t, e) for t, e in zip(textos, editorias_lote)]
+em_lote = list(analyzer.analisar_lote(iter(textos), iter(editorias_lote), batch_size=2))
+assert em_lote == individuais, "A análise em lote divergiu da análise individual"
+print("Pontuações em lote: " + ", ".join(str(r['pontuacao']) for r in em_lote))
+print("\n" + "="*50 + "\n")
+
+# Testar reanálise incremental (só o parágrafo editado volta ao spaCy)
+print("TESTE 6: Reanálise incremental de um release editado")
+from incremental import AnalisadorIncremental
+analisador_incremental = AnalisadorIncremental(analyzer)
+primeira = analisador_incremental.analisar_release(release_melhorado, "Tecnologia")
+release_editado = release_melhorado.replace("18 meses", "24 meses")
+segunda = analisador_incremental.analisar_release(release_editado, "Tecnologia")
+assert segunda['incremental']['reprocessados'] == 1, "Só o parágrafo editado deveria ser reprocessado"
+print(f"Pontuação: {primeira['pontuacao']}/100 -> {segunda['pontuacao']}/100 "
+      f"({segunda['incremental']['reprocessados']} de {segunda['incremental']['paragrafos']} parágrafos reprocessados)")
+print("\n" + "="*50 + "\n")
+
+# Testar análise em blocos de um documento longo, alimentado linha a linha
+print("TESTE 7: Análise em blocos com memória limitada")
+documento_longo = "\n\n".join([release_teste, release_melhorado, release_voz_passiva] * 20)
+inteiro = analyzer.analisar_release(documento_longo, "Tecnologia")
+em_blocos = analyzer.analisar_fluxo(iter(documento_longo.splitlines(keepends=True)), "Tecnologia",
+                                    tamanho_bloco=2000)
+assert em_blocos['pontuacao'] == inteiro['pontuacao'], "A análise em blocos divergiu da análise do texto inteiro"
+frases_voz_passiva = lambda r: [(a['inicio'], a['frase']) for a in r['achados'] if a['tipo'] == 'voz_passiva']
+assert frases_voz_passiva(em_blocos) == frases_voz_passiva(inteiro), "Achados em blocos apontam para outras frases"
+# Sem fim de frase no bloco, o corte cai numa quebra de linha, que não pode separar auxiliar e particípio
+sem_pontuacao = "O relatório foi\naprovado pela diretoria e o plano será\nexecutado no próximo ano\n" * 5
+em_blocos = analyzer.analisar_fluxo(iter(sem_pontuacao.splitlines(keepends=True)), tamanho_bloco=40)
+inteiro = analyzer.analisar_release(sem_pontuacao)
+assert frases_voz_passiva(em_blocos) == frases_voz_passiva(inteiro) and len(frases_voz_passiva(inteiro)) == 10, \
+    "Corte sem fim de frase partiu uma voz passiva"
+assert em_blocos['pontuacao'] == inteiro['pontuacao']
+print(f"Pontuação ({len(documento_longo.split())} palavras): {em_blocos['pontuacao']}/100")
+print("\n" + "="*50 + "\n")
+
+# Testar a fachada assíncrona (relatório preliminar e depois o completo)
+print("TESTE 8: Análise assíncrona em etapas")
+import asyncio
+from assincrono import ExecutorAssincrono
+
+async def analisar_em_etapas():
+    executor = ExecutorAssincrono(analyzer)
+    return [etapa async for etapa in executor.analisar_em_etapas(release_voz_passiva, "Tecnologia")]
+
+(_, preliminar), (_, completo) = asyncio.run(analisar_em_etapas())
+assert completo == analyzer.analisar_release(release_voz_passiva, "Tecnologia")
+assert all(problema in completo['problemas'] for problema in preliminar['problemas'])
+print(f"Preliminar: {len(preliminar['problemas'])} problemas | Completo: {completo['pontuacao']}/100")
+print("\n" + "="*50 + "\n")
+
+# Testar os achados com posição (cada um aponta para o trecho problemático)
+print("TESTE 9: Achados localizados no texto")
+from cache import normalizar_texto
+texto_normalizado = normalizar_texto(release_teste)
+resultado = analyzer.analisar_release(texto_normalizado, "Tecnologia")
+for achado in resultado['achados']:
+    trecho = texto_normalizado[achado['inicio']:achado['fim']]
+    if achado['tipo'] == 'voz_passiva':
+        assert f'"{trecho}"' in achado['mensagem'], "Posição da voz passiva não confere com o texto"
+    print(f"- Frase {achado['frase'] + 1} [{achado['gravidade']}] {trecho!r}: {achado['mensagem']}")
+
+# Com cache, o texto é normalizado antes da análise; as posições continuam sendo as do texto recebido
+from cache import CacheResultados
+analisador_com_cache = ReleaseAnalyzer(cache=CacheResultados())
+texto_crlf = "\r\n  O projeto foi aprovado.\r\nA sinergia foi desenvolvida."
+for texto in (texto_crlf, texto_crlf.replace("\r\n", "\n"), texto_crlf + "  \r\n"):
+    for relatorio in (analisador_com_cache.analisar_release(texto), next(analisador_com_cache.analisar_lote([texto]))):
+        passivas = [a for a in relatorio['achados'] if a['tipo'] == 'voz_passiva']
+        assert passivas, "Voz passiva não encontrada no texto com CRLF"
+        for achado in passivas:
+            assert texto[achado['inicio']:achado['fim']] == achado['termo'], \
+                f"Posição {achado['inicio']}-{achado['fim']} não aponta para {achado['termo']!r}"
+print("\n" + "="*50 + "\n")
+
+print("TESTE 10: Classificador de editorias")
+from classificador import ClassificadorEditorias, extrair_lemas
+editorias_teste = analyzer.editorias
+amostras = []
+for nome, palavras_chave in editorias_teste.items():
+    textos = [f"O setor de {nome} discute {a} e {b} em um novo encontro nacional." for a, b in
+              zip(palavras_chave, palavras_chave[1:] + palavras_chave[:1])]
+    amostras += [(lemas, nome) for lemas in extrair_lemas(analyzer, textos)]
+classificador = ClassificadorEditorias.treinar(amostras, dimensao=4096)
+with tempfile.TemporaryDirectory() as diretorio:
+    caminho = classificador.salvar(os.path.join(diretorio, 'editorias.npz'))
+    classificador = ClassificadorEditorias.carregar(caminho)
+analisador_classificado = ReleaseAnalyzer(classificador=classificador)
+alvo = next(iter(editorias_teste))
+texto_alvo = "Encontro reúne especialistas. " + " ".join(f"O tema {p} ganha destaque." for p in editorias_teste[alvo])
+outra = next(nome for nome in editorias_teste if nome != alvo)
+resultado = analisador_classificado.analisar_release(texto_alvo, outra)
+print(f"Editorias sugeridas: {resultado['editorias_sugeridas']}")
+assert resultado['editorias_sugeridas'][0]['editoria'] == alvo, "O classificador deveria apontar a editoria do conteúdo"
+assert any(alvo.capitalize() in s for s in resultado['sugestoes']), "Faltou a sugestão de editoria"
+print("\n" + "="*50 + "\n")
+
+print("TESTE 11: Índice de quase duplicados")
+from duplicatas import IndiceDuplicatas
+with tempfile.TemporaryDirectory() as diretorio:
+    indice = IndiceDuplicatas(caminho_sqlite=os.path.join(diretorio, 'duplicatas.db'), max_itens=2)
+    analisador_indexado = ReleaseAnalyzer(duplicatas=indice)
+    original = analisador_indexado.analisar_release(release_teste, "Tecnologia")
+    reenviado = analisador_indexado.analisar_release(release_teste.replace("hoje", "nesta segunda"), "Tecnologia")
+    print(f"Reenvio reconhecido: {reenviado.get('duplicata')}")
+    assert reenviado['pontuacao'] == original['pontuacao'] and 'duplicata' in reenviado, "O reenvio deveria ser reconhecido"
+    assert 'duplicata' not in analisador_indexado.analisar_release(release_teste, "Economia"), "Outra editoria não é duplicata"
+    analisador_indexado.analisar_release("Outro release, sem relação com o primeiro.", "Tecnologia")
+    assert len(indice) == 2, "O índice deveria descartar o release mais antigo"
+    assert analisador_indexado.analisar_release(release_teste, "Tecnologia").get('duplicata') is None
+    indice.fechar()
+print("\n" + "="*50 + "\n")
+
+print("TESTE 12: Triagem (modo rápido e piso de pontuação)")
+from verificacoes import CUSTO_DOC, CUSTO_TEXTO, ResultadoVerificacao, RegistroVerificacoes, Verificacao, REGISTRO_PADRAO
+completo = analyzer.analisar_release(release_teste, "Tecnologia")
+rapido = analyzer.analisar_release(release_teste, "Tecnologia", modo='rapido')
+print(f"Completo: {completo['pontuacao']} | Rápido: {rapido['pontuacao']} (omitidas: {rapido['verificacoes_omitidas']})")
+assert rapido['pontuacao'] >= completo['pontuacao'], "O modo rápido só omite penalidades"
+assert all(REGISTRO_PADRAO[nome].custo == CUSTO_DOC for nome in rapido['verificacoes_omitidas'])
+com_piso = analyzer.analisar_release(release_teste, "Tecnologia", piso=95)
+assert com_piso['pontuacao'] <= 95 and com_piso['verificacoes_omitidas'], "A análise deveria parar no piso"
+
+class Exclamacoes(Verificacao):
+    nome = 'exclamacoes'
+    custo = CUSTO_TEXTO
+    peso = 5
+    
+    def avaliar(self, analisador, ctx, editoria):
+        n = ctx.texto.count('!')
+        return ResultadoVerificacao(min(n, self.peso), [f"Encontramos {n} exclamações."] if n else [])
+
+registro = RegistroVerificacoes(REGISTRO_PADRAO)
+registro.registrar(Exclamacoes())
+exclamado = release_teste + " Incrível!!"
+personalizado = ReleaseAnalyzer(verificacoes=registro).analisar_release(exclamado, "Tecnologia")
+assert personalizado['pontuacao'] == analyzer.analisar_release(exclamado, "Tecnologia")['pontuacao'] - 2
+assert personalizado['problemas'][-1] == "Encontramos 2 exclamações.", "Verificação registrada não executada"
+print("\n" + "="*50 + "\n")
+
+print("TESTE 13: Redundâncias por lema e por trecho")
+flexionado = ("O lançamento da linha acontece hoje. Os lançamentos anteriores venderam bem. "
+              "Outros lançamentos virão, e o lançamento seguinte já tem data.")
+relatorio_flexionado = analyzer.analisar_release(flexionado)
+redundancias = [a['mensagem'] for a in relatorio_flexionado['achados'] if a['tipo'] == 'redundancia']
+print(f"Repetições: {sorted(set(redundancias))}")
+assert any('"lançamento" aparece 4 vezes' in m for m in redundancias), "Flexões do mesmo lema deveriam ser somadas"
+enchimento = " ".join(["de", "que", "para", "com"] * 50)
+espalhado = f"O produto chegou. {enchimento}. O produto voltou. {enchimento}. O produto ficou."
+assert not any(a['tipo'] == 'redundancia' for a in analyzer.analisar_release(espalhado)['achados']), \
+    "Repetições distantes não deveriam contar como redundância"
+assert not any(a['tipo'] == 'redundancia' for a in analyzer.analisar_fluxo(espalhado, tamanho_bloco=300)['achados'])
+print("\n" + "="*50 + "\n")
+
+print("TESTE 14: Histórico de análises")
+from historico import HistoricoAnalises
+with tempfile.TemporaryDirectory() as diretorio:
+    historico = HistoricoAnalises(os.path.join(diretorio, 'historico.db'), tamanho_lote=100)
+    analisador_historico = ReleaseAnalyzer(historico=historico)
+    analisador_historico.analisar_release(release_teste, "Tecnologia")
+    analisador_historico.analisar_release("A sinergia do ecossistema é o novo paradigma da empresa.", "Economia")
+    assert historico.descarregar() == 2 and len(historico) == 2, "As duas análises deveriam ser gravadas"
+    por_editoria = {item['grupo']: item for item in historico.distribuicao()}
+    print(f"Médias: {({editoria: item['media'] for editoria, item in por_editoria.items()})}")
+    assert set(por_editoria) == {'tecnologia', 'economia'} and sum(por_editoria['economia']['faixas']) == 1
+    jargoes = dict(historico.termos_frequentes('jargao'))
+    print(f"Jargões mais frequentes: {jargoes}")
+    assert 'sinergia' in jargoes, "Os jargões encontrados deveriam entrar no resumo"
+    historico.fechar()
+print("\n" + "="*50 + "\n")
+
+print("TESTE 15: Relatório compacto e limites do worker")
+from relatorios import RelatorioCompacto
+from servico import LimitesWorker
+compacto = RelatorioCompacto.de_dict(resultado)
+print(f"Achados no vetor compacto: {len(compacto.achados) // 7}, textos distintos: {len(compacto.textos)}")
+assert compacto.como_dict() == resultado, "O relatório compacto deveria reconstruir o original"
+assert compacto.como_dict() is not compacto.como_dict(), "Cada reconstrução deveria ser um relatório novo"
+limites = LimitesWorker(analyzer, max_vocabulario=3)
+assert limites.registrar() is None, "Sem palavras novas o worker não deveria ser reciclado"
+analyzer.analisar_release("Zumbarela e Quintifoz visitaram Brumadinhas com o Trifolindo.")
+print(f"Strings novas no vocabulário: {limites.vocabulario_novo}")
+assert limites.registrar() == 'vocabulario', "O vocabulário passou do limite e o worker deveria ser reciclado"
 print("\n" + "="*50 + "\n")
 
 print("Testes concluídos com sucesso!")
@@ -0,0 +1,262 @@
+"""Registro das verificações da análise, com escalonamento por custo e parada antecipada.
+
+Cada verificação é um plugin que declara seu nível de custo e seu peso (a
+penalidade máxima, em pontos):
+
+    class Exclamacoes(Verificacao):
+        nome = 'exclamacoes'
+        custo = CUSTO_TEXTO
+        peso = 5
+
+        def avaliar(self, analisador, ctx, editoria):
+            n = ctx.texto.count('!') if ctx.texto else 0
+            if n < 3:
+                return ResultadoVerificacao()
+            return ResultadoVerificacao(min(n, self.peso), [f"Encontramos {n} exclamações."],
+                                        ["Reserve a exclamação para citações."])
+
+    REGISTRO_PADRAO.registrar(Exclamacoes())
+
+O escalonador roda primeiro as verificações de nível 'texto' (só regex sobre o
+texto) e depois as de nível 'doc', que precisam do spaCy; dentro de cada nível,
+as de maior peso vêm antes. O Doc só é calculado quando a primeira verificação de
+nível 'doc' vai rodar, então o modo 'rapido', que omite esse nível, não passa
+pelo spaCy. Com um piso, a análise para assim que a pontuação chega a ele: as
+penalidades só descem a nota, então a pontuação final seria no máximo essa.
+
+Problemas e sugestões saem sempre na ordem do registro, qualquer que seja a
+ordem de execução.
+"""
+import hashlib
+from collections import namedtuple
+
+from metricas import medir
+
+CUSTO_TEXTO = 'texto'
+CUSTO_DOC = 'doc'
+NIVEIS_CUSTO = (CUSTO_TEXTO, CUSTO_DOC)
+
+MODO_COMPLETO = 'completo'
+MODO_RAPIDO = 'rapido'
+# Níveis de custo executados em cada modo
+MODOS = {
+    MODO_COMPLETO: NIVEIS_CUSTO,
+    MODO_RAPIDO: (CUSTO_TEXTO,),
+}
+
+ResultadoVerificacao = namedtuple('ResultadoVerificacao', ['penalidade', 'problemas', 'sugestoes', 'dados'],
+                                  defaults=(0, (), (), None))
+
+# Resultado do escalonador: penalidade total, mensagens em ordem de registro,
+# dados de cada verificação executada (por nome) e nomes das omitidas
+Execucao = namedtuple('Execucao', ['penalidade', 'problemas', 'sugestoes', 'dados', 'omitidas'])
+
+
+class Verificacao:
+    """Base dos plugins de verificação."""
+
+    nome = None
+    custo = CUSTO_DOC
+    peso = 0
+    # Incremente quando o comportamento mudar, para invalidar relatórios em cache
+    versao = '1'
+
+    def avaliar(self, analisador, ctx, editoria):
+        """Retorna um ResultadoVerificacao; a penalidade não deve passar de `peso`."""
+        raise NotImplementedError
+
+
+class RegistroVerificacoes:
+    """Verificações em ordem de exibição, com o escalonamento por custo e peso."""
+
+    def __init__(self, verificacoes=()):
+        self._verificacoes = []
+        for verificacao in verificacoes:
+            self.registrar(verificacao)
+
+    def registrar(self, verificacao):
+        """Inclui uma verificação no fim da ordem de exibição (ou substitui a de mesmo nome)."""
+        if verificacao.custo not in NIVEIS_CUSTO:
+            raise ValueError(f"Custo desconhecido: {verificacao.custo!r}. Use um de {NIVEIS_CUSTO}.")
+        for i, existente in enumerate(self._verificacoes):
+            if existente.nome == verificacao.nome:
+                self._verificacoes[i] = verificacao
+                return verificacao
+        self._verificacoes.append(verificacao)
+        return verificacao
+
+    def remover(self, nome):
+        self._verificacoes = [v for v in self._verificacoes if v.nome != nome]
+
+    def __iter__(self):
+        return iter(list(self._verificacoes))
+
+    def __getitem__(self, nome):
+        for verificacao in self._verificacoes:
+            if verificacao.nome == nome:
+                return verificacao
+        raise KeyError(nome)
+
+    @property
+    def identificador(self):
+        """Muda quando uma verificação entra, sai ou muda de versão (entra na chave do cache)."""
+        descricao = ','.join(f"{v.nome}:{v.versao}" for v in self._verificacoes)
+        return hashlib.sha1(descricao.encode('utf-8')).hexdigest()[:12]
+
+    def agenda(self, modo=MODO_COMPLETO):
+        """Verificações do modo, na ordem de execução: nível mais barato primeiro e, nele, maior peso."""
+        if modo not in MODOS:
+            raise ValueError(f"Modo desconhecido: {modo!r}. Use um de {sorted(MODOS)}.")
+        niveis = MODOS[modo]
+        ordem = {v.nome: i for i, v in enumerate(self._verificacoes)}
+        return sorted((v for v in self._verificacoes if v.custo in niveis),
+                      key=lambda v: (NIVEIS_CUSTO.index(v.custo), -v.peso, ordem[v.nome]))
+
+    def executar(self, analisador, ctx, editoria=None, modo=MODO_COMPLETO, piso=None):
+        """Roda as verificações do modo sobre o contexto, parando se a pontuação chegar a `piso`."""
+        agenda = self.agenda(modo)
+        executadas = {v.nome for v in agenda}
+        omitidas = [v.nome for v in self._verificacoes if v.nome not in executadas]
+        resultados = {}
+        penalidade = 0
+        for i, verificacao in enumerate(agenda):
+            if piso is not None and 100 - penalidade <= piso:
+                omitidas += [v.nome for v in agenda[i:]]
+                break
+            if verificacao.custo == CUSTO_DOC:
+                ctx.garantir_doc()
+            resultado = medir(ctx.medidor, verificacao.nome, verificacao.avaliar, analisador, ctx, editoria)
+            resultados[verificacao.nome] = resultado
+            penalidade += resultado.penalidade
+
+        problemas = []
+        sugestoes = []
+        for verificacao in self._verificacoes:
+            resultado = resultados.get(verificacao.nome)
+            if resultado is not None:
+                problemas.extend(resultado.problemas)
+                sugestoes.extend(resultado.sugestoes)
+        dados = {nome: resultado.dados for nome, resultado in resultados.items()}
+        return Execucao(penalidade, problemas, sugestoes, dados, omitidas)
+
+
+class Redundancias(Verificacao):
+    """Lemas repetidos em excesso numa janela de tokens; os dados trazem as Repeticao encontradas."""
+
+    nome = 'redundancias'
+    custo = CUSTO_DOC
+    peso = 20
+    versao = '2'
+
+    def avaliar(self, analisador, ctx, editoria):
+        redundancias = analisador._verificar_redundancias(ctx)
+        if not redundancias:
+            return ResultadoVerificacao(dados=redundancias)
+        return ResultadoVerificacao(min(len(redundancias) * 5, self.peso),
+                                    [f"Encontramos {len(redundancias)} palavras repetidas em excesso."],
+                                    ["Considere usar sinônimos para: " + ", ".join(r.lema for r in redundancias)],
+                                    redundancias)
+
+
+class VozPassiva(Verificacao):
+    nome = 'voz_passiva'
+    custo = CUSTO_TEXTO
+    peso = 15
+
+    def avaliar(self, analisador, ctx, editoria):
+        voz_passiva = analisador._verificar_voz_passiva(ctx)
+        if not voz_passiva:
+            return ResultadoVerificacao()
+        n_voz_passiva = ctx.textual.n_voz_passiva
+        return ResultadoVerificacao(
+            min(n_voz_passiva * 3, self.peso),
+            [f"Encontramos {n_voz_passiva} ocorrências de voz passiva."],
+            ["Considere reescrever em voz ativa: " + "; ".join(trecho for _, _, trecho, _ in voz_passiva[:3])])
+
+
+class Comprimento(Verificacao):
+    nome = 'comprimento'
+    custo = CUSTO_TEXTO
+    peso = 25  # até 15 por parágrafos longos e 10 por frases longas
+
+    def avaliar(self, analisador, ctx, editoria):
+        problemas, sugestoes, penalidade = analisador._verificar_comprimento(ctx)
+        return ResultadoVerificacao(penalidade, problemas, sugestoes)
+
+
+class Jargoes(Verificacao):
+    nome = 'jargoes'
+    custo = CUSTO_DOC
+    peso = 10
+
+    def avaliar(self, analisador, ctx, editoria):
+        jargoes = analisador._verificar_jargoes(ctx)
+        if not jargoes:
+            return ResultadoVerificacao()
+        return ResultadoVerificacao(min(len(jargoes) * 2, self.peso),
+                                    [f"Encontramos {len(jargoes)} jargões corporativos."],
+                                    ["Considere substituir: " + ", ".join(jargoes)])
+
+
+class InfoEssenciais(Verificacao):
+    nome = 'info_essenciais'
+    custo = CUSTO_DOC
+    peso = 25
+
+    def avaliar(self, analisador, ctx, editoria):
+        faltantes = analisador._verificar_info_essenciais(ctx)
+        if not faltantes:
+            return ResultadoVerificacao()
+        return ResultadoVerificacao(min(len(faltantes) * 5, self.peso),
+                                    ["Seu release pode estar faltando informações essenciais."],
+                                    ["Considere incluir: " + ", ".join(faltantes)])
+
+
+class Clareza(Verificacao):
+    nome = 'clareza'
+    custo = CUSTO_DOC
+    peso = 15
+
+    def avaliar(self, analisador, ctx, editoria):
+        clareza_score, problemas, sugestoes = analisador._verificar_clareza(ctx)
+        return ResultadoVerificacao((100 - clareza_score) * 0.15, problemas, sugestoes)
+
+
+class Editoria(Verificacao):
+    """Relevância para a editoria escolhida; os dados trazem o ranking do classificador e o feedback."""
+
+    nome = 'editoria'
+    custo = CUSTO_DOC
+    peso = 10
+
+    def avaliar(self, analisador, ctx, editoria):
+        # Editorias mais prováveis pelo conteúdo, todas pontuadas de uma vez pelo classificador
+        ranking = analisador._classificar_editorias(ctx)
+        dados = {'ranking': ranking, 'feedback': ""}
+        if not editoria or editoria.lower() not in ctx.regras.editorias:
+            return ResultadoVerificacao(dados=dados)
+
+        relevancia = analisador._verificar_relevancia_editoria(ctx, editoria.lower(), ranking)
+        if relevancia < 0.3:
+            sugestoes = [f"Considere incluir mais termos relacionados à {editoria}."]
+            melhores = [(nome, p) for nome, p in ranking[:3] if nome != editoria.lower() and p >= 0.05]
+            if melhores:
+                sugestoes.append("Pelo conteúdo, o release combina mais com: "
+                                 + ", ".join(f"{nome.capitalize()} ({p:.0%})" for nome, p in melhores))
+            dados['feedback'] = (f"Seu release parece não estar bem alinhado com a editoria de {editoria}. "
+                                 "Considere revisar o conteúdo para torná-lo mais relevante.")
+            return ResultadoVerificacao(self.peso, [f"Seu release tem baixa relevância para a editoria de {editoria}."],
+                                        sugestoes, dados)
+        if relevancia < 0.6:
+            dados['feedback'] = (f"Seu release está parcialmente alinhado com a editoria de {editoria}. "
+                                 "Pode melhorar a relevância.")
+        else:
+            dados['feedback'] = (f"Muito bem, marujo! Seu release condiz com a editoria de {editoria} "
+                                 "que você quer trabalhar. Avante!")
+        return ResultadoVerificacao(dados=dados)
+
+
+# Registro usado pelos analisadores que não recebem um próprio
+REGISTRO_PADRAO = RegistroVerificacoes([
+    Redundancias(), VozPassiva(), Comprimento(), Jargoes(), InfoEssenciais(), Clareza(), Editoria(),
+])